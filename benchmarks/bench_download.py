@@ -0,0 +1,112 @@
+"""
+Benchmark of archive download writers against a local HTTP server.
+
+Downloads a random archive through ``session_manager`` with the 1 KiB
+``iter_content`` loop ``download_file`` used to run, with ``write_response``
+at several buffer sizes and with ``download_segments`` over 4 connections, and
+reports throughput and the CPU time of the downloading thread per GiB; the
+segmented row's CPU time leaves out its worker threads. ``--bandwidth``
+throttles each connection, which shows the gain of parallel ranges. Run from the repository root::
+
+    python -m benchmarks.bench_download [--size-mb 256] [--repeat 3] [--bandwidth 104857600]
+"""
+import argparse
+import os
+import tempfile
+import time
+from functools import partial
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'test_utils.test_settings')
+
+import django  # pylint: disable=wrong-import-position
+
+django.setup()
+
+# pylint: disable=wrong-import-position
+from course_import.downloads import SpooledArchive, download_segments, write_response
+from course_import.http_client import session_manager
+from test_utils.http_server import FixtureHTTPServer
+
+GIB = 1024 ** 3
+
+
+def iter_content_1k(response, destination):
+    """
+    The chunk loop ``download_file`` used before ``write_response``.
+    """
+    total = 0
+    for chunk in response.iter_content(chunk_size=1024):
+        if chunk:
+            total += len(chunk)
+            destination.write(chunk)
+    return total
+
+
+def segmented_4(response, destination):
+    """
+    Fetch the body as 4 concurrent byte ranges.
+    """
+    return download_segments(response.url, response, destination, 4, session_manager.get)
+
+
+WRITERS = {
+    'iter_content 1 KiB': iter_content_1k,
+    'readinto 64 KiB': partial(write_response, buffer_size=64 * 1024),
+    'readinto 1 MiB': partial(write_response, buffer_size=1024 * 1024),
+    'readinto 4 MiB': partial(write_response, buffer_size=4 * 1024 * 1024),
+    'segments x4 1 MiB': segmented_4,
+}
+
+
+def write_archive(path, size):
+    with open(path, 'wb') as archive:
+        for _ in range(0, size, 1024 * 1024):
+            archive.write(os.urandom(1024 * 1024))
+
+
+def download(url, writer, directory):
+    """
+    Download ``url`` into a spilled ``SpooledArchive`` with ``writer``; return bytes, wall and thread CPU seconds.
+    """
+    wall = time.perf_counter()
+    cpu = time.thread_time()
+    response = session_manager.get(url, stream=True)
+    try:
+        with SpooledArchive('archive.tar.gz', directory, max_memory_size=0) as archive:
+            size = writer(response, archive)
+    finally:
+        response.close()
+    return size, time.perf_counter() - wall, time.thread_time() - cpu
+
+
+def run(size_mb=256, repeat=3, bandwidth=None):
+    """
+    Time every writer and return rows of ``(writer, MB/s, CPU seconds per GiB)``, best of ``repeat``.
+    """
+    rows = []
+    with tempfile.TemporaryDirectory() as root:
+        write_archive(os.path.join(root, 'archive.tar.gz'), size_mb * 1024 * 1024)
+        with FixtureHTTPServer(root, bandwidth=bandwidth) as server:
+            url = server.url('archive.tar.gz')
+            download(url, WRITERS['readinto 1 MiB'], root)  # warm the connection pool and page cache
+            for name, writer in WRITERS.items():
+                timings = [download(url, writer, root) for _ in range(repeat)]
+                size, wall, cpu = min(timings, key=lambda timing: timing[1])
+                rows.append((name, size / wall / 1e6, min(timing[2] for timing in timings) * GIB / size))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--size-mb', type=int, default=256)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--bandwidth', type=int, default=None, help="upstream bytes per second")
+    args = parser.parse_args()
+
+    print(f"{'writer':<20} {'MB/s':>10} {'CPU s/GiB':>10}")
+    for name, throughput, cpu_per_gib in run(args.size_mb, args.repeat, args.bandwidth):
+        print(f"{name:<20} {throughput:>10.1f} {cpu_per_gib:>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
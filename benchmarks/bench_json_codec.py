@@ -0,0 +1,82 @@
+"""
+Micro-benchmark of the JSON codec backends on template catalogs.
+
+Decodes and encodes synthetic catalogs of realistic sizes with every installed
+backend of ``course_import.codec``. Run from the repository root::
+
+    python -m benchmarks.bench_json_codec [--sizes 100 1000 10000] [--repeat 5]
+"""
+import argparse
+import timeit
+
+from course_import.codec import CODECS
+
+DEFAULT_SIZES = (100, 1000, 10000)
+
+
+def make_entry(index):
+    """
+    Build catalog entry number ``index``, shaped like the published course catalogs.
+    """
+    return {
+        "courses_name": f"Course group {index % 25}",
+        "zip_url": f"https://raw.githubusercontent.com/org/courses/main/group-{index % 25}/course-{index}.tar.gz",
+        "metadata": {
+            "title": f"Introduction to topic {index}",
+            "description": "Learn the fundamentals of the Open edX platform, including how to create and "
+                           "manage courses. " * 2,
+            "thumbnail": f"https://cdn.example.com/thumbnails/{index}.png",
+            "tags": ["beginner", f"tag-{index % 40}"],
+            "level": ("intro", "intermediate", "advanced")[index % 3],
+            "active": index % 7 != 0,
+        },
+    }
+
+
+def make_catalog(size):
+    """
+    Build a catalog of ``size`` entries shaped like the published course catalogs.
+    """
+    return [make_entry(index) for index in range(size)]
+
+
+def best_of(function, repeat):
+    """
+    Return the fastest of ``repeat`` timings of ``function``, in milliseconds.
+    """
+    return min(timeit.repeat(function, number=1, repeat=repeat)) * 1000
+
+
+def run(sizes=DEFAULT_SIZES, repeat=5):
+    """
+    Time every backend and return rows of ``(backend, size, bytes, loads ms, dumps ms, sorted dumps ms)``.
+    """
+    rows = []
+    for size in sizes:
+        catalog = make_catalog(size)
+        body = CODECS['json'].dumps(catalog)
+        for name, codec in CODECS.items():
+            rows.append((
+                name,
+                size,
+                len(body),
+                best_of(lambda codec=codec: codec.loads(body), repeat),
+                best_of(lambda codec=codec: codec.dumps(catalog), repeat),
+                best_of(lambda codec=codec: codec.dumps(catalog, sort_keys=True), repeat),
+            ))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'backend':<8} {'entries':>8} {'bytes':>10} {'loads ms':>10} {'dumps ms':>10} {'sorted ms':>10}")
+    for name, size, length, load_ms, dump_ms, sorted_ms in run(args.sizes, args.repeat):
+        print(f"{name:<8} {size:>8} {length:>10} {load_ms:>10.2f} {dump_ms:>10.2f} {sorted_ms:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,294 @@
+"""
+Benchmark of ``CourseTemplateRequested.run_filter`` against a local GitHub stand-in.
+
+Synthetic catalogs are served by an in-process HTTP server with configurable
+latency and bandwidth, and the GitHub templates pipeline is measured in these
+scenarios:
+
+* ``cold``: every call starts from an empty cache and downloads the catalog.
+* ``revalidate``: the cached catalog has expired and upstream answers 304 Not Modified.
+* ``warm``: every call is served from the in-process cache.
+* ``concurrent``: ``--concurrency`` callers ask for an uncached catalog at once.
+
+Each scenario runs in a fresh interpreter so its peak RSS is its own. Results are
+written as JSON, and ``--compare`` prints the change against an earlier run.
+Run from the repository root::
+
+    python -m benchmarks.bench_pipeline [--sizes 10 1000 100000] [--latency 0.05]
+        [--bandwidth 10485760] [--output results.json] [--compare baseline.json]
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.bench_json_codec import make_entry
+
+SCENARIOS = ('cold', 'revalidate', 'warm', 'concurrent')
+DEFAULT_SIZES = (10, 1000, 100000)
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def write_catalog(path, size):
+    """
+    Write a JSON catalog of ``size`` entries to ``path`` one entry at a time, and return its size in bytes.
+    """
+    with open(path, 'w', encoding='utf-8') as catalog:
+        catalog.write('[')
+        for index in range(size):
+            if index:
+                catalog.write(',')
+            json.dump(make_entry(index), catalog, separators=(',', ':'))
+        catalog.write(']')
+    return os.path.getsize(path)
+
+
+def percentile(samples, fraction):
+    """
+    Return the nearest-rank ``fraction`` percentile of ``samples``.
+    """
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))]
+
+
+def peak_rss_mb():
+    """
+    Return the peak resident set size of this process so far, in MiB.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def summarize(samples, wall):
+    """
+    Summarize per-call latencies (seconds) of calls that took ``wall`` seconds in total.
+    """
+    return {
+        'calls': len(samples),
+        'wall_s': round(wall, 4),
+        'throughput_per_s': round(len(samples) / wall, 2),
+        'latency_ms': {
+            'p50': round(percentile(samples, 0.5) * 1000, 3),
+            'p90': round(percentile(samples, 0.9) * 1000, 3),
+            'p99': round(percentile(samples, 0.99) * 1000, 3),
+            'max': round(max(samples) * 1000, 3),
+            'mean': round(sum(samples) / len(samples) * 1000, 3),
+        },
+    }
+
+
+def run_scenario(scenario, catalog_path, options):
+    """
+    Run one scenario in this process and return its measurements.
+    """
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'test_utils.test_settings')
+    import django  # pylint: disable=import-outside-toplevel
+    django.setup()
+    # pylint: disable=import-outside-toplevel
+    from django.test.utils import override_settings
+
+    from course_import.cache import catalog_cache
+    from course_import.codec import get_codec
+    from course_import.filters import CourseTemplateRequested
+    from test_utils.http_server import FixtureHTTPServer
+
+    root, name = os.path.split(catalog_path)
+    with FixtureHTTPServer(root, latency=options.latency, bandwidth=options.bandwidth) as server:
+        url = server.url(name)
+
+        def call():
+            started = time.perf_counter()
+            output = CourseTemplateRequested.run_filter(source_type='github', source_config=url, stream=options.stream)
+            elapsed = time.perf_counter() - started
+            if isinstance(output['result'], dict):
+                raise RuntimeError(output['result'])
+            return elapsed
+
+        ttl = 0 if scenario == 'revalidate' else 3600
+        with override_settings(COURSE_IMPORT_CATALOG_CACHE_TTL=ttl):
+            # Primes the cache for ``revalidate`` and ``warm``, and imports and connections for all.
+            call()
+            del server.requests[:]
+            baseline_rss = peak_rss_mb()
+
+            samples = []
+            started = time.perf_counter()
+            if scenario == 'concurrent':
+                for _ in range(options.iterations):
+                    catalog_cache.clear()
+                    samples.extend(call_concurrently(call, options.concurrency))
+            else:
+                calls = options.warm_iterations if scenario == 'warm' else options.iterations
+                for _ in range(calls):
+                    if scenario == 'cold':
+                        catalog_cache.clear()
+                    samples.append(call())
+            wall = time.perf_counter() - started
+
+    result = {
+        'scenario': scenario,
+        'json_backend': get_codec().name,
+        'concurrency': options.concurrency if scenario == 'concurrent' else 1,
+        'upstream_requests': len(server.requests),
+    }
+    result.update(summarize(samples, wall))
+    result['baseline_rss_mb'] = round(baseline_rss, 1)
+    result['peak_rss_mb'] = round(peak_rss_mb(), 1)
+    return result
+
+
+def call_concurrently(call, concurrency):
+    """
+    Start ``concurrency`` threads running ``call`` at the same moment and return their timings.
+    """
+    barrier = threading.Barrier(concurrency)
+    samples = []
+    errors = []
+
+    def caller():
+        barrier.wait()
+        try:
+            samples.append(call())
+        except Exception as err:  # pylint: disable=broad-except
+            errors.append(err)
+
+    threads = [threading.Thread(target=caller) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+    return samples
+
+
+def worker_args(options):
+    """
+    Return the command line options forwarded to a scenario worker.
+    """
+    args = [
+        '--iterations', str(options.iterations),
+        '--warm-iterations', str(options.warm_iterations),
+        '--concurrency', str(options.concurrency),
+        '--latency', str(options.latency),
+    ]
+    if options.bandwidth:
+        args += ['--bandwidth', str(options.bandwidth)]
+    if options.stream:
+        args.append('--stream')
+    return args
+
+
+def run(options):
+    """
+    Run every scenario for every catalog size, each in its own interpreter, and return the report.
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as root:
+        for size in options.sizes:
+            catalog_path = os.path.join(root, f'catalog-{size}.json')
+            catalog_bytes = write_catalog(catalog_path, size)
+            for scenario in options.scenarios:
+                output = subprocess.run(
+                    [sys.executable, '-m', 'benchmarks.bench_pipeline', '--worker', scenario, catalog_path]
+                    + worker_args(options),
+                    cwd=REPO_ROOT, check=True, stdout=subprocess.PIPE, text=True,
+                ).stdout
+                result = json.loads(output.strip().splitlines()[-1])
+                result.update(size=size, catalog_bytes=catalog_bytes)
+                results.append(result)
+                print(format_result(result), file=sys.stderr)
+    return {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'options': {
+            'latency': options.latency,
+            'bandwidth': options.bandwidth,
+            'iterations': options.iterations,
+            'warm_iterations': options.warm_iterations,
+            'concurrency': options.concurrency,
+            'stream': options.stream,
+        },
+        'results': results,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT, check=True, stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL, text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def format_result(result):
+    latency = result['latency_ms']
+    return (
+        f"{result['scenario']:<11} {result['size']:>8} entries  {result['throughput_per_s']:>10.1f} calls/s  "
+        f"p50 {latency['p50']:>9.2f}ms  p99 {latency['p99']:>9.2f}ms  "
+        f"peak RSS {result['peak_rss_mb']:>7.1f}MiB  upstream {result['upstream_requests']}"
+    )
+
+
+def compare(baseline, report):
+    """
+    Return lines comparing the results of ``report`` with those of the same scenario and size in ``baseline``.
+    """
+    previous = {(result['scenario'], result['size']): result for result in baseline['results']}
+    lines = [f"{baseline.get('commit')} -> {report.get('commit')}"]
+    for result in report['results']:
+        old = previous.get((result['scenario'], result['size']))
+        if old is None:
+            continue
+        lines.append(
+            f"{result['scenario']:<11} {result['size']:>8} entries  "
+            f"throughput {result['throughput_per_s'] / old['throughput_per_s']:>6.2f}x  "
+            f"p50 {result['latency_ms']['p50'] / old['latency_ms']['p50']:>6.2f}x  "
+            f"p99 {result['latency_ms']['p99'] / old['latency_ms']['p99']:>6.2f}x  "
+            f"peak RSS {result['peak_rss_mb'] - old['peak_rss_mb']:>+8.1f}MiB"
+        )
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument('--iterations', type=int, default=10, help="calls (or concurrent rounds) per scenario")
+    parser.add_argument('--warm-iterations', type=int, default=200, help="calls in the warm scenario")
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds added to every upstream response")
+    parser.add_argument('--bandwidth', type=int, default=None, help="upstream bytes per second")
+    parser.add_argument('--stream', action='store_true', help="parse catalogs while they download")
+    parser.add_argument('--output', help="write the JSON report to this file instead of stdout")
+    parser.add_argument('--compare', help="a previous JSON report to compare against")
+    parser.add_argument('--worker', nargs=2, metavar=('SCENARIO', 'CATALOG'), help=argparse.SUPPRESS)
+    options = parser.parse_args()
+
+    if options.worker:
+        print(json.dumps(run_scenario(options.worker[0], options.worker[1], options)))
+        return
+
+    report = run(options)
+    if options.output:
+        with open(options.output, 'w', encoding='utf-8') as output:
+            json.dump(report, output, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+    if options.compare:
+        with open(options.compare, encoding='utf-8') as baseline:
+            print('\n'.join(compare(json.load(baseline), report)), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
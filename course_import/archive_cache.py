@@ -0,0 +1,359 @@
+"""
+A content-addressed cache of downloaded course archives in import storage.
+
+The same template archive is imported into many courses. With
+``COURSE_IMPORT_ARCHIVE_CACHE_MAX_BYTES`` set, every downloaded archive is kept
+in import storage under ``olx_import/cache/<sha256 of its body>``, and its URL
+is recorded with the upstream ETag under ``olx_import/cache/urls/``, so every
+worker process sees it. The next import of that URL revalidates with
+If-None-Match, and on a 304 gets its archive from the cache without downloading
+or uploading it.
+
+The platform's ``import_olx`` task deletes the archive it is given once done, so
+each import gets its own reference to the cached body. On a file system storage
+this is a hard link and costs neither a copy nor extra space; on S3 it is a
+server-side ``copy_object``. Other storages copy the body through the worker. A
+reference counts as live while it still exists, that is until its import has
+consumed it. Cached archives with live references are never evicted. The others
+are evicted least recently used first once the cache outgrows its size limit.
+
+The in-process lock only guards the index and URL maps; uploads, copies and
+existence checks run outside it. An archive is pinned while a reference to it
+is being created, so eviction in another thread leaves it alone meanwhile.
+"""
+import hashlib
+import logging
+import os
+import threading
+import time
+
+from cms.djangoapps.contentstore.storage import course_import_export_storage  # pylint: disable=import-error
+from django.conf import settings
+from django.core.files.base import ContentFile
+
+from course_import.codec import dumps, loads
+
+log = logging.getLogger(__name__)
+
+CACHE_PREFIX = 'olx_import/cache/'
+URL_PREFIX = CACHE_PREFIX + 'urls/'
+IMPORT_PREFIX = 'olx_import/'
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class CachedArchive:
+    """
+    An archive body stored once in import storage, with the imports referencing it.
+    """
+    __slots__ = ('digest', 'size', 'last_used', 'references', 'pins')
+
+    def __init__(self, digest, size, last_used=0.0):
+        self.digest = digest
+        self.size = size
+        self.last_used = last_used
+        self.references = []
+        self.pins = 0
+
+    @property
+    def name(self):
+        return CACHE_PREFIX + self.digest
+
+
+def archive_digest(archive):
+    """
+    Return the sha256 hex digest of a ``SpooledArchive``'s content.
+    """
+    digest = hashlib.sha256()
+    content = archive.as_file()
+    for chunk in content.chunks(HASH_CHUNK_SIZE):
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()
+
+
+def copy_in_storage(storage, source, target):
+    """
+    Copy ``source`` to ``target`` within ``storage`` and return the name it was saved under.
+
+    S3 storages (``bucket`` and ``_normalize_name``, as in django-storages) copy on the
+    server side; other storages read the body and save it again.
+    """
+    bucket = getattr(storage, 'bucket', None)
+    normalize = getattr(storage, '_normalize_name', None)
+    if bucket is not None and normalize is not None:
+        bucket.Object(normalize(target)).copy_from(CopySource={'Bucket': bucket.name, 'Key': normalize(source)})
+        return target
+    with storage.open(source, 'rb') as content:
+        return storage.save(target, content)
+
+
+class ArchiveCache:
+    """
+    Archives kept in import storage by content hash, found by URL and ETag.
+
+    Arguments:
+        storage: The Django storage imports read from; ``course_import_export_storage`` by default.
+        max_bytes (int): Overrides ``COURSE_IMPORT_ARCHIVE_CACHE_MAX_BYTES``; 0 disables the cache.
+    """
+
+    def __init__(self, storage=None, max_bytes=None):
+        self._storage = storage
+        self._max_bytes = max_bytes
+        self._archives = None
+        self._urls = {}
+        self._lock = threading.RLock()
+
+    @property
+    def storage(self):
+        return self._storage or course_import_export_storage
+
+    @property
+    def max_bytes(self):
+        if self._max_bytes is not None:
+            return self._max_bytes
+        return getattr(settings, 'COURSE_IMPORT_ARCHIVE_CACHE_MAX_BYTES', 0)
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def _index(self):
+        """
+        Return the cached archives by digest, listing the cache directory on first use.
+        """
+        archives = self._archives
+        if archives is None:
+            archives = {}
+            try:
+                _dirs, names = self.storage.listdir(CACHE_PREFIX)
+            except (OSError, NotImplementedError):
+                names = []
+            for digest in names:
+                try:
+                    modified = self.storage.get_modified_time(CACHE_PREFIX + digest).timestamp()
+                except (OSError, NotImplementedError):
+                    modified = 0.0
+                archives[digest] = CachedArchive(digest, self.storage.size(CACHE_PREFIX + digest), modified)
+            with self._lock:
+                if self._archives is None:
+                    self._archives = archives
+                archives = self._archives
+        return archives
+
+    def _archive(self, digest):
+        """
+        Return the cached archive with ``digest``, including one stored by another process, or None.
+        """
+        archives = self._index()
+        with self._lock:
+            archive = archives.get(digest)
+        if archive is None and digest is not None and self.storage.exists(CACHE_PREFIX + digest):
+            size = self.storage.size(CACHE_PREFIX + digest)
+            with self._lock:
+                archive = archives.setdefault(digest, CachedArchive(digest, size))
+        return archive
+
+    def _pin(self, digest):
+        """
+        Return the cached archive with ``digest`` pinned against eviction, or None.
+        """
+        archive = self._archive(digest)
+        if archive is None:
+            return None
+        with self._lock:
+            if (self._archives or {}).get(digest) is not archive:
+                # Evicted meanwhile.
+                return None
+            archive.pins += 1
+        return archive
+
+    def _unpin(self, archive):
+        with self._lock:
+            archive.pins -= 1
+
+    @staticmethod
+    def _url_record(url):
+        return URL_PREFIX + hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def _load_url(self, url):
+        """
+        Return the ``(etag, digest)`` recorded in storage for ``url``, or None.
+        """
+        name = self._url_record(url)
+        try:
+            if not self.storage.exists(name):
+                return None
+            with self.storage.open(name, 'rb') as record:
+                data = loads(record.read())
+            return data['etag'], data['digest']
+        except (OSError, ValueError, KeyError, TypeError) as err:
+            log.warning(f"Could not read archive cache record for {url}: {err}")
+            return None
+
+    def _save_url(self, url, etag, digest):
+        name = self._url_record(url)
+        try:
+            if self.storage.exists(name):
+                self.storage.delete(name)
+            stored_name = self.storage.save(name, ContentFile(dumps({'url': url, 'etag': etag, 'digest': digest})))
+            if stored_name != name:
+                # Another process recorded the URL meanwhile.
+                self.storage.delete(stored_name)
+        except OSError as err:
+            log.warning(f"Could not write archive cache record for {url}: {err}")
+
+    def lookup(self, url):
+        """
+        Return the ETag an archive of ``url`` was cached with, to revalidate it, or None.
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            cached = self._urls.get(url)
+        if cached is None:
+            cached = self._load_url(url)
+            if cached is not None:
+                with self._lock:
+                    self._urls[url] = cached
+        return cached[0] if cached else None
+
+    def checkout(self, url, filename):
+        """
+        Return a new storage name referencing the cached archive of ``url``, for one import.
+
+        Returns:
+            str: None if the archive is no longer cached.
+        """
+        with self._lock:
+            cached = self._urls.get(url)
+        _etag, digest = cached or self._load_url(url) or (None, None)
+        archive = self._pin(digest)
+        if archive is None:
+            self._forget(url, digest)
+            return None
+        try:
+            if not self.storage.exists(archive.name):
+                self._forget(url, digest)
+                return None
+            name = self._reference(archive, filename)
+        finally:
+            self._unpin(archive)
+        log.info(f"Archive cache hit for {url}: {name}")
+        return name
+
+    def store(self, url, etag, archive, filename):
+        """
+        Add a downloaded ``SpooledArchive`` to the cache and return a storage name referencing it.
+
+        A body already cached under another URL is not uploaded again.
+        """
+        digest = archive_digest(archive)
+        cached = self._pin(digest)
+        if cached is not None and not self.storage.exists(cached.name):
+            self._unpin(cached)
+            cached = None
+        if cached is None:
+            stored_name = self.storage.save(CACHE_PREFIX + digest, archive.as_file())
+            if stored_name != CACHE_PREFIX + digest:
+                # Another process stored the same body meanwhile.
+                self.storage.delete(stored_name)
+            archives = self._index()
+            with self._lock:
+                cached = archives.setdefault(digest, CachedArchive(digest, archive.size))
+                cached.pins += 1
+        try:
+            if etag and not etag.startswith('W/'):
+                with self._lock:
+                    self._urls[url] = (etag, digest)
+                self._save_url(url, etag, digest)
+            name = self._reference(cached, filename)
+        finally:
+            self._unpin(cached)
+        self.evict()
+        return name
+
+    def _reference(self, archive, filename):
+        """
+        Create a storage name for ``filename`` with the content of ``archive``, and record it.
+        """
+        while True:
+            name = self.storage.get_available_name(IMPORT_PREFIX + filename)
+            try:
+                source, target = self.storage.path(archive.name), self.storage.path(name)
+            except NotImplementedError:
+                name = copy_in_storage(self.storage, archive.name, name)
+                break
+            try:
+                os.link(source, target)
+                break
+            except FileExistsError:
+                continue
+        archives = self._index()
+        with self._lock:
+            for other in archives.values():
+                if name in other.references:
+                    # The import consumed that reference and its name was reused.
+                    other.references.remove(name)
+            archive.references.append(name)
+            archive.last_used = time.time()
+        return name
+
+    def live_references(self, archive):
+        """
+        Return the references to ``archive`` whose import has not consumed them yet.
+        """
+        with self._lock:
+            references = list(archive.references)
+        consumed = {name for name in references if not self.storage.exists(name)}
+        with self._lock:
+            archive.references = [name for name in archive.references if name not in consumed]
+            return list(archive.references)
+
+    def _forget(self, url, digest):
+        with self._lock:
+            self._urls.pop(url, None)
+            if digest is not None and self._archives is not None:
+                self._archives.pop(digest, None)
+        try:
+            self.storage.delete(self._url_record(url))
+        except OSError as err:
+            log.warning(f"Could not delete archive cache record for {url}: {err}")
+
+    def evict(self):
+        """
+        Delete least recently used archives without live references until the cache fits in ``max_bytes``.
+        """
+        archives = self._index()
+        with self._lock:
+            total = sum(archive.size for archive in archives.values())
+            candidates = sorted(archives.values(), key=lambda archive: archive.last_used)
+        for archive in candidates:
+            if total <= self.max_bytes:
+                break
+            if archive.pins or self.live_references(archive):
+                continue
+            with self._lock:
+                if archive.pins or archive.references or archives.get(archive.digest) is not archive:
+                    # Checked out or evicted by another thread meanwhile.
+                    continue
+                del archives[archive.digest]
+                urls = [url for url, cached in self._urls.items() if cached[1] == archive.digest]
+            try:
+                self.storage.delete(archive.name)
+            except OSError as err:
+                log.warning(f"Could not evict cached archive {archive.name}: {err}")
+                with self._lock:
+                    archives.setdefault(archive.digest, archive)
+                continue
+            for url in urls:
+                # Records of URLs only other processes know are dropped on their next checkout.
+                self._forget(url, None)
+            total -= archive.size
+
+    def clear(self):
+        with self._lock:
+            self._archives = None
+            self._urls.clear()
+
+
+archive_cache = ArchiveCache()
@@ -0,0 +1,175 @@
+"""
+In-process cache for template catalogs fetched by the templates pipeline.
+
+Entries keep the parsed, filtered catalog together with the validators
+(ETag / Last-Modified) returned by the upstream server so that an expired
+entry can be revalidated with a conditional GET instead of being downloaded
+and parsed again.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+DEFAULT_CATALOG_CACHE_TTL = 300  # seconds
+DEFAULT_CATALOG_CACHE_MAX_ENTRIES = 64
+DEFAULT_CATALOG_MAX_STALE = 24 * 60 * 60  # seconds
+DEFAULT_ASSEMBLED_CATALOG_MAX_ENTRIES = 16
+
+
+def get_catalog_cache_ttl():
+    """
+    Return the number of seconds a cached catalog is served without revalidation.
+    """
+    return getattr(settings, 'COURSE_IMPORT_CATALOG_CACHE_TTL', DEFAULT_CATALOG_CACHE_TTL)
+
+
+def get_catalog_max_stale():
+    """
+    Return how many seconds past expiry a cached catalog may still be served.
+    """
+    return getattr(settings, 'COURSE_IMPORT_CATALOG_MAX_STALE', DEFAULT_CATALOG_MAX_STALE)
+
+
+def catalog_cache_key(source_config, headers=None, variant=None):
+    """
+    Build a hashable cache key from a source URL and the request headers.
+
+    Headers are part of the key because different credentials may see
+    different catalogs for the same URL. ``variant`` distinguishes differently
+    filtered views of the same source.
+    """
+    return source_config, tuple(sorted((headers or {}).items())), variant
+
+
+class CatalogCacheEntry:
+    """
+    A cached catalog along with the validators needed to revalidate it.
+    """
+    __slots__ = ('value', 'etag', 'last_modified', 'expires_at')
+
+    def __init__(self, value, etag=None, last_modified=None, expires_at=0.0):
+        self.value = value
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires_at = expires_at
+
+    def is_fresh(self, now=None):
+        """
+        Return True if the entry can be served without contacting upstream.
+        """
+        return (now or time.monotonic()) < self.expires_at
+
+    def is_servable_stale(self, max_stale=None, now=None):
+        """
+        Return True if the entry is recent enough to be served while it is revalidated.
+        """
+        max_stale = get_catalog_max_stale() if max_stale is None else max_stale
+        return (now or time.monotonic()) < self.expires_at + max_stale
+
+    def conditional_headers(self):
+        """
+        Return the request headers used to revalidate this entry.
+        """
+        headers = {}
+        if isinstance(self.etag, str):
+            headers['If-None-Match'] = self.etag
+        if isinstance(self.last_modified, str):
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class CatalogCache:
+    """
+    A thread-safe, size-bounded LRU cache of catalog entries.
+
+    Arguments:
+        max_entries (int): Maximum number of entries to keep. When omitted the
+            ``COURSE_IMPORT_CATALOG_CACHE_MAX_ENTRIES`` setting is used.
+    """
+
+    def __init__(self, max_entries=None):
+        self._max_entries = max_entries
+        self._entries = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    @property
+    def max_entries(self):
+        if self._max_entries is not None:
+            return self._max_entries
+        return getattr(settings, 'COURSE_IMPORT_CATALOG_CACHE_MAX_ENTRIES', DEFAULT_CATALOG_CACHE_MAX_ENTRIES)
+
+    def get(self, key):
+        """
+        Return the entry stored under ``key`` (fresh or not), or None.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, value, etag=None, last_modified=None, ttl=None):
+        """
+        Store ``value`` under ``key`` and evict the least recently used entries if needed.
+        """
+        ttl = get_catalog_cache_ttl() if ttl is None else ttl
+        entry = CatalogCacheEntry(value, etag, last_modified, time.monotonic() + ttl)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > max(self.max_entries, 0):
+                self._entries.popitem(last=False)
+        return entry
+
+    def touch(self, key, ttl=None):
+        """
+        Extend the lifetime of an entry after a successful revalidation.
+        """
+        ttl = get_catalog_cache_ttl() if ttl is None else ttl
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.expires_at = time.monotonic() + ttl
+            return entry
+
+    def start_refresh(self, key):
+        """
+        Claim the background refresh of ``key``.
+
+        Returns:
+            bool: False if a refresh of ``key`` is already in flight.
+        """
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            return True
+
+    def values(self):
+        """
+        Return the cached values, fresh or not, most recently used last.
+        """
+        with self._lock:
+            return [entry.value for entry in self._entries.values()]
+
+    def finish_refresh(self, key):
+        with self._lock:
+            self._refreshing.discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._refreshing.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+catalog_cache = CatalogCache()
+
+# Catalogs assembled per call (merged GitHub sources, S3 listings), kept so that the
+# same content reuses one TemplateCatalog and builds its search indexes only once.
+assembled_catalogs = CatalogCache(max_entries=DEFAULT_ASSEMBLED_CATALOG_MAX_ENTRIES)
@@ -0,0 +1,202 @@
+"""
+An indexed, queryable view over a list of catalog entries.
+
+``TemplateCatalog`` is what the templates pipeline caches. Indexes are built
+lazily on the first search, so listing-only callers never pay for them, and a
+search then only touches the postings of the requested values and tokens.
+"""
+import hashlib
+import re
+import threading
+
+from course_import.codec import dumps
+
+# Metadata fields that are free text or URLs and are not worth an equality index.
+UNINDEXED_METADATA_FIELDS = frozenset({'description', 'thumbnail'})
+TEXT_FIELDS = ('title', 'description')
+
+_TOKEN_RE = re.compile(r'\w+')
+
+
+def entry_fingerprint(entry):
+    """
+    Return a content hash of one catalog entry, independent of key order.
+    """
+    return hashlib.sha256(dumps(entry, sort_keys=True)).hexdigest()
+
+
+def index_key(value):
+    """
+    Return the posting key of a field value; booleans are kept apart from the numbers equal to them.
+    """
+    return isinstance(value, bool), value
+
+
+def tokenize(text):
+    """
+    Split ``text`` into lower-cased word tokens.
+    """
+    return _TOKEN_RE.findall(text.lower()) if isinstance(text, str) else []
+
+
+class TemplateRecord:
+    """
+    A catalog entry with its most used fields lifted out for indexing.
+    """
+    __slots__ = ('position', 'courses_name', 'zip_url', 'metadata', 'entry')
+
+    def __init__(self, position, entry):
+        self.position = position
+        self.courses_name = entry.get('courses_name')
+        self.zip_url = entry.get('zip_url')
+        self.metadata = entry.get('metadata') or {}
+        self.entry = entry
+
+    def to_dict(self):
+        return self.entry
+
+    def index_values(self):
+        """
+        Yield ``(field, value)`` pairs to index for equality lookups.
+        """
+        if self.courses_name is not None:
+            yield 'courses_name', self.courses_name
+        for field, value in self.metadata.items():
+            if field in UNINDEXED_METADATA_FIELDS:
+                continue
+            values = value if isinstance(value, (list, tuple)) else (value,)
+            for item in values:
+                if isinstance(item, (str, int, float, bool)):
+                    yield field, item
+
+
+class TemplateCatalog:
+    """
+    A list of catalog entries with field and full-text indexes.
+
+    Arguments:
+        entries (list): Catalog entries as returned by the templates pipeline.
+        invalid (list): Diagnostics of the source entries left out because they failed
+            validation, see ``course_import.validation``.
+    """
+
+    def __init__(self, entries, invalid=None):
+        self.entries = entries
+        self.invalid = invalid or []
+        self._version = None
+        self._fingerprints = None
+        self._thumbnails = None
+        self._records = None
+        self._field_index = None
+        self._token_index = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    @property
+    def version(self):
+        """
+        A content hash of the entries, computed once per catalog.
+        """
+        if self._version is None:
+            self._version = hashlib.sha256(dumps(self.entries, sort_keys=True)).hexdigest()
+        return self._version
+
+    @property
+    def fingerprints(self):
+        """
+        Map each entry's identity to ``(fingerprint, entry)``, computed once per catalog.
+
+        An entry is identified by its ``zip_url`` (else ``courses_name``, else its content),
+        plus an occurrence number so repeated identities stay distinct.
+        """
+        if self._fingerprints is None:
+            fingerprints = {}
+            for entry in self.entries:
+                fingerprint = entry_fingerprint(entry)
+                name = entry.get('zip_url') or entry.get('courses_name') or fingerprint
+                occurrence = 0
+                while (name, occurrence) in fingerprints:
+                    occurrence += 1
+                fingerprints[(name, occurrence)] = (fingerprint, entry)
+            self._fingerprints = fingerprints
+        return self._fingerprints
+
+    @property
+    def thumbnails(self):
+        """
+        The set of ``metadata.thumbnail`` URLs of the entries, computed once per catalog.
+        """
+        if self._thumbnails is None:
+            self._thumbnails = frozenset(
+                (entry.get('metadata') or {}).get('thumbnail') for entry in self.entries
+            ) - {None}
+        return self._thumbnails
+
+    def _build_indexes(self):
+        """
+        Build the records and the field/token indexes on first use.
+        """
+        with self._lock:
+            if self._records is not None:
+                return
+            records = [TemplateRecord(position, entry) for position, entry in enumerate(self.entries)]
+            field_index, token_index = {}, {}
+            for record in records:
+                for field, value in record.index_values():
+                    field_index.setdefault(field, {}).setdefault(index_key(value), set()).add(record.position)
+                for field in TEXT_FIELDS:
+                    for token in tokenize(record.metadata.get(field)):
+                        token_index.setdefault(token, set()).add(record.position)
+            self._field_index = field_index
+            self._token_index = token_index
+            self._records = records
+
+    def _postings(self, q, filters):
+        """
+        Return the sets of positions that a match must belong to.
+        """
+        postings = []
+        for field, value in (filters or {}).items():
+            field = field[len('metadata.'):] if field.startswith('metadata.') else field
+            index = self._field_index.get(field, {})
+            values = value if isinstance(value, (list, tuple, set)) else (value,)
+            postings.append(set().union(*(index.get(index_key(item), ()) for item in values)))
+        for token in tokenize(q):
+            postings.append(self._token_index.get(token, set()))
+        return postings
+
+    def search(self, q=None, filters=None, offset=0, limit=None):
+        """
+        Return a page of entries matching a text query and field filters.
+
+        Arguments:
+            q (str): Words that must all appear in the entry's title or description.
+            filters (dict): Field name (``courses_name`` or a metadata field such as
+                ``tags``) mapped to a value, or a list of accepted values.
+            offset (int): Number of matches to skip.
+            limit (int): Maximum number of matches to return; all when None.
+
+        Returns:
+            dict: ``count`` of all matches and the ``results`` page, in catalog order.
+        """
+        self._build_indexes()
+        postings = self._postings(q, filters)
+        if postings:
+            postings.sort(key=len)
+            matches = set(postings[0])
+            for posting in postings[1:]:
+                if not matches:
+                    break
+                matches &= posting
+            positions = sorted(matches)
+        else:
+            positions = range(len(self._records))
+
+        offset = max(int(offset or 0), 0)
+        end = None if limit is None else offset + max(int(limit), 0)
+        return {
+            'count': len(positions),
+            'results': [self._records[position].to_dict() for position in positions[offset:end]],
+        }
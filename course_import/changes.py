@@ -0,0 +1,81 @@
+"""
+Change detection between versions of a template catalog.
+
+Every catalog handed out by the templates pipeline is remembered by its
+``version`` for a while, so a consumer that knows the version it last saw can
+ask for only the entries that were added, removed or modified since then.
+"""
+from django.conf import settings
+
+from course_import.cache import CatalogCache
+
+DEFAULT_CATALOG_HISTORY_MAX_ENTRIES = 32
+DEFAULT_CATALOG_HISTORY_TTL = 24 * 60 * 60  # seconds
+
+catalog_history = CatalogCache(max_entries=DEFAULT_CATALOG_HISTORY_MAX_ENTRIES)
+
+
+def get_history_ttl():
+    """
+    Return how long (in seconds) a catalog version stays available as a change feed base.
+    """
+    return getattr(settings, 'COURSE_IMPORT_CATALOG_HISTORY_TTL', DEFAULT_CATALOG_HISTORY_TTL)
+
+
+def diff_catalogs(old, new):
+    """
+    Compare two ``TemplateCatalog`` objects entry by entry.
+
+    Returns:
+        dict: ``added`` and ``modified`` entries of ``new`` and ``removed`` entries of ``old``,
+        each in catalog order.
+    """
+    old_fingerprints, new_fingerprints = old.fingerprints, new.fingerprints
+    added, modified = [], []
+    for identity, (fingerprint, entry) in new_fingerprints.items():
+        previous = old_fingerprints.get(identity)
+        if previous is None:
+            added.append(entry)
+        elif previous[0] != fingerprint:
+            modified.append(entry)
+    removed = [entry for identity, (_, entry) in old_fingerprints.items() if identity not in new_fingerprints]
+    return {'added': added, 'modified': modified, 'removed': removed}
+
+
+def record_catalog(catalog, version=None):
+    """
+    Remember ``catalog`` under its version so later change feeds can be computed from it.
+    """
+    version = version or catalog.version
+    entry = catalog_history.get(version)
+    if entry is None:
+        catalog_history.set(version, catalog, ttl=get_history_ttl())
+    elif not entry.is_fresh():
+        # Still being served, so it must stay available as a base for change feeds.
+        catalog_history.touch(version, ttl=get_history_ttl())
+    return version
+
+
+def catalog_changes(since, catalog, version=None):
+    """
+    Return the change feed from version ``since`` to ``catalog``.
+
+    A consumer already at the current version gets an empty feed. When ``since``
+    is unknown (never served, or expired from the history) the feed is a
+    ``reset``: every current entry is reported as added and the consumer should
+    rebuild its state from it.
+
+    Returns:
+        dict: ``since``, ``version``, ``reset`` and the ``added``/``modified``/``removed`` entries.
+    """
+    version = version or catalog.version
+    if since == version:
+        return {'since': since, 'version': version, 'reset': False, 'added': [], 'modified': [], 'removed': []}
+    previous = catalog_history.get(since) if since else None
+    if previous is not None and previous.is_fresh():
+        changes = diff_catalogs(previous.value, catalog)
+        reset = False
+    else:
+        changes = {'added': list(catalog.entries), 'modified': [], 'removed': []}
+        reset = True
+    return {'since': since, 'version': version, 'reset': reset, **changes}
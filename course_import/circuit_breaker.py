@@ -0,0 +1,138 @@
+"""
+Per-host circuit breakers for outbound requests.
+
+Every request sent through ``session_manager`` goes through the breaker of its
+upstream host. After ``COURSE_IMPORT_CIRCUIT_FAILURE_THRESHOLD`` consecutive
+failures (connection errors, timeouts or 429/5xx responses) the circuit opens
+and requests to that host fail immediately with ``CircuitOpenError`` instead of
+tying up a worker. After ``COURSE_IMPORT_CIRCUIT_RESET_TIMEOUT`` seconds a single
+trial request is let through (half-open): its success closes the circuit, its
+failure opens it again.
+"""
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from django.conf import settings
+
+from course_import.metrics import incr
+
+DEFAULT_CIRCUIT_FAILURE_THRESHOLD = 5
+DEFAULT_CIRCUIT_RESET_TIMEOUT = 30  # seconds
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """
+    Raised instead of sending a request to a host whose circuit is open.
+
+    It is a ``requests.ConnectionError``, so callers already handling unreachable
+    hosts handle an open circuit the same way.
+    """
+
+    def __init__(self, host, retry_after):
+        super().__init__(f"Circuit open for {host}; retry in {retry_after:.0f}s")
+        self.host = host
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    The closed / open / half-open state machine of one upstream host.
+    """
+
+    def __init__(self, host):
+        self.host = host
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+        self.times_opened = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def before_request(self):
+        """
+        Let a request through, or raise ``CircuitOpenError``.
+        """
+        reset_timeout = getattr(settings, 'COURSE_IMPORT_CIRCUIT_RESET_TIMEOUT', DEFAULT_CIRCUIT_RESET_TIMEOUT)
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            retry_after = self.opened_at + reset_timeout - time.monotonic()
+            if self.state == OPEN and retry_after <= 0:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self.trial_in_flight:
+                self.trial_in_flight = True
+                return
+            self.rejected += 1
+        incr('circuit.rejected', host=self.host)
+        raise CircuitOpenError(self.host, max(retry_after, 0))
+
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        threshold = getattr(settings, 'COURSE_IMPORT_CIRCUIT_FAILURE_THRESHOLD', DEFAULT_CIRCUIT_FAILURE_THRESHOLD)
+        opened = False
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= threshold:
+                opened = self.state != OPEN
+                if opened:
+                    self.times_opened += 1
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+            self.trial_in_flight = False
+        if opened:
+            incr('circuit.opened', host=self.host)
+
+    def stats(self):
+        return {
+            'host': self.host,
+            'state': self.state,
+            'consecutive_failures': self.failures,
+            'times_opened': self.times_opened,
+            'rejected': self.rejected,
+        }
+
+
+class CircuitBreakerRegistry:
+    """
+    Circuit breakers keyed by upstream host, created on first use.
+    """
+
+    def __init__(self):
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def for_url(self, url):
+        """
+        Return the breaker of the host (and port) ``url`` points at.
+        """
+        host = urlparse(url).netloc.lower()
+        breaker = self._breakers.get(host)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.setdefault(host, CircuitBreaker(host))
+        return breaker
+
+    def stats(self):
+        """
+        Return the state and counters of every breaker, for metrics export.
+        """
+        return [breaker.stats() for breaker in list(self._breakers.values())]
+
+    def clear(self):
+        with self._lock:
+            self._breakers.clear()
+
+
+circuit_breakers = CircuitBreakerRegistry()
@@ -0,0 +1,122 @@
+"""
+Pluggable JSON encoding and decoding.
+
+Catalogs, manifests, snapshots and API responses are all decoded from and
+encoded to ``bytes`` through this module. It uses orjson or msgspec when one of
+them is installed and the standard library otherwise; set
+``COURSE_IMPORT_JSON_BACKEND`` to ``'orjson'``, ``'msgspec'`` or ``'json'`` to pin
+a backend. Every backend produces compact JSON and accepts bytes, so no
+intermediate ``str`` copy of a document is made by the fast backends.
+"""
+import json
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover
+    msgspec = None
+
+# Preferred first.
+JSON_BACKEND_PREFERENCE = ('orjson', 'msgspec', 'json')
+
+
+class StdlibJSONCodec:
+    """
+    JSON codec backed by the ``json`` module.
+    """
+    name = 'json'
+
+    def loads(self, data):
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        return json.loads(data)
+
+    def dumps(self, obj, sort_keys=False):
+        return json.dumps(obj, sort_keys=sort_keys, separators=(',', ':'), default=str).encode('utf-8')
+
+
+class OrjsonCodec(StdlibJSONCodec):
+    """
+    JSON codec backed by orjson.
+
+    Documents orjson cannot encode (such as integers wider than 64 bits) are
+    encoded by the standard library instead.
+    """
+    name = 'orjson'
+
+    def loads(self, data):
+        return orjson.loads(data)
+
+    def dumps(self, obj, sort_keys=False):
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        try:
+            return orjson.dumps(obj, default=str, option=option)
+        except orjson.JSONEncodeError:
+            return super().dumps(obj, sort_keys=sort_keys)
+
+
+class MsgspecCodec(StdlibJSONCodec):
+    """
+    JSON codec backed by msgspec.
+    """
+    name = 'msgspec'
+
+    def loads(self, data):
+        try:
+            return msgspec.json.decode(data)
+        except msgspec.DecodeError as err:
+            raise ValueError(str(err)) from err
+
+    def dumps(self, obj, sort_keys=False):
+        try:
+            return msgspec.json.encode(obj, enc_hook=str, order='sorted' if sort_keys else None)
+        except (msgspec.EncodeError, TypeError, OverflowError):
+            return super().dumps(obj, sort_keys=sort_keys)
+
+
+CODECS = {'json': StdlibJSONCodec()}
+if orjson is not None:
+    CODECS['orjson'] = OrjsonCodec()
+if msgspec is not None:
+    CODECS['msgspec'] = MsgspecCodec()
+
+
+def get_codec(name=None):
+    """
+    Return the codec named ``name``, else the ``COURSE_IMPORT_JSON_BACKEND`` one,
+    else the fastest installed backend.
+
+    Raises:
+        ImproperlyConfigured: If the requested backend is unknown or not installed.
+    """
+    name = name or getattr(settings, 'COURSE_IMPORT_JSON_BACKEND', None)
+    if name is None:
+        return next(CODECS[backend] for backend in JSON_BACKEND_PREFERENCE if backend in CODECS)
+    try:
+        return CODECS[name]
+    except KeyError as err:
+        raise ImproperlyConfigured(f"JSON backend {name!r} is not installed.") from err
+
+
+def loads(data):
+    """
+    Decode a JSON document from ``bytes`` (or ``str``).
+
+    Raises:
+        ValueError: If ``data`` is not valid JSON.
+    """
+    return get_codec().loads(data)
+
+
+def dumps(obj, sort_keys=False):
+    """
+    Encode ``obj`` as compact JSON ``bytes``. Values JSON has no type for are encoded with ``str``.
+    """
+    return get_codec().dumps(obj, sort_keys=sort_keys)
@@ -0,0 +1,393 @@
+"""
+Buffering of downloaded course archives on their way into import storage.
+
+An archive is written once into a ``SpooledArchive``: small archives stay in
+memory, larger ones spill to a temporary file in the course directory. The
+storage backend then reads the buffer directly. A ``FileSystemStorage`` moves
+the spilled file into place instead of copying it, so the bytes cross the disk
+only once.
+
+``write_response`` copies a streamed response body into such a buffer with large
+``readinto`` calls on one reused buffer rather than many small chunk objects.
+
+When a transfer breaks off, ``PartialDownload`` keeps the bytes received so far
+next to the upstream validator (strong ETag or Last-Modified), and the next
+attempt asks for the rest only with ``Range`` and ``If-Range``.
+
+With ``COURSE_IMPORT_DOWNLOAD_SEGMENTS`` above 1, ``download_segments`` fetches
+large archives from servers accepting ranges over several connections at once,
+writing each byte range at its offset in a preallocated file.
+"""
+import base64
+import hashlib
+import io
+import logging
+import os
+import re
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.conf import settings
+from django.core.files import File
+from urllib3.exceptions import ProtocolError, ReadTimeoutError
+
+log = logging.getLogger(__name__)
+
+DEFAULT_DOWNLOAD_MAX_MEMORY_SIZE = 16 * 1024 * 1024  # bytes
+DEFAULT_DOWNLOAD_BUFFER_SIZE = 1024 * 1024  # bytes
+DEFAULT_DOWNLOAD_ATTEMPTS = 3
+DEFAULT_DOWNLOAD_SEGMENTS = 1
+DEFAULT_DOWNLOAD_SEGMENT_MIN_SIZE = 64 * 1024 * 1024  # bytes
+META_SUFFIX = '.meta'
+CONTENT_RANGE_START = re.compile(r'bytes (\d+)-\d+/(?:\d+|\*)$')
+
+
+class TemporaryArchiveFile(File):
+    """
+    A spilled archive; ``temporary_file_path`` lets file system storages move it instead of copying it.
+    """
+
+    def __init__(self, file, name, path):
+        super().__init__(file, name=name)
+        self.path = path
+
+    def temporary_file_path(self):
+        return self.path
+
+
+class SpooledArchive:
+    """
+    Hold an archive in memory up to ``COURSE_IMPORT_DOWNLOAD_MAX_MEMORY_SIZE`` bytes, then in a temporary file.
+
+    Arguments:
+        name (str): The archive file name, passed on to the storage backend.
+        directory (str): Where a spilled archive is written.
+        max_memory_size (int): Overrides ``COURSE_IMPORT_DOWNLOAD_MAX_MEMORY_SIZE``.
+        resume_from (str): A partial download to append to instead of starting empty.
+    """
+
+    def __init__(self, name, directory, max_memory_size=None, resume_from=None):
+        self.name = name
+        self.directory = directory
+        self.max_memory_size = max_memory_size if max_memory_size is not None else getattr(
+            settings, 'COURSE_IMPORT_DOWNLOAD_MAX_MEMORY_SIZE', DEFAULT_DOWNLOAD_MAX_MEMORY_SIZE
+        )
+        if resume_from is None:
+            self.file = io.BytesIO()
+        else:
+            self.file = open(resume_from, 'r+b')  # pylint: disable=consider-using-with
+            self.file.seek(0, os.SEEK_END)
+        self.size = self.file.tell()
+        self.path = resume_from
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, data):
+        if self.path is None and self.size + len(data) > self.max_memory_size:
+            self._spill()
+        self.file.write(data)
+        self.size += len(data)
+
+    def _spill(self):
+        fd, self.path = tempfile.mkstemp(prefix='.download-', suffix='-' + self.name, dir=self.directory)
+        spilled = os.fdopen(fd, 'w+b')
+        spilled.write(self.file.getbuffer())
+        self.file = spilled
+
+    def as_file(self):
+        """
+        Return the archive as a Django ``File`` positioned at its start, ready for ``Storage.save``.
+        """
+        self.file.flush()
+        self.file.seek(0)
+        if self.path is None:
+            return File(self.file, name=self.name)
+        return TemporaryArchiveFile(self.file, self.name, self.path)
+
+    def preallocate(self, size):
+        """
+        Spill to disk, reserve ``size`` bytes and return the file descriptor for positional writes.
+        """
+        if self.path is None:
+            self._spill()
+        self.file.flush()
+        fd = self.file.fileno()
+        try:
+            os.posix_fallocate(fd, 0, size)
+        except (AttributeError, OSError):
+            os.ftruncate(fd, size)
+        self.size = size
+        return fd
+
+    def persist(self, path):
+        """
+        Move the bytes received so far to ``path``, where ``close`` leaves them.
+        """
+        if self.path is None:
+            with open(path, 'wb') as partial:
+                partial.write(self.file.getbuffer())
+        else:
+            self.file.flush()
+            if self.path != path:
+                os.replace(self.path, path)
+            self.path = None
+
+    def close(self):
+        """
+        Release the buffer and remove the spilled file, unless storage already moved it away.
+        """
+        self.file.close()
+        if self.path is not None:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+            except OSError as err:
+                log.warning("Could not remove downloaded archive %s: %s", self.path, err)
+
+
+def write_response(response, destination, buffer_size=None):
+    """
+    Copy the body of a ``stream=True`` response into ``destination`` and return its length.
+
+    The raw stream is read with ``readinto`` into one reused buffer of
+    ``COURSE_IMPORT_DOWNLOAD_BUFFER_SIZE`` bytes, and views of it are written out, so a
+    large archive costs a few hundred Python-level iterations instead of one per KiB.
+    Content-encoded bodies, which must be decoded, are read with ``iter_content`` instead.
+    """
+    buffer_size = buffer_size or getattr(settings, 'COURSE_IMPORT_DOWNLOAD_BUFFER_SIZE', DEFAULT_DOWNLOAD_BUFFER_SIZE)
+    total = 0
+    if response.headers.get('Content-Encoding', 'identity') != 'identity':
+        for chunk in response.iter_content(chunk_size=buffer_size):
+            destination.write(chunk)
+            total += len(chunk)
+        return total
+
+    raw = response.raw
+    view = memoryview(bytearray(buffer_size))
+    while True:
+        count = _readinto(raw, view)
+        if not count:
+            return total
+        destination.write(view[:count])
+        total += count
+
+
+def _readinto(raw, view):
+    """
+    Read from a urllib3 response into ``view``, raising errors as ``iter_content`` does.
+
+    Callers can then handle a broken transfer as any other ``requests`` error.
+    """
+    try:
+        return raw.readinto(view)
+    except ProtocolError as err:
+        raise requests.exceptions.ChunkedEncodingError(err) from err
+    except ReadTimeoutError as err:
+        raise requests.exceptions.ConnectionError(err) from err
+
+
+def resume_validator(response):
+    """
+    Return the validator to resume the body of ``response`` with, or None if upstream cannot resume it.
+
+    ``If-Range`` only accepts a strong ETag or a Last-Modified date.
+    """
+    if response.status_code != 206 and response.headers.get('Accept-Ranges', '').lower() != 'bytes':
+        return None
+    etag = response.headers.get('ETag')
+    if etag and not etag.startswith('W/'):
+        return etag
+    return response.headers.get('Last-Modified')
+
+
+def continues_at(response, offset):
+    """
+    Return whether ``response`` is a 206 carrying the bytes from ``offset`` on.
+    """
+    match = CONTENT_RANGE_START.match(response.headers.get('Content-Range', ''))
+    return response.status_code == 206 and match is not None and int(match.group(1)) == offset
+
+
+class PartialDownload:
+    """
+    The bytes of an interrupted download of ``url``, kept in ``directory`` with their validator.
+    """
+
+    def __init__(self, directory, url):
+        self.path = os.path.join(directory, '.partial-' + hashlib.sha256(url.encode('utf-8')).hexdigest())
+        self.meta_path = self.path + META_SUFFIX
+
+    def resume_headers(self):
+        """
+        Return the offset to resume at and the ``Range``/``If-Range`` headers asking for the rest.
+
+        Returns:
+            tuple: ``(0, {})`` when there is nothing to resume.
+        """
+        try:
+            with open(self.meta_path, encoding='utf-8') as meta_file:
+                validator = meta_file.read().strip()
+            offset = os.path.getsize(self.path)
+        except OSError:
+            return 0, {}
+        if not validator or not offset:
+            return 0, {}
+        return offset, {'Range': f'bytes={offset}-', 'If-Range': validator}
+
+    def keep(self, response, archive):
+        """
+        Keep what ``archive`` received of ``response`` for a later resume.
+
+        Returns:
+            bool: False, keeping nothing, if upstream cannot resume the body.
+        """
+        validator = resume_validator(response)
+        if validator is None or not archive.size:
+            return False
+        archive.persist(self.path)
+        with open(self.meta_path, 'w', encoding='utf-8') as meta_file:
+            meta_file.write(validator)
+        return True
+
+    def discard(self):
+        for path in (self.meta_path, self.path):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+class SegmentedDownloadError(Exception):
+    """
+    Raised when a segmented download cannot be completed consistently; download in one stream instead.
+    """
+
+
+def segment_count(response):
+    """
+    Return how many byte ranges to fetch the body of a 200 ``response`` in, 1 to download it in one stream.
+
+    Splitting needs ``COURSE_IMPORT_DOWNLOAD_SEGMENTS`` above 1, a body of at least
+    ``COURSE_IMPORT_DOWNLOAD_SEGMENT_MIN_SIZE`` bytes without content encoding, and a server
+    that accepts ranges and identifies the body with a validator, so every range comes
+    from the same version of it.
+    """
+    segments = getattr(settings, 'COURSE_IMPORT_DOWNLOAD_SEGMENTS', DEFAULT_DOWNLOAD_SEGMENTS)
+    if segments <= 1 or response.status_code != 200 or resume_validator(response) is None:
+        return 1
+    if response.headers.get('Content-Encoding', 'identity') != 'identity':
+        return 1
+    try:
+        size = int(response.headers['Content-Length'])
+    except (KeyError, ValueError):
+        return 1
+    if size < getattr(settings, 'COURSE_IMPORT_DOWNLOAD_SEGMENT_MIN_SIZE', DEFAULT_DOWNLOAD_SEGMENT_MIN_SIZE):
+        return 1
+    return segments
+
+
+def expected_digest(response):
+    """
+    Return ``(hashlib name, digest bytes)`` announced by ``Repr-Digest``, ``Digest`` or ``Content-MD5``, else None.
+    """
+    for header in ('Repr-Digest', 'Digest'):
+        for value in response.headers.get(header, '').split(','):
+            algorithm, _, encoded = value.strip().partition('=')
+            if algorithm.lower() in ('sha-256', 'sha-512', 'md5') and encoded:
+                try:
+                    return algorithm.lower().replace('-', ''), base64.b64decode(encoded.strip(':'))
+                except ValueError:
+                    continue
+    if response.headers.get('Content-MD5'):
+        try:
+            return 'md5', base64.b64decode(response.headers['Content-MD5'])
+        except ValueError:
+            pass
+    return None
+
+
+def download_segments(url, response, archive, segments, get, buffer_size=None):
+    """
+    Fetch the body of a 200 ``response`` into ``archive`` as ``segments`` concurrent byte ranges.
+
+    The first range is read from ``response`` itself; the others are requested with
+    ``get(url, stream=True, headers=...)`` and ``If-Range``, and each is written with
+    ``os.pwrite`` at its offset in a file preallocated to the full size. A range that
+    breaks off is requested again from where it stopped, up to ``COURSE_IMPORT_DOWNLOAD_ATTEMPTS``
+    times. The assembled length, and the checksum when the server announces one, are
+    verified at the end.
+
+    Returns:
+        int: The length of the body.
+
+    Raises:
+        SegmentedDownloadError: If the server answered a range inconsistently or the
+            checksum does not match.
+    """
+    buffer_size = buffer_size or getattr(settings, 'COURSE_IMPORT_DOWNLOAD_BUFFER_SIZE', DEFAULT_DOWNLOAD_BUFFER_SIZE)
+    attempts = getattr(settings, 'COURSE_IMPORT_DOWNLOAD_ATTEMPTS', DEFAULT_DOWNLOAD_ATTEMPTS)
+    size = int(response.headers['Content-Length'])
+    validator = resume_validator(response)
+    fd = archive.preallocate(size)
+    step = -(-size // segments)
+    ranges = [(start, min(start + step, size) - 1) for start in range(0, size, step)]
+    failed = threading.Event()
+
+    def fetch(start, end, first_response=None):
+        position = start
+        current = first_response
+        view = memoryview(bytearray(min(buffer_size, end - start + 1)))
+        for attempt in range(1, attempts + 1):
+            try:
+                if current is None:
+                    current = get(url, stream=True, headers={'Range': f'bytes={position}-{end}', 'If-Range': validator})
+                    if not continues_at(current, position):
+                        raise SegmentedDownloadError(
+                            f"Range {position}-{end} answered with status {current.status_code}"
+                        )
+                while position <= end:
+                    if failed.is_set():
+                        break
+                    count = _readinto(current.raw, view[:end - position + 1])
+                    if not count:
+                        raise requests.exceptions.ChunkedEncodingError(f"Range {start}-{end} ended at {position}")
+                    os.pwrite(fd, view[:count], position)
+                    position += count
+                return position - start
+            except SegmentedDownloadError:
+                failed.set()
+                raise
+            except requests.RequestException as err:
+                if attempt == attempts:
+                    failed.set()
+                    raise
+                log.warning(f"Segment {start}-{end} of {url} broke off at byte {position}, retrying: {err}")
+            finally:
+                if current is not None:
+                    current.close()
+                current = None
+
+    with ThreadPoolExecutor(max_workers=len(ranges)) as executor:
+        futures = [executor.submit(fetch, *ranges[0], response)]
+        futures += [executor.submit(fetch, start, end) for start, end in ranges[1:]]
+        received = sum(future.result() for future in futures)
+
+    if received != size or os.fstat(fd).st_size != size:
+        raise SegmentedDownloadError(f"Assembled {received} bytes instead of {size}")
+    announced = expected_digest(response)
+    if announced is not None:
+        algorithm, digest = announced
+        checksum = hashlib.new(algorithm)
+        content = archive.as_file()
+        for chunk in content.chunks(buffer_size):
+            checksum.update(chunk)
+        if checksum.digest() != digest:
+            raise SegmentedDownloadError(f"{algorithm} checksum mismatch for {url}")
+    return size
@@ -0,0 +1,156 @@
+"""
+A shared, pooled HTTP session used for every outbound request made by course_import.
+
+The session is created lazily once per process (and re-created after a fork) so
+template listings and archive downloads reuse keep-alive connections instead of
+paying a TCP+TLS handshake on every call. Requests to a host that keeps failing
+are short-circuited by its breaker, see ``course_import.circuit_breaker``.
+"""
+import os
+import threading
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from course_import.circuit_breaker import circuit_breakers
+
+DEFAULT_HTTP_POOL_CONNECTIONS = 10  # number of per-host pools kept alive
+DEFAULT_HTTP_POOL_MAXSIZE = 10  # connections kept alive per host
+DEFAULT_HTTP_CONNECT_TIMEOUT = 3.05  # seconds
+DEFAULT_HTTP_READ_TIMEOUT = 30  # seconds
+DEFAULT_HTTP_MAX_RETRIES = 3
+DEFAULT_HTTP_BACKOFF_FACTOR = 0.5
+DEFAULT_HTTP_BACKOFF_MAX = 10  # seconds
+
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS'})
+
+
+def get_timeout():
+    """
+    Return the ``(connect, read)`` timeout tuple applied to outbound requests.
+    """
+    return (
+        getattr(settings, 'COURSE_IMPORT_HTTP_CONNECT_TIMEOUT', DEFAULT_HTTP_CONNECT_TIMEOUT),
+        getattr(settings, 'COURSE_IMPORT_HTTP_READ_TIMEOUT', DEFAULT_HTTP_READ_TIMEOUT),
+    )
+
+
+class SessionManager:
+    """
+    Owns the per-process ``requests.Session`` and its connection pools.
+
+    Retries only apply to idempotent methods and back off exponentially,
+    bounded by ``COURSE_IMPORT_HTTP_BACKOFF_MAX``.
+    """
+
+    def __init__(self):
+        self._session = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        """
+        Return the session for the current process, building it on first use.
+        """
+        if self._session is None or self._pid != os.getpid():
+            with self._lock:
+                if self._session is None or self._pid != os.getpid():
+                    self._session = self._build_session()
+                    self._pid = os.getpid()
+        return self._session
+
+    def _build_session(self):
+        """
+        Create a session with bounded connection pools and retry policy.
+        """
+        retry = Retry(
+            total=getattr(settings, 'COURSE_IMPORT_HTTP_MAX_RETRIES', DEFAULT_HTTP_MAX_RETRIES),
+            backoff_factor=getattr(settings, 'COURSE_IMPORT_HTTP_BACKOFF_FACTOR', DEFAULT_HTTP_BACKOFF_FACTOR),
+            backoff_max=getattr(settings, 'COURSE_IMPORT_HTTP_BACKOFF_MAX', DEFAULT_HTTP_BACKOFF_MAX),
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=IDEMPOTENT_METHODS,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=getattr(settings, 'COURSE_IMPORT_HTTP_POOL_CONNECTIONS', DEFAULT_HTTP_POOL_CONNECTIONS),
+            pool_maxsize=getattr(settings, 'COURSE_IMPORT_HTTP_POOL_MAXSIZE', DEFAULT_HTTP_POOL_MAXSIZE),
+            max_retries=retry,
+        )
+        session = requests.Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def get(self, url, **kwargs):
+        """
+        Send a GET request through the shared session.
+
+        Accepts the same keyword arguments as ``requests.get``; a ``(connect, read)``
+        timeout is applied unless one is given explicitly.
+
+        Raises:
+            CircuitOpenError: If the circuit of the URL's host is open.
+        """
+        kwargs.setdefault('timeout', get_timeout())
+        breaker = circuit_breakers.for_url(url)
+        breaker.before_request()
+        try:
+            response = self.session.get(url, **kwargs)
+        except Exception:
+            breaker.record_failure()
+            raise
+        if response.status_code in RETRY_STATUS_CODES:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        return response
+
+    def stats(self):
+        """
+        Return connection pool statistics for every host contacted by this process.
+
+        Returns:
+            list: One dict per host pool with the number of connections opened,
+            requests sent and connection slots currently available.
+        """
+        if self._session is None or self._pid != os.getpid():
+            return []
+
+        stats = []
+        seen = set()
+        for adapter in self._session.adapters.values():
+            if id(adapter) in seen:
+                continue
+            seen.add(id(adapter))
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                stats.append({
+                    'scheme': pool.scheme,
+                    'host': pool.host,
+                    'port': pool.port,
+                    'num_connections': pool.num_connections,
+                    'num_requests': pool.num_requests,
+                    'available': pool.pool.qsize() if pool.pool is not None else 0,
+                    'maxsize': pool.pool.maxsize if pool.pool is not None else 0,
+                })
+        return stats
+
+    def close(self):
+        """
+        Close the session and drop all pooled connections.
+        """
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+            self._session = None
+            self._pid = None
+
+
+session_manager = SessionManager()
@@ -0,0 +1,113 @@
+"""
+Incremental parsing of top-level JSON arrays.
+
+Large template catalogs are a single JSON array of entries. Instead of loading
+the whole document before filtering it, ``iter_json_array`` scans the byte
+stream for element boundaries and decodes one element at a time, so peak memory
+is bounded by the largest element plus one network chunk.
+"""
+import json
+import re
+
+# Bytes that can change the nesting/string state of the scanner. Multi-byte UTF-8
+# sequences never contain ASCII bytes, so scanning raw bytes is safe.
+_STRUCTURAL = re.compile(rb'[\[\]{}",]')
+_STRING_SPECIAL = re.compile(rb'["\\]')
+
+_OPEN = frozenset(b'[{')
+_CLOSE = frozenset(b']}')
+_QUOTE = ord('"')
+_COMMA = ord(',')
+_OPEN_BRACKET = ord('[')
+
+
+def iter_json_array(chunks, loads=json.loads):
+    """
+    Yield the decoded elements of a top-level JSON array.
+
+    Arguments:
+        chunks (iterable): Byte chunks of the document, e.g. ``response.iter_content()``.
+        loads (callable): Function used to decode each element from bytes.
+
+    Yields:
+        object: Each element of the array, in document order.
+
+    Raises:
+        ValueError: If the document is not a JSON array or ends prematurely.
+    """
+    buffer = bytearray()
+    pos = 0  # next byte to scan
+    boundary = 0  # start of the current element's text at depth 1
+    start = None  # start of the current container element, if any
+    depth = 0  # 0 = before the array, 1 = inside the top-level array
+    in_string = False
+    finished = False
+
+    for chunk in chunks:
+        if not chunk or finished:
+            continue
+        buffer += chunk
+
+        while pos < len(buffer):
+            if in_string:
+                match = _STRING_SPECIAL.search(buffer, pos)
+                if match is None:
+                    pos = len(buffer)
+                    break
+                if buffer[match.start()] == _QUOTE:
+                    in_string = False
+                    pos = match.end()
+                    continue
+                if match.end() >= len(buffer):  # escape split across chunks
+                    pos = match.start()
+                    break
+                pos = match.end() + 1
+                continue
+
+            match = _STRUCTURAL.search(buffer, pos)
+            if match is None:
+                pos = len(buffer)
+                break
+            char = buffer[match.start()]
+            pos = match.end()
+
+            if depth == 0:
+                if char != _OPEN_BRACKET or buffer[:match.start()].strip():
+                    raise ValueError("Expected a JSON array")
+                depth = 1
+                boundary = pos
+            elif char == _QUOTE:
+                in_string = True
+            elif char in _OPEN:
+                if depth == 1:
+                    start = match.start()
+                depth += 1
+            elif char in _CLOSE:
+                depth -= 1
+                if depth == 1:
+                    yield loads(bytes(buffer[start:pos]))
+                    start = None
+                    boundary = pos
+                elif depth == 0:
+                    scalar = buffer[boundary:match.start()].strip()
+                    if scalar:
+                        yield loads(bytes(scalar))
+                    finished = True
+                    break
+            elif char == _COMMA and depth == 1:
+                scalar = buffer[boundary:match.start()].strip()
+                if scalar:
+                    yield loads(bytes(scalar))
+                boundary = pos
+
+        # Drop everything that has already been decoded.
+        cut = start if start is not None else min(boundary, pos)
+        if cut:
+            del buffer[:cut]
+            pos -= cut
+            boundary -= cut
+            if start is not None:
+                start -= cut
+
+    if not finished:
+        raise ValueError("Incomplete JSON array")
@@ -0,0 +1,199 @@
+"""
+Phase timers and counters for the templates pipeline and the import view.
+
+Measurements go to the sinks listed in ``COURSE_IMPORT_METRICS_SINKS``, e.g.::
+
+    COURSE_IMPORT_METRICS_SINKS = [
+        {'class': 'course_import.metrics.LoggingSink'},
+        {'class': 'course_import.metrics.StatsdSink', 'host': 'localhost', 'port': 8125},
+        {'class': 'course_import.metrics.PrometheusSink'},  # requires prometheus_client
+    ]
+
+A sink is any object with ``timing(name, seconds, tags)`` and ``count(name, value, tags)``
+methods. Without sinks ``timer`` returns a shared no-op context manager and
+``incr`` returns immediately, so instrumented code pays one settings lookup.
+"""
+import logging
+import re
+import socket
+import threading
+import time
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+log = logging.getLogger(__name__)
+
+_NULL_TIMER = nullcontext()
+_sinks = (None, ())
+_sinks_lock = threading.Lock()
+
+
+def get_sinks():
+    """
+    Return the sink instances built from ``COURSE_IMPORT_METRICS_SINKS``, building them once per setting value.
+    """
+    global _sinks  # pylint: disable=global-statement
+    config = getattr(settings, 'COURSE_IMPORT_METRICS_SINKS', None)
+    if not config:
+        return ()
+    cached_config, sinks = _sinks
+    if cached_config is not config:
+        with _sinks_lock:
+            cached_config, sinks = _sinks
+            if cached_config is not config:
+                sinks = tuple(_build_sink(options) for options in config)
+                _sinks = (config, sinks)
+    return sinks
+
+
+def _build_sink(options):
+    options = dict(options)
+    try:
+        sink_class = import_string(options.pop('class'))
+    except (KeyError, ImportError) as err:
+        raise ImproperlyConfigured(f"Invalid COURSE_IMPORT_METRICS_SINKS entry: {err}") from err
+    return sink_class(**options)
+
+
+class _Timer:
+    __slots__ = ('name', 'tags', 'sinks', 'started')
+
+    def __init__(self, name, tags, sinks):
+        self.name = name
+        self.tags = tags
+        self.sinks = sinks
+        self.started = 0.0
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.started
+        for sink in self.sinks:
+            sink.timing(self.name, elapsed, self.tags)
+
+
+def timer(name, **tags):
+    """
+    Return a context manager reporting the time spent in its block as ``name``.
+    """
+    sinks = get_sinks()
+    if not sinks:
+        return _NULL_TIMER
+    return _Timer(name, tags, sinks)
+
+
+def incr(name, value=1, **tags):
+    """
+    Add ``value`` to the counter ``name`` (bytes transferred, records parsed, ...).
+    """
+    for sink in get_sinks():
+        sink.count(name, value, tags)
+
+
+class LoggingSink:
+    """
+    Log every measurement on the ``course_import.metrics`` logger.
+    """
+
+    def __init__(self, level=logging.INFO):
+        self.level = level
+
+    def timing(self, name, seconds, tags):
+        log.log(self.level, "%s took %.2fms %s", name, seconds * 1000, tags)
+
+    def count(self, name, value, tags):
+        log.log(self.level, "%s += %s %s", name, value, tags)
+
+
+class StatsdSink:
+    """
+    Send measurements as statsd packets over UDP, with DogStatsD-style tags.
+    """
+
+    def __init__(self, host='localhost', port=8125, prefix='course_import'):
+        self.address = (host, port)
+        self.prefix = prefix
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def _send(self, name, value, metric_type, tags):
+        packet = f'{self.prefix}.{name}:{value}|{metric_type}'
+        if tags:
+            packet += '|#' + ','.join(f'{key}:{tag}' for key, tag in sorted(tags.items()))
+        try:
+            self.socket.sendto(packet.encode('utf-8'), self.address)
+        except OSError as err:
+            log.debug("Could not send metric %s: %s", name, err)
+
+    def timing(self, name, seconds, tags):
+        self._send(name, round(seconds * 1000, 3), 'ms', tags)
+
+    def count(self, name, value, tags):
+        self._send(name, value, 'c', tags)
+
+
+class PrometheusSink:
+    """
+    Record measurements as prometheus_client histograms (seconds) and counters.
+
+    Arguments:
+        registry: The ``CollectorRegistry`` to register metrics in; the default
+            registry when omitted.
+    """
+
+    def __init__(self, registry=None, namespace='course_import'):
+        try:
+            import prometheus_client  # pylint: disable=import-outside-toplevel
+        except ImportError as err:
+            raise ImproperlyConfigured("prometheus_client is required by PrometheusSink.") from err
+        self.client = prometheus_client
+        self.registry = registry or prometheus_client.REGISTRY
+        self.namespace = namespace
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def _metric(self, metric_class, name, tags):
+        key = (metric_class, name, tuple(sorted(tags)))
+        metric = self.metrics.get(key)
+        if metric is None:
+            with self.lock:
+                metric = self.metrics.get(key)
+                if metric is None:
+                    metric = metric_class(
+                        re.sub(r'\W', '_', name), name, labelnames=key[2],
+                        namespace=self.namespace, registry=self.registry,
+                    )
+                    self.metrics[key] = metric
+        return metric.labels(**{label: str(value) for label, value in tags.items()}) if tags else metric
+
+    def timing(self, name, seconds, tags):
+        self._metric(self.client.Histogram, f'{name}_seconds', tags).observe(seconds)
+
+    def count(self, name, value, tags):
+        self._metric(self.client.Counter, name, tags).inc(value)
+
+
+class MemorySink:
+    """
+    Aggregate measurements in process: count, total and maximum per metric and tags.
+    """
+
+    def __init__(self):
+        self.timings = {}
+        self.counters = {}
+        self.lock = threading.Lock()
+
+    def timing(self, name, seconds, tags):
+        key = (name, tuple(sorted(tags.items())))
+        with self.lock:
+            calls, total, longest = self.timings.get(key, (0, 0.0, 0.0))
+            self.timings[key] = (calls + 1, total + seconds, max(longest, seconds))
+
+    def count(self, name, value, tags):
+        key = (name, tuple(sorted(tags.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
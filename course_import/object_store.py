@@ -0,0 +1,109 @@
+"""
+Object store access for the S3 templates source.
+
+Templates stored in a bucket are laid out as one JSON manifest per template under
+a common prefix. ``get_object_store_client`` returns either a boto3 S3 client or,
+for local development and tests, ``FileSystemObjectStore``, which implements the
+small subset of the S3 client API used here on top of a directory tree.
+"""
+import os
+import threading
+
+from django.core.exceptions import ImproperlyConfigured
+
+from course_import.cache import CatalogCache
+
+DEFAULT_MANIFEST_CACHE_MAX_ENTRIES = 4096
+
+# Parsed manifests keyed by object store and key, or by URL for GitHub manifest directories;
+# an entry is reused while its ETag (or content hash) matches.
+manifest_cache = CatalogCache(max_entries=DEFAULT_MANIFEST_CACHE_MAX_ENTRIES)
+
+# boto3 clients are thread-safe; one per endpoint and region keeps their connection pools warm.
+_s3_clients = {}
+_s3_clients_lock = threading.Lock()
+
+
+class FileSystemObjectStore:
+    """
+    A minimal stand-in for a boto3 S3 client backed by the local filesystem.
+
+    Buckets are sub-directories of ``root`` and keys are paths relative to the
+    bucket directory. ETags are derived from the file's size and modification
+    time, so they change whenever a manifest is rewritten.
+    """
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+
+    def _bucket_dir(self, bucket):
+        return os.path.join(self.root, bucket)
+
+    @staticmethod
+    def _etag(stat_result):
+        return f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+
+    def list_objects_v2(self, Bucket, Prefix='', **kwargs):  # pylint: disable=invalid-name,unused-argument
+        """
+        List every object in ``Bucket`` whose key starts with ``Prefix``.
+        """
+        bucket_dir = self._bucket_dir(Bucket)
+        contents = []
+        for dirpath, _dirnames, filenames in os.walk(bucket_dir):
+            for filename in filenames:
+                full_path = os.path.join(dirpath, filename)
+                key = os.path.relpath(full_path, bucket_dir).replace(os.sep, '/')
+                if not key.startswith(Prefix):
+                    continue
+                stat_result = os.stat(full_path)
+                contents.append({'Key': key, 'ETag': self._etag(stat_result), 'Size': stat_result.st_size})
+        contents.sort(key=lambda item: item['Key'])
+        return {'Contents': contents, 'KeyCount': len(contents), 'IsTruncated': False}
+
+    def get_object(self, Bucket, Key, **kwargs):  # pylint: disable=invalid-name,unused-argument
+        """
+        Return the object stored under ``Key`` with an open ``Body`` file.
+        """
+        full_path = os.path.join(self._bucket_dir(Bucket), *Key.split('/'))
+        body = open(full_path, 'rb')  # pylint: disable=consider-using-with
+        return {'Body': body, 'ETag': self._etag(os.fstat(body.fileno()))}
+
+
+def get_object_store_client(source_config):
+    """
+    Build an object store client from an S3 ``source_config``.
+
+    Arguments:
+        source_config (dict): ``local_root`` selects ``FileSystemObjectStore``; otherwise
+            ``endpoint_url`` and ``region_name`` are passed to ``boto3.client('s3')``.
+            S3 clients are created once per endpoint and region and then reused.
+    """
+    if source_config.get('local_root'):
+        return FileSystemObjectStore(source_config['local_root'])
+
+    try:
+        import boto3  # pylint: disable=import-outside-toplevel
+    except ImportError as err:
+        raise ImproperlyConfigured("boto3 is required to fetch templates from S3.") from err
+
+    key = (source_config.get('endpoint_url'), source_config.get('region_name'))
+    with _s3_clients_lock:
+        client = _s3_clients.get(key)
+        if client is None:
+            client = _s3_clients[key] = boto3.client('s3', endpoint_url=key[0], region_name=key[1])
+        return client
+
+
+def iter_manifest_objects(client, bucket, prefix=''):
+    """
+    Yield ``(key, etag)`` for every JSON manifest under ``prefix``, following pagination.
+    """
+    kwargs = {'Bucket': bucket, 'Prefix': prefix}
+    while True:
+        page = client.list_objects_v2(**kwargs)
+        for item in page.get('Contents', []):
+            if item['Key'].endswith('.json'):
+                yield item['Key'], item.get('ETag')
+        if not page.get('IsTruncated'):
+            return
+        kwargs['ContinuationToken'] = page['NextContinuationToken']
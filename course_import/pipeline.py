@@ -1,16 +1,182 @@
 """
-A single-step pipeline to fetch templates from various sources such as GitHub
+Pipeline steps to fetch templates from various sources such as GitHub or S3
 """
 
-import requests
+import hashlib
+import itertools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin
+
+from django.conf import settings
 from openedx_filters import PipelineStep
 
+from course_import.cache import assembled_catalogs, catalog_cache, catalog_cache_key
+from course_import.catalog import TemplateCatalog
+from course_import.changes import catalog_changes, diff_catalogs, record_catalog
+from course_import.circuit_breaker import CircuitOpenError
+from course_import.codec import dumps, loads
+from course_import.http_client import session_manager
+from course_import.json_stream import iter_json_array
+from course_import.metrics import incr, timer
+from course_import.object_store import get_object_store_client, iter_manifest_objects, manifest_cache
+from course_import.predicates import canonical_predicate, compile_predicate
+from course_import.singleflight import catalog_flight, distributed_lock
+from course_import.snapshot import restore_snapshot, touch_snapshot, write_snapshot
+from course_import.thumbnails import (
+    allow_catalog_thumbnails,
+    prefetch_catalog_thumbnails,
+    thumbnail_prefetch_enabled,
+)
+from course_import.validation import iter_valid_entries
+
+log = logging.getLogger(__name__)
+
+STREAM_CHUNK_SIZE = 64 * 1024
+DEFAULT_CATALOG_MAX_WORKERS = 8
+SEARCH_KWARGS = ('q', 'filters', 'offset', 'limit')
+FILTER_VALUE_TYPES = (str, int, float, bool)
+
+
+def map_concurrently(fn, items):
+    """
+    Return ``[fn(item) for item in items]``, computed on up to ``COURSE_IMPORT_CATALOG_MAX_WORKERS`` threads.
+    """
+    max_workers = min(
+        len(items),
+        getattr(settings, 'COURSE_IMPORT_CATALOG_MAX_WORKERS', DEFAULT_CATALOG_MAX_WORKERS),
+    )
+    with ThreadPoolExecutor(max_workers=max(max_workers, 1)) as executor:
+        return list(executor.map(fn, items))
+
+
+def iter_matching_templates(courses, predicate, invalid=None):
+    """
+    Yield only the valid catalog entries accepted by ``predicate``.
+
+    Entries failing schema validation are skipped in the same pass, and their
+    diagnostics appended to ``invalid`` when a list is given.
+    """
+    for course in iter_valid_entries(courses, [] if invalid is None else invalid):
+        if predicate(course):
+            yield course
+
+
+def get_predicate_expression(step, kwargs):
+    """
+    Return the filter expression for a step: the ``where`` kwarg, else ``where`` from
+    ``OPEN_EDX_FILTERS_CONFIG``, else only active templates.
+    """
+    expression = kwargs.get('where')
+    if expression is None:
+        expression = step.extra_config.get('where')
+    return expression
+
+
+def catalog_result(catalog, kwargs):
+    """
+    Build the filter result for a fetched catalog.
+
+    Returns the full list of entries, or a ``{"count": ..., "results": [...]}`` page when
+    any of the ``q``, ``filters``, ``offset`` or ``limit`` kwargs is given. Error dicts
+    are returned unchanged.
+    """
+    if isinstance(catalog, dict):
+        return catalog
+    if not isinstance(catalog, TemplateCatalog):
+        catalog = TemplateCatalog(catalog)
+    if any(kwargs.get(name) is not None for name in SEARCH_KWARGS):
+        error = search_kwargs_error(kwargs)
+        if error is not None:
+            return {"error": f"Invalid search: {error}", "status": 400}
+        return catalog.search(
+            q=kwargs.get('q'),
+            filters=kwargs.get('filters'),
+            offset=int(kwargs.get('offset') or 0),
+            limit=None if kwargs.get('limit') is None else int(kwargs['limit']),
+        )
+    return list(catalog.entries)
+
+
+def search_kwargs_error(kwargs):
+    """
+    Return why the ``q``, ``filters``, ``offset`` and ``limit`` kwargs cannot be searched with, or None.
+    """
+    q, filters = kwargs.get('q'), kwargs.get('filters')
+    if q is not None and not isinstance(q, str):
+        return "q must be a string"
+    if filters is not None:
+        if not isinstance(filters, dict):
+            return "filters must be an object"
+        for field, value in filters.items():
+            values = value if isinstance(value, (list, tuple, set)) else (value,)
+            if not isinstance(field, str) or not all(isinstance(item, FILTER_VALUE_TYPES) for item in values):
+                return f"filters.{field} must be a string, number or boolean, or a list of them"
+    for name in ('offset', 'limit'):
+        value = kwargs.get(name)
+        if value is None or isinstance(value, str) and value.isdecimal():
+            continue
+        if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+            return f"{name} must be a non-negative integer"
+    return None
+
+
+def assembled_catalog(key, version, build):
+    """
+    Return the catalog cached under ``key`` if it has ``version``, else cache and return ``build()``.
+    """
+    cached = assembled_catalogs.get(key)
+    if cached is not None and cached.etag == version:
+        return cached.value
+    catalog = build()
+    assembled_catalogs.set(key, catalog, etag=version)
+    return catalog
+
+
+def add_catalog_version(output, catalog, kwargs, version=None):
+    """
+    Add the catalog ``version`` to a filter output, the diagnostics of ``invalid``
+    entries if there are any, and the change feed since the ``changes_since`` kwarg
+    when one is requested. A ``changes_since`` that is not a string replaces the
+    result with a 400 error dict.
+    """
+    since = kwargs.get('changes_since')
+    if since is not None and not isinstance(since, str):
+        output["result"] = {"error": "Invalid changes_since: must be a string", "status": 400}
+        return output
+    version = record_catalog(catalog, version)
+    output["version"] = version
+    if catalog.invalid:
+        output["invalid"] = catalog.invalid
+    if since is not None:
+        output["changes"] = catalog_changes(since, catalog, version)
+    return output
+
 
 class GithubTemplatesPipeline(PipelineStep):
     """
     Currently, this pipeline supports fetching templates from GitHub. It validates the
     provided source configuration, fetches the data, and applies filtering logic to
     return only active templates.
+
+    Filtered catalogs are cached in-process for ``COURSE_IMPORT_CATALOG_CACHE_TTL``
+    seconds and revalidated with a conditional GET once they expire.
+
+    Entries are kept when they match the ``where`` expression (see ``course_import.predicates``),
+    which defaults to ``{"active": True}``.
+
+    When upstream fails, the last good catalog is served with ``"stale": True`` in the
+    output. With ``COURSE_IMPORT_CATALOG_STALE_WHILE_REVALIDATE`` enabled an expired
+    catalog is served immediately and refreshed on a background thread instead.
+
+    With ``COURSE_IMPORT_CATALOG_SNAPSHOT_DIR`` set, every downloaded catalog is also
+    written to disk so new worker processes start from it instead of the network, and
+    with ``COURSE_IMPORT_THUMBNAIL_PREFETCH`` its thumbnails are warmed in the background.
+
+    Instead of one catalog file, ``source_config`` may be ``{"index": url}``: an index
+    listing one manifest file per template. Manifests are fetched concurrently and
+    cached one by one, so a refresh only downloads the manifests that changed.
     """
 
     def run_filter(self, source_type, **kwargs):  # pylint: disable=arguments-differ
@@ -19,40 +185,532 @@ class GithubTemplatesPipeline(PipelineStep):
         Arguments:
             source_type (str): The type of source ('github' or 's3').
             source_config (dict): Configuration for the source (e.g., URL for GitHub, bucket/key for S3).
+                For GitHub this may also be a list of URLs (or ``{"url": ..., "headers": ...}``
+                dicts) which are fetched concurrently and merged, or ``{"index": url}`` to read
+                a directory of per-template manifests, see ``fetch_manifest_catalog``.
+            where (dict): Optional predicate expression entries must match, see ``course_import.predicates``.
+            q, filters, offset, limit: Optional search over the catalog, see ``TemplateCatalog.search``.
+            changes_since (str): A previously returned ``version``; the output then also
+                holds the ``changes`` since that version, see ``course_import.changes``.
 
         Returns:
-            dict: Templates fetched from the source.
+            dict: Templates fetched from the source. When several sources are given,
+            per-source failures are reported under ``errors``. ``stale`` is True when
+            an expired cached catalog was served, and ``version`` identifies the
+            catalog content. Entries that fail schema validation are left out and
+            described under ``invalid``.
 
         Raises:
             TemplateFetchException: If fetching templates fails.
         """
         if source_type == "github":
-            return {"result": self.fetch_from_github(**kwargs)}
+            with timer('catalog.run_filter', source_type=source_type):
+                if isinstance(kwargs.get('source_config'), (list, tuple)):
+                    output = self.fetch_many_from_github(**kwargs)
+                    catalog = output["result"]
+                    output["result"] = catalog_result(catalog, kwargs)
+                    if isinstance(catalog, TemplateCatalog):
+                        add_catalog_version(output, catalog, kwargs, output["version"])
+                    return output
+                catalog, stale = self.fetch_catalog_from_github(**kwargs)
+                if stale:
+                    incr('catalog.stale')
+                output = {"result": catalog_result(catalog, kwargs), "stale": stale}
+                if isinstance(catalog, TemplateCatalog):
+                    add_catalog_version(output, catalog, kwargs)
+                return output
         else:
             return {}
 
     def fetch_from_github(self, **kwargs):
         """
         Fetches and processes raw file data directly from raw GitHub URL.
+
+        Returns:
+            list: Active templates, or an error dict.
+        """
+        catalog, _stale = self.fetch_catalog_from_github(**kwargs)
+        return catalog if isinstance(catalog, dict) else list(catalog.entries)
+
+    def fetch_catalog_from_github(self, **kwargs):
+        """
+        Fetch the active templates of a GitHub catalog as a ``TemplateCatalog``.
+
+        Returns:
+            tuple: The catalog (or an error dict) and whether it is stale.
+
+        A fresh cached catalog is returned without any network access. An expired
+        one is revalidated with If-None-Match/If-Modified-Since and reused when
+        upstream answers 304 Not Modified.
+
+        With ``stream=True`` (or the ``COURSE_IMPORT_CATALOG_STREAMING`` setting) the
+        catalog is parsed entry by entry while it downloads, so memory stays bounded
+        by a single entry rather than the whole document.
+
+        Concurrent callers that find the same catalog expired share a single
+        refresh, see ``refresh_shared``.
         """
         source_config = kwargs.get('source_config')
-        headers = kwargs.get('headers', {})
+        headers = kwargs.get('headers') or {}
+        stream = kwargs.get('stream', getattr(settings, 'COURSE_IMPORT_CATALOG_STREAMING', False))
 
-        if not source_config:
-            return {"error": "Source config not provided", "status": 400}
+        index_url = source_config.get('index') if isinstance(source_config, dict) else None
+        if not source_config or (isinstance(source_config, dict) and not index_url):
+            return {"error": "Source config not provided", "status": 400}, False
 
+        expression = get_predicate_expression(self, kwargs)
         try:
-            response = requests.get(source_config, headers=headers)  # pylint: disable=missing-timeout
+            predicate = compile_predicate(expression)
+        except ValueError as err:
+            return {"error": f"Invalid filter expression: {err}", "status": 400}, False
+
+        variant = canonical_predicate(expression)
+        if index_url:
+            cache_key = catalog_cache_key(index_url, headers, ('index', variant))
+        else:
+            cache_key = catalog_cache_key(source_config, headers, variant)
+        cached = catalog_cache.get(cache_key)
+        if cached is None:
+            cached = restore_snapshot(catalog_cache, cache_key)
+        if cached is not None and cached.is_fresh():
+            return cached.value, False
+
+        servable_stale = cached is not None and cached.is_servable_stale()
+        stale_while_revalidate = kwargs.get(
+            'stale_while_revalidate',
+            getattr(settings, 'COURSE_IMPORT_CATALOG_STALE_WHILE_REVALIDATE', False),
+        )
+        if servable_stale and stale_while_revalidate:
+            if catalog_cache.start_refresh(cache_key):
+                threading.Thread(
+                    target=self.refresh_in_background,
+                    args=(cache_key, cached, source_config, headers, predicate, stream),
+                    daemon=True,
+                ).start()
+            return cached.value, True
+
+        catalog, _shared = catalog_flight.do(
+            cache_key,
+            lambda: self.refresh_shared(cache_key, cached, source_config, headers, predicate, stream),
+        )
+        if isinstance(catalog, dict) and servable_stale:
+            log.warning("Serving stale template catalog for %s: %s", source_config, catalog.get('error'))
+            return cached.value, True
+        return catalog, False
+
+    def refresh_shared(self, cache_key, cached, source_config, headers, predicate, stream):
+        """
+        Refresh a catalog on behalf of every caller waiting for it.
+
+        Runs once per process at a time for a cache key (see ``catalog_flight``) and,
+        with ``COURSE_IMPORT_CATALOG_LOCK_CACHE``, once across processes: a worker that
+        waited for another worker's refresh loads its snapshot instead of fetching.
+        """
+        with distributed_lock(cache_key) as acquired:
+            entry = catalog_cache.get(cache_key)
+            if (entry is None or not entry.is_fresh()) and not acquired:
+                entry = restore_snapshot(catalog_cache, cache_key)
+            if entry is not None and entry.is_fresh():
+                return entry.value
+            return self.refresh_catalog(cache_key, entry or cached, source_config, headers, predicate, stream)
+
+    def refresh_in_background(self, cache_key, cached, source_config, headers, predicate, stream):
+        """
+        Refresh a cached catalog off the request path, releasing the refresh claim when done.
+        """
+        try:
+            catalog = self.refresh_catalog(cache_key, cached, source_config, headers, predicate, stream)
+            if isinstance(catalog, dict):
+                log.warning("Background refresh of template catalog %s failed: %s", source_config, catalog)
+        finally:
+            catalog_cache.finish_refresh(cache_key)
+
+    def refresh_catalog(self, cache_key, cached, source_config, headers, predicate, stream):
+        """
+        Download (or revalidate) a catalog and store it in the cache.
+
+        Returns:
+            TemplateCatalog: The refreshed catalog, or an error dict.
+        """
+        if isinstance(source_config, dict):
+            try:
+                with timer('catalog.manifests'):
+                    catalog = self.fetch_manifest_catalog(source_config['index'], headers, predicate)
+            except Exception as err:  # pylint: disable=broad-except
+                return {"error": f"Error fetching: {err}", "status": 500}
+            if isinstance(catalog, dict):
+                return catalog
+            return self.store_catalog(cache_key, cached, catalog, source_config)
+
+        request_headers = dict(headers)
+        if cached is not None:
+            request_headers.update(cached.conditional_headers())
+
+        try:
+            with timer('catalog.fetch'):  # DNS, connect, TLS and time to the response headers
+                response = session_manager.get(source_config, headers=request_headers, stream=stream)
+
+            if response.status_code == 304 and cached is not None:
+                # Give a streamed response's connection back to the pool.
+                response.close()
+                incr('catalog.not_modified')
+                catalog_cache.touch(cache_key)
+                touch_snapshot(cache_key)
+                return cached.value
 
             if response.status_code != 200:
+                response.close()
                 return {"error": f"Failed to fetch from URL. Status code: {response.status_code}"}
 
-            if not response.content.strip():  # Ensure the response content is not empty
-                return {"error": "Response content is empty", "status": 204}
+            invalid = []
+            if stream:
+                with timer('catalog.stream'):  # transfer, parse and filter are interleaved
+                    active_courses = self.stream_matching_templates(response, predicate, invalid)
+                if active_courses is None:
+                    return {"error": "Response content is empty", "status": 204}
+            else:
+                with timer('catalog.transfer'):
+                    content = response.content
+                incr('catalog.bytes', len(content))
+                if not content.strip():  # Ensure the response content is not empty
+                    return {"error": "Response content is empty", "status": 204}
+
+                with timer('catalog.parse'):
+                    data = loads(content)  # Attempt to parse JSON
+                if not isinstance(data, list):
+                    return {"error": "Expected a JSON array of templates", "status": 500}
+                with timer('catalog.filter'):
+                    active_courses = list(iter_matching_templates(data, predicate, invalid))
+
+            incr('catalog.records', len(active_courses))
+            if invalid:
+                incr('catalog.invalid_records', len(invalid))
+            catalog = TemplateCatalog(active_courses, invalid)
+            return self.store_catalog(
+                cache_key, cached, catalog, source_config,
+                etag=response.headers.get('ETag'), last_modified=response.headers.get('Last-Modified'),
+            )
+
+        except CircuitOpenError as err:
+            return {"error": str(err), "status": 503}
+        except Exception as err:  # pylint: disable=broad-except
+            return {"error": f"Error fetching: {err}", "status": 500}
+
+    def store_catalog(self, cache_key, cached, catalog, source_config, etag=None, last_modified=None):
+        """
+        Cache a freshly downloaded catalog, write its snapshot and warm its changed thumbnails.
+        """
+        if catalog.invalid:
+            log.warning("Skipped %d invalid entries in template catalog %s", len(catalog.invalid), source_config)
+        catalog_cache.set(cache_key, catalog, etag=etag, last_modified=last_modified)
+        try:
+            with timer('catalog.snapshot'):
+                write_snapshot(
+                    cache_key, catalog.entries, etag=etag, last_modified=last_modified, invalid=catalog.invalid
+                )
+        except OSError as err:
+            log.warning("Could not write template catalog snapshot for %s: %s", source_config, err)
+        allow_catalog_thumbnails(catalog)
+        if not thumbnail_prefetch_enabled():
+            return catalog
+        if cached is not None:
+            changes = diff_catalogs(cached.value, catalog)
+            prefetch_catalog_thumbnails(changes['added'] + changes['modified'])
+        else:
+            prefetch_catalog_thumbnails(catalog.entries)
+        return catalog
+
+    def fetch_manifest_catalog(self, index_url, headers, predicate):
+        """
+        Build a catalog from a directory of per-template manifests.
+
+        The index at ``index_url`` is a JSON array (or ``{"manifests": [...]}``) of manifest
+        paths relative to the index, each either a string or ``{"path": ..., "sha": ...}``.
+        Manifests are fetched concurrently with up to ``COURSE_IMPORT_CATALOG_MAX_WORKERS``
+        workers and cached one by one: a manifest whose ``sha`` is unchanged is never
+        requested again, and one without a ``sha`` is revalidated with a conditional GET.
+        Manifests that cannot be fetched or are invalid are reported in ``invalid``.
+
+        Returns:
+            TemplateCatalog: The matching templates, or an error dict.
+        """
+        index = self.load_github_manifest(index_url, headers)
+        items = index.get('manifests') if isinstance(index, dict) else index
+        if not isinstance(items, list):
+            return {"error": "Expected a JSON array of manifest paths", "status": 500}
+
+        refs, invalid = [], []
+        for position, item in enumerate(items):
+            path, sha = (item, None) if isinstance(item, str) else (None, None)
+            if isinstance(item, dict):
+                path, sha = item.get('path'), item.get('sha')
+            if not isinstance(path, str) or not path:
+                invalid.append({"index": position, "errors": ["path: expected string"]})
+                continue
+            refs.append((position, path, sha))
+
+        def fetch(ref):
+            _position, path, sha = ref
+            try:
+                return self.load_github_manifest(urljoin(index_url, path), headers, sha), None
+            except Exception as err:  # pylint: disable=broad-except
+                return None, str(err)
+
+        results = map_concurrently(fetch, refs)
+
+        fetched, manifests = [], []
+        for (position, path, _sha), (manifest, error) in zip(refs, results):
+            if error is not None:
+                invalid.append({"index": position, "path": path, "errors": [f"fetch failed: {error}"]})
+                continue
+            fetched.append((position, path))
+            manifests.append(manifest)
+
+        manifest_invalid = []
+        templates = list(iter_matching_templates(manifests, predicate, manifest_invalid))
+        for diagnostic in manifest_invalid:
+            diagnostic["index"], diagnostic["path"] = fetched[diagnostic["index"]]
+        invalid.extend(manifest_invalid)
+        invalid.sort(key=lambda diagnostic: diagnostic["index"])
+        return TemplateCatalog(templates, invalid)
+
+    def load_github_manifest(self, url, headers, sha=None):
+        """
+        Return the parsed JSON document at ``url`` through ``manifest_cache``.
+
+        With a ``sha`` the cached copy for that content hash is reused as is. Otherwise a
+        fresh copy is reused, and an expired one is revalidated with its ETag; if upstream
+        fails the expired copy is served instead.
+
+        Raises:
+            ValueError: If the document cannot be fetched or parsed and nothing is cached.
+        """
+        cache_key = ('github', *catalog_cache_key(url, headers, sha))
+        cached = manifest_cache.get(cache_key)
+        if cached is not None and (sha is not None or cached.is_fresh()):
+            return cached.value
+
+        request_headers = dict(headers)
+        if cached is not None:
+            request_headers.update(cached.conditional_headers())
+        try:
+            response = session_manager.get(url, headers=request_headers)
+            if response.status_code == 304 and cached is not None:
+                manifest_cache.touch(cache_key)
+                return cached.value
+            if response.status_code != 200:
+                raise ValueError(f"Failed to fetch from URL. Status code: {response.status_code}")
+            manifest = loads(response.content)
+        except Exception as err:  # pylint: disable=broad-except
+            if cached is None:
+                raise ValueError(str(err)) from err
+            log.warning("Serving cached manifest %s: %s", url, err)
+            return cached.value
+
+        manifest_cache.set(
+            cache_key, manifest,
+            etag=response.headers.get('ETag'), last_modified=response.headers.get('Last-Modified'),
+        )
+        return manifest
+
+    def fetch_many_from_github(self, **kwargs):
+        """
+        Fetch several catalogs concurrently and merge them.
+
+        Entries are de-duplicated by ``zip_url``, keeping the first occurrence in
+        source order. A failing source does not fail the others; its error is
+        returned under ``errors`` instead. ``stale`` is True if any source was
+        served from an expired cache entry.
+        """
+        sources = []
+        default_headers = kwargs.get('headers') or {}
+        for source in kwargs['source_config']:
+            if isinstance(source, dict):
+                sources.append((
+                    source['url'] if 'url' in source else {'index': source.get('index')},
+                    source.get('headers', default_headers) or {},
+                ))
+            else:
+                sources.append((source, default_headers))
+
+        if not sources:
+            return {"result": {"error": "Source config not provided", "status": 400}, "stale": False}
+
+        results = map_concurrently(
+            lambda source: self.fetch_catalog_from_github(
+                **{**kwargs, 'source_config': source[0], 'headers': source[1]}
+            ),
+            sources,
+        )
+
+        catalogs, errors, invalid, any_stale = [], [], [], False
+        version = hashlib.sha256()
+        for (url, _headers), (catalog, stale) in zip(sources, results):
+            if isinstance(catalog, dict):
+                errors.append({"source": url, **catalog})
+                continue
+            any_stale = any_stale or stale
+            invalid.extend({"source": url, **diagnostic} for diagnostic in catalog.invalid)
+            version.update(catalog.version.encode('ascii'))
+            catalogs.append(catalog)
+
+        def merge():
+            merged, seen = [], set()
+            for catalog in catalogs:
+                for course in catalog.entries:
+                    zip_url = course.get('zip_url')
+                    if zip_url is not None:
+                        if zip_url in seen:
+                            continue
+                        seen.add(zip_url)
+                    merged.append(course)
+            return TemplateCatalog(merged, invalid)
+
+        # Keyed by the diagnostics too, since they name the sources they come from.
+        key = ('github', version.hexdigest(), dumps(invalid, sort_keys=True))
+        return {
+            "result": assembled_catalog(key, version.hexdigest(), merge),
+            "errors": errors,
+            "stale": any_stale,
+            "version": version.hexdigest(),
+        }
+
+    def stream_matching_templates(self, response, predicate, invalid=None):
+        """
+        Parse a streamed catalog response, keeping only valid entries accepted by ``predicate``.
+
+        Returns:
+            list: Matching templates, or None if the response body is empty.
+        """
+        try:
+            chunks = response.iter_content(chunk_size=STREAM_CHUNK_SIZE)
+            for first_chunk in chunks:
+                if first_chunk.strip():
+                    break
+            else:
+                return None
+            entries = iter_json_array(itertools.chain([first_chunk], chunks), loads=loads)
+            return list(iter_matching_templates(entries, predicate, invalid))
+        finally:
+            response.close()
+
+
+class S3TemplatesPipeline(PipelineStep):
+    """
+    Fetches templates from an S3-compatible object store.
+
+    Each template is a JSON manifest object under ``source_config['prefix']``.
+    Manifests are downloaded in parallel and cached by object ETag, so a refresh
+    only re-reads the manifests that changed since the last listing. The catalog
+    is cached for ``COURSE_IMPORT_CATALOG_CACHE_TTL`` seconds, like GitHub
+    catalogs, before the bucket is listed again.
+    """
+
+    def run_filter(self, source_type, **kwargs):  # pylint: disable=arguments-differ
+        """
+        Fetch templates from an S3 bucket.
+
+        Arguments:
+            source_type (str): The type of source. Only 's3' is handled by this step.
+            source_config (dict): ``bucket`` and ``prefix`` of the manifests, plus either
+                ``endpoint_url``/``region_name`` for S3 or ``local_root`` for a local directory.
+            where (dict): Optional predicate expression entries must match, see ``course_import.predicates``.
+            q, filters, offset, limit: Optional search over the catalog, see ``TemplateCatalog.search``.
+            changes_since (str): A previously returned ``version`` to compute ``changes`` from.
+
+        Returns:
+            dict: Templates fetched from the bucket, or an empty dict for other sources.
+        """
+        if source_type == "s3":
+            with timer('catalog.run_filter', source_type=source_type):
+                catalog = self.fetch_catalog_from_s3(**kwargs)
+                if isinstance(catalog, dict):
+                    return {"result": catalog}
+                return add_catalog_version({"result": catalog_result(catalog, kwargs)}, catalog, kwargs)
+        return {}
+
+    def fetch_from_s3(self, **kwargs):
+        """
+        List the manifests under the configured prefix and return the matching templates.
 
-            data = response.json()  # Attempt to parse JSON
-            active_courses = [course for course in data if course['metadata'].get('active') is True]
-            return active_courses
+        Returns:
+            list: Matching templates, or an error dict.
+        """
+        catalog = self.fetch_catalog_from_s3(**kwargs)
+        return catalog if isinstance(catalog, dict) else list(catalog.entries)
+
+    def fetch_catalog_from_s3(self, **kwargs):
+        """
+        Fetch the matching templates of a bucket as a ``TemplateCatalog``.
 
+        Invalid manifests are left out and described in the catalog's ``invalid``
+        diagnostics, identified by their object ``key``.
+        """
+        source_config = kwargs.get('source_config')
+
+        if not isinstance(source_config, dict) or not source_config.get('bucket'):
+            return {"error": "Source config not provided", "status": 400}
+
+        expression = get_predicate_expression(self, kwargs)
+        try:
+            predicate = compile_predicate(expression)
+        except ValueError as err:
+            return {"error": f"Invalid filter expression: {err}", "status": 400}
+
+        bucket = source_config['bucket']
+        prefix = source_config.get('prefix', '')
+        store_id = source_config.get('endpoint_url') or source_config.get('local_root')
+        cache_key = catalog_cache_key(('s3', store_id, bucket, prefix), variant=canonical_predicate(expression))
+        cached = catalog_cache.get(cache_key)
+        if cached is not None and cached.is_fresh():
+            return cached.value
+
+        try:
+            client = get_object_store_client(source_config)
+            objects = list(iter_manifest_objects(client, bucket, prefix))
+            if not objects:
+                catalog = TemplateCatalog([])
+            elif all(etag is not None for _key, etag in objects):
+                # An unchanged listing reuses the catalog, and the search indexes, built from it.
+                listing = hashlib.sha256(dumps(objects)).hexdigest()
+                catalog = assembled_catalog(
+                    cache_key, listing, lambda: self.build_s3_catalog(client, store_id, bucket, objects, predicate),
+                )
+            else:
+                catalog = self.build_s3_catalog(client, store_id, bucket, objects, predicate)
         except Exception as err:  # pylint: disable=broad-except
             return {"error": f"Error fetching: {err}", "status": 500}
+
+        catalog_cache.set(cache_key, catalog)
+        allow_catalog_thumbnails(catalog)
+        return catalog
+
+    def build_s3_catalog(self, client, store_id, bucket, objects, predicate):
+        """
+        Load the manifests ``objects`` lists and return the matching templates as a ``TemplateCatalog``.
+        """
+        manifests = map_concurrently(lambda obj: self.load_manifest(client, store_id, bucket, *obj), objects)
+        invalid = []
+        templates = list(iter_matching_templates(manifests, predicate, invalid))
+        for diagnostic in invalid:
+            diagnostic["key"] = objects[diagnostic["index"]][0]
+        return TemplateCatalog(templates, invalid)
+
+    def load_manifest(self, client, store_id, bucket, key, etag):
+        """
+        Return the parsed manifest stored under ``key``, reusing the cached copy while its ETag matches.
+        """
+        cache_key = (store_id, bucket, key)
+        cached = manifest_cache.get(cache_key)
+        if cached is not None and etag is not None and cached.etag == etag:
+            return cached.value
+
+        obj = client.get_object(Bucket=bucket, Key=key)
+        body = obj['Body']
+        try:
+            manifest = loads(body.read())
+        finally:
+            body.close()
+
+        manifest_cache.set(cache_key, manifest, etag=obj.get('ETag', etag))
+        return manifest
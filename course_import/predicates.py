@@ -0,0 +1,158 @@
+"""
+A small declarative predicate language over catalog entry metadata.
+
+Expressions are plain dicts so they can live in ``OPEN_EDX_FILTERS_CONFIG`` or be
+passed to ``run_filter``::
+
+    {"active": True}                                  # equality
+    {"level": {"in": ["intro", "beginner"]}}          # membership
+    {"tags": {"contains": "ai"}}                      # list membership
+    {"duration": {"gte": 2, "lt": 10}}                # ranges
+    {"thumbnail": {"exists": True}}                   # presence
+    {"or": [{...}, {...}]}, {"and": [...]}, {"not": {...}}
+
+Field names refer to keys of the entry's ``metadata``; dotted names reach into
+nested dicts. An expression is compiled once into a single generated Python
+function (no interpretation per entry) and cached by its canonical JSON form.
+"""
+import json
+from functools import lru_cache
+from numbers import Number
+
+DEFAULT_PREDICATE = {"active": True}
+
+COMPARISONS = {'gt': '>', 'gte': '>=', 'lt': '<', 'lte': '<='}
+SCALAR_TYPES = (str, int, float, bool)
+_MISSING = object()
+
+
+def _path(metadata, keys):
+    """
+    Resolve a dotted field name against nested dicts.
+    """
+    value = metadata
+    for key in keys:
+        if not isinstance(value, dict):
+            return _MISSING
+        value = value.get(key, _MISSING)
+    return value
+
+
+class _Compiler:
+    """
+    Translate an expression into the source of a single boolean Python expression.
+
+    Field names and operands are never inlined into the source; they are bound as
+    names in the generated function's namespace.
+    """
+
+    def __init__(self):
+        self.namespace = {'_MISSING': _MISSING, '_path': _path, 'isinstance': isinstance}
+        self.counter = 0
+
+    def bind(self, value):
+        name = f'_v{len(self.namespace)}'
+        self.namespace[name] = value
+        return name
+
+    def field(self, name):
+        """
+        Return ``(setup, var)``: an assignment expression evaluating a field once, and its variable.
+        """
+        self.counter += 1
+        var = f'_x{self.counter}'
+        keys = name.split('.')
+        if len(keys) == 1:
+            return f'({var} := m.get({self.bind(name)}, _MISSING))', var
+        return f'({var} := _path(m, {self.bind(tuple(keys))}))', var
+
+    def compile(self, expression):
+        if not isinstance(expression, dict) or not expression:
+            raise ValueError(f"Expected a non-empty dict, got {expression!r}")
+        clauses = [self.clause(key, value) for key, value in expression.items()]
+        return clauses[0] if len(clauses) == 1 else '(' + ' and '.join(clauses) + ')'
+
+    def clause(self, key, value):
+        if key in ('and', 'or'):
+            if not isinstance(value, list) or not value:
+                raise ValueError(f"'{key}' expects a non-empty list")
+            return '(' + f' {key} '.join(self.compile(item) for item in value) + ')'
+        if key == 'not':
+            return f'(not {self.compile(value)})'
+        if isinstance(value, dict):
+            return self.operators(key, value)
+        return self.operator(key, 'eq', value)
+
+    def operators(self, name, operators):
+        if not operators:
+            raise ValueError(f"No operator given for '{name}'")
+        clauses = [self.operator(name, operator, operand) for operator, operand in operators.items()]
+        return clauses[0] if len(clauses) == 1 else '(' + ' and '.join(clauses) + ')'
+
+    def operator(self, name, operator, operand):  # pylint: disable=too-many-return-statements
+        setup, var = self.field(name)
+        if operator in ('eq', 'ne'):
+            if isinstance(operand, bool) or operand is None:
+                test = 'is' if operator == 'eq' else 'is not'
+            elif isinstance(operand, SCALAR_TYPES):
+                test = '==' if operator == 'eq' else '!='
+            else:
+                raise ValueError(f"'{operator}' on '{name}' expects a scalar")
+            return f'({setup} {test} {self.bind(operand)})'
+        if operator in ('in', 'nin'):
+            if not isinstance(operand, (list, tuple)) or not all(isinstance(v, SCALAR_TYPES) for v in operand):
+                raise ValueError(f"'{operator}' on '{name}' expects a list of scalars")
+            test = f'{var} in {self.bind(frozenset(operand))}'
+            if operator == 'in':
+                return f'(isinstance({setup}, {self.bind(SCALAR_TYPES)}) and {test})'
+            return f'(not (isinstance({setup}, {self.bind(SCALAR_TYPES)}) and {test}))'
+        if operator == 'contains':
+            return f'(isinstance({setup}, {self.bind((list, tuple))}) and {self.bind(operand)} in {var})'
+        if operator in COMPARISONS:
+            if isinstance(operand, bool) or not isinstance(operand, (Number, str)):
+                raise ValueError(f"'{operator}' on '{name}' expects a number or string")
+            types = str if isinstance(operand, str) else (int, float)
+            return (f'(isinstance({setup}, {self.bind(types)}) and not isinstance({var}, bool)'
+                    f' and {var} {COMPARISONS[operator]} {self.bind(operand)})')
+        if operator == 'exists':
+            test = 'is not' if operand else 'is'
+            return f'({setup} {test} _MISSING)'
+        raise ValueError(f"Unknown operator '{operator}'")
+
+
+@lru_cache(maxsize=256)
+def _compile_canonical(canonical):
+    compiler = _Compiler()
+    body = compiler.compile(json.loads(canonical))
+    source = (
+        'def predicate(entry):\n'
+        '    m = entry.get("metadata")\n'
+        '    if not isinstance(m, dict):\n'
+        '        return False\n'
+        f'    return bool({body})\n'
+    )
+    exec(compile(source, '<predicate>', 'exec'), compiler.namespace)  # pylint: disable=exec-used
+    return compiler.namespace['predicate']
+
+
+def canonical_predicate(expression):
+    """
+    Return the canonical JSON form of an expression, used as its cache key.
+    """
+    try:
+        return json.dumps(expression, sort_keys=True, separators=(',', ':'))
+    except TypeError as err:
+        raise ValueError(f"Expression is not JSON serializable: {err}") from err
+
+
+def compile_predicate(expression=None):
+    """
+    Compile an expression into a function taking a catalog entry and returning a bool.
+
+    Compiled predicates are cached, so compiling the same expression again is a
+    dictionary lookup.
+
+    Raises:
+        ValueError: If the expression is malformed.
+    """
+    return _compile_canonical(canonical_predicate(DEFAULT_PREDICATE if expression is None else expression))
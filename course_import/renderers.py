@@ -0,0 +1,17 @@
+"""
+DRF renderers for course import APIs.
+"""
+from rest_framework.renderers import JSONRenderer
+
+from course_import.codec import dumps
+
+
+class CodecJSONRenderer(JSONRenderer):
+    """
+    Render JSON responses with the configured ``course_import.codec`` backend.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return dumps(data)
@@ -0,0 +1,152 @@
+"""
+Cacheable HTTP representations of template catalogs.
+
+A ``CatalogRendition`` is the serialized body of one catalog version (and query),
+with a strong ETag derived from its content and compressed variants that are
+computed at most once. Renditions are cached by catalog version, so repeat
+requests neither re-serialize nor re-compress anything.
+"""
+import gzip
+import hashlib
+import threading
+
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+
+from course_import.cache import CatalogCache
+from course_import.codec import dumps
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+DEFAULT_RENDITION_CACHE_MAX_ENTRIES = 128
+CACHE_CONTROL = 'private, no-cache'
+
+
+def _compress_gzip(body):
+    return gzip.compress(body, compresslevel=9, mtime=0)
+
+
+def _compress_brotli(body):
+    return brotli.compress(body, quality=11)
+
+
+# Preferred first.
+COMPRESSORS = {'br': _compress_brotli, 'gzip': _compress_gzip} if brotli else {'gzip': _compress_gzip}
+
+rendition_cache = CatalogCache(max_entries=DEFAULT_RENDITION_CACHE_MAX_ENTRIES)
+
+
+def negotiate_encoding(accept_encoding):
+    """
+    Pick the preferred content coding allowed by an ``Accept-Encoding`` header.
+
+    Returns:
+        str: ``'br'``, ``'gzip'`` or ``'identity'``.
+    """
+    weights = {}
+    for item in (accept_encoding or '').split(','):
+        coding, _, params = item.strip().partition(';')
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        weights[coding.strip().lower()] = quality
+
+    for coding in COMPRESSORS:
+        if weights.get(coding, weights.get('*', 0.0)) > 0:
+            return coding
+    return 'identity'
+
+
+class CatalogRendition:
+    """
+    The serialized body of a catalog with lazily computed compressed variants.
+
+    Arguments:
+        body (bytes): The uncompressed JSON body.
+    """
+
+    def __init__(self, body):
+        self.etag = hashlib.sha256(body).hexdigest()[:32]
+        self._bodies = {'identity': body}
+        self._lock = threading.Lock()
+
+    def body(self, encoding):
+        """
+        Return the body in ``encoding``, compressing it on first use.
+        """
+        body = self._bodies.get(encoding)
+        if body is None:
+            with self._lock:
+                body = self._bodies.get(encoding)
+                if body is None:
+                    body = COMPRESSORS[encoding](self._bodies['identity'])
+                    self._bodies[encoding] = body
+        return body
+
+    def etag_for(self, encoding):
+        """
+        Return the strong ETag of the given representation.
+        """
+        return f'"{self.etag}"' if encoding == 'identity' else f'"{self.etag}-{encoding}"'
+
+    def matches(self, if_none_match):
+        """
+        Return True if an ``If-None-Match`` header matches any representation of this body.
+        """
+        for tag in (if_none_match or '').split(','):
+            tag = tag.strip()
+            if tag == '*':
+                return True
+            tag = tag.removeprefix('W/').strip('"')
+            if tag.split('-', 1)[0] == self.etag:
+                return True
+        return False
+
+    def respond(self, request):
+        """
+        Build the response for ``request``: 304 if the client's copy is current,
+        otherwise the best compressed body it accepts.
+        """
+        encoding = negotiate_encoding(request.META.get('HTTP_ACCEPT_ENCODING'))
+        if self.matches(request.META.get('HTTP_IF_NONE_MATCH')):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(self.body(encoding), content_type='application/json')
+            if encoding != 'identity':
+                response['Content-Encoding'] = encoding
+        response['ETag'] = self.etag_for(encoding)
+        response['Cache-Control'] = CACHE_CONTROL
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+
+def get_rendition(payload, version=None, query=None):
+    """
+    Return the rendition of ``payload``, reusing the cached one for the same catalog version and query.
+
+    Arguments:
+        payload: The JSON-serializable response body.
+        version (str): Catalog version reported by the templates pipeline. Without
+            one the payload is serialized every time.
+        query (dict): Request parameters that shaped ``payload``.
+    """
+    if version is None:
+        return CatalogRendition(dumps(payload))
+
+    key = (version, tuple(sorted((query or {}).items())))
+    cached = rendition_cache.get(key)
+    if cached is not None:
+        return cached.value
+
+    rendition = CatalogRendition(dumps(payload))
+    rendition_cache.set(key, rendition)
+    return rendition
@@ -0,0 +1,130 @@
+"""
+De-duplication of concurrent identical catalog fetches.
+
+When a popular catalog expires, every request that sees it expired would fetch
+it from upstream at once. ``SingleFlight`` lets the first caller for a key do
+the fetch while concurrent callers for the same key wait and share its result.
+
+``distributed_lock`` extends this across processes (e.g. gunicorn workers)
+through the Django cache configured in ``COURSE_IMPORT_CATALOG_LOCK_CACHE``.
+"""
+import hashlib
+import logging
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+
+log = logging.getLogger(__name__)
+
+DEFAULT_CATALOG_LOCK_TIMEOUT = 30  # seconds
+LOCK_POLL_INTERVAL = 0.05  # seconds
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Run at most one call per key at a time; concurrent callers share its outcome.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, function):
+        """
+        Return ``function()``, or the result of the call already in flight for ``key``.
+
+        If the shared call raises, every caller waiting on it gets the exception.
+
+        Returns:
+            tuple: The result and whether it was shared from another caller's call.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = function()
+        except BaseException as err:
+            call.error = err
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+
+catalog_flight = SingleFlight()
+
+
+@contextmanager
+def distributed_lock(name, timeout=None, wait=None):
+    """
+    Hold a lock shared by all processes using the ``COURSE_IMPORT_CATALOG_LOCK_CACHE`` cache.
+
+    Yields True once the lock is acquired. If another process holds it, waits up to
+    ``wait`` seconds (default: the lock ``timeout``) for it to be released and yields
+    False, so the caller can pick up what the other process produced. Without the
+    setting, or when the cache is unreachable, yields True immediately.
+
+    Arguments:
+        name: Hashable identifying the lock.
+        timeout (int): Seconds after which an abandoned lock expires
+            (``COURSE_IMPORT_CATALOG_LOCK_TIMEOUT``).
+        wait (float): Maximum seconds to wait for another holder.
+    """
+    alias = getattr(settings, 'COURSE_IMPORT_CATALOG_LOCK_CACHE', None)
+    if not alias:
+        yield True
+        return
+
+    timeout = timeout or getattr(settings, 'COURSE_IMPORT_CATALOG_LOCK_TIMEOUT', DEFAULT_CATALOG_LOCK_TIMEOUT)
+    wait = timeout if wait is None else wait
+    key = 'course_import:lock:' + hashlib.sha256(repr(name).encode('utf-8')).hexdigest()
+    token = uuid.uuid4().hex
+    try:
+        cache = caches[alias]
+        acquired = cache.add(key, token, timeout)
+    except Exception as err:  # pylint: disable=broad-except
+        log.warning("Catalog lock cache %s unavailable, fetching without a lock: %s", alias, err)
+        acquired = None
+
+    if acquired is None:
+        yield True
+        return
+    if not acquired:
+        deadline = time.monotonic() + wait
+        while time.monotonic() < deadline and cache.get(key) is not None:
+            time.sleep(LOCK_POLL_INTERVAL)
+        yield False
+        return
+
+    try:
+        yield True
+    finally:
+        try:
+            if cache.get(key) == token:
+                cache.delete(key)
+        except Exception as err:  # pylint: disable=broad-except
+            log.warning("Could not release catalog lock %s: %s", key, err)
@@ -0,0 +1,195 @@
+"""
+On-disk snapshots of template catalogs for warm worker startup.
+
+After every successful download the templates pipeline writes the filtered
+catalog to ``COURSE_IMPORT_CATALOG_SNAPSHOT_DIR``. A freshly started worker that
+has nothing in its in-process cache memory-maps the snapshot instead of going to
+the network, and revalidates it with the stored ETag/Last-Modified once it expires.
+A revalidation answered with 304 bumps the snapshot's modification time, which
+then counts as its write time.
+
+File layout (little endian)::
+
+    magic (8 bytes) | header length (uint32) | entry count (uint32)
+    header (JSON: etag, last_modified, written_at, invalid)
+    offsets (count + 1 uint64, relative to the start of the data section)
+    data (one compact JSON document per entry)
+"""
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import time
+
+from django.conf import settings
+
+from course_import.cache import get_catalog_cache_ttl
+from course_import.catalog import TemplateCatalog
+from course_import.codec import dumps, loads
+
+log = logging.getLogger(__name__)
+
+MAGIC = b'CISNAP1\n'
+_PREAMBLE = struct.Struct('<8sII')
+_OFFSET = struct.Struct('<Q')
+
+
+def get_snapshot_dir():
+    """
+    Return the snapshot directory, or None when snapshots are disabled.
+    """
+    return getattr(settings, 'COURSE_IMPORT_CATALOG_SNAPSHOT_DIR', None)
+
+
+def snapshot_path(cache_key, directory):
+    """
+    Return the snapshot file used for a catalog cache key.
+
+    The key is hashed so credentials in request headers never end up in file names.
+    """
+    digest = hashlib.sha256(repr(cache_key).encode('utf-8')).hexdigest()
+    return os.path.join(directory, f'catalog-{digest}.snap')
+
+
+class CatalogSnapshot:
+    """
+    A catalog read back from disk.
+    """
+    __slots__ = ('entries', 'etag', 'last_modified', 'written_at', 'invalid')
+
+    def __init__(self, entries, etag=None, last_modified=None, written_at=0.0, invalid=None):
+        self.entries = entries
+        self.etag = etag
+        self.last_modified = last_modified
+        self.written_at = written_at
+        self.invalid = invalid or []
+
+
+def write_snapshot(cache_key, entries, etag=None, last_modified=None, directory=None, invalid=None):
+    """
+    Atomically write ``entries`` (and the diagnostics of ``invalid`` source entries) to
+    the snapshot file for ``cache_key``.
+
+    Returns:
+        str: The snapshot path, or None if snapshots are disabled.
+    """
+    directory = directory or get_snapshot_dir()
+    if not directory:
+        return None
+
+    header = json.dumps({
+        'etag': etag if isinstance(etag, str) else None,
+        'last_modified': last_modified if isinstance(last_modified, str) else None,
+        'written_at': time.time(),
+        'invalid': invalid or [],
+    }).encode('utf-8')
+    blobs = [dumps(entry) for entry in entries]
+    offsets = [0]
+    for blob in blobs:
+        offsets.append(offsets[-1] + len(blob))
+
+    os.makedirs(directory, exist_ok=True)
+    path = snapshot_path(cache_key, directory)
+    with tempfile.NamedTemporaryFile(dir=directory, prefix='.catalog-', delete=False) as snapshot_file:
+        try:
+            snapshot_file.write(_PREAMBLE.pack(MAGIC, len(header), len(blobs)))
+            snapshot_file.write(header)
+            snapshot_file.write(b''.join(_OFFSET.pack(offset) for offset in offsets))
+            snapshot_file.writelines(blobs)
+            snapshot_file.flush()
+            os.fsync(snapshot_file.fileno())
+        except BaseException:
+            os.unlink(snapshot_file.name)
+            raise
+    os.replace(snapshot_file.name, path)
+    return path
+
+
+def touch_snapshot(cache_key, directory=None):
+    """
+    Mark the snapshot for ``cache_key`` as revalidated now, by bumping its modification time.
+
+    Returns:
+        bool: Whether a snapshot was touched.
+    """
+    directory = directory or get_snapshot_dir()
+    if not directory:
+        return False
+    path = snapshot_path(cache_key, directory)
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        return False
+    except OSError as err:
+        log.warning("Could not touch catalog snapshot %s: %s", path, err)
+        return False
+    return True
+
+
+def read_snapshot(cache_key, directory=None):
+    """
+    Memory-map and decode the snapshot for ``cache_key``.
+
+    Returns:
+        CatalogSnapshot: The snapshot, or None if it is missing, disabled or unreadable.
+    """
+    directory = directory or get_snapshot_dir()
+    if not directory:
+        return None
+
+    path = snapshot_path(cache_key, directory)
+    try:
+        with open(path, 'rb') as snapshot_file, \
+                mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            magic, header_length, count = _PREAMBLE.unpack_from(data, 0)
+            if magic != MAGIC:
+                raise ValueError("Not a catalog snapshot")
+            position = _PREAMBLE.size
+            header = json.loads(data[position:position + header_length])
+            position += header_length
+            base = position + (count + 1) * _OFFSET.size
+            offsets = [offset for (offset,) in _OFFSET.iter_unpack(data[position:base])]
+            if base + offsets[-1] != len(data):
+                raise ValueError("Truncated catalog snapshot")
+            entries = [loads(data[base + start:base + end]) for start, end in zip(offsets, offsets[1:])]
+            # A snapshot revalidated since it was written has been touched, see touch_snapshot.
+            written_at = max(header.get('written_at', 0.0), os.fstat(snapshot_file.fileno()).st_mtime)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, struct.error) as err:
+        log.warning("Ignoring unreadable catalog snapshot %s: %s", path, err)
+        return None
+
+    return CatalogSnapshot(
+        entries,
+        header.get('etag'),
+        header.get('last_modified'),
+        written_at,
+        header.get('invalid'),
+    )
+
+
+def restore_snapshot(cache, cache_key, directory=None):
+    """
+    Load the snapshot for ``cache_key`` into ``cache``.
+
+    The entry stays fresh for whatever is left of the cache TTL since the snapshot
+    was written, and keeps its validators so it can be revalidated afterwards.
+
+    Returns:
+        CatalogCacheEntry: The restored entry, or None if there is no usable snapshot.
+    """
+    snapshot = read_snapshot(cache_key, directory)
+    if snapshot is None:
+        return None
+    remaining = get_catalog_cache_ttl() - max(time.time() - snapshot.written_at, 0)
+    return cache.set(
+        cache_key,
+        TemplateCatalog(snapshot.entries, snapshot.invalid),
+        etag=snapshot.etag,
+        last_modified=snapshot.last_modified,
+        ttl=remaining,
+    )
@@ -0,0 +1,101 @@
+"""
+Celery tasks downloading course archives off the request thread.
+
+In asynchronous mode ``CourseImportView.post`` only validates the request and
+queues ``download_and_import``. The task downloads the archive into import
+storage, then queues the platform's ``import_olx`` task and records its id as
+an artifact of its own ``UserTaskStatus``, so polling the download task id
+follows through to the import.
+"""
+import logging
+
+from celery import shared_task
+from cms.djangoapps.contentstore.tasks import import_olx  # pylint: disable=import-error
+from user_tasks.models import UserTaskArtifact, UserTaskStatus
+from user_tasks.tasks import UserTask
+
+from course_import.circuit_breaker import CircuitOpenError
+
+log = logging.getLogger(__name__)
+
+IMPORT_TASK_ARTIFACT = 'Import task'
+DOWNLOAD_MAX_RETRIES = 3
+
+
+class CourseArchiveDownloadError(Exception):
+    """
+    Raised when the archive of an asynchronous import cannot be downloaded.
+    """
+
+
+class CourseArchiveDownloadTask(UserTask):  # pylint: disable=abstract-method
+    """
+    Base class for the tasks downloading a course archive before its import.
+    """
+
+    @staticmethod
+    def calculate_total_steps(arguments_dict):
+        """
+        Download the archive, then queue its import.
+        """
+        return 2
+
+    @classmethod
+    def generate_name(cls, arguments_dict):
+        """
+        Create a name for this particular download task instance.
+        """
+        return f'Download of {arguments_dict["archive_name"]} for {arguments_dict["course_key_string"]}'
+
+
+@shared_task(base=CourseArchiveDownloadTask, bind=True)
+def download_and_import(self, user_id, course_key_string, file_url, archive_name, language):
+    """
+    Download ``file_url`` into import storage and queue ``import_olx`` for it.
+
+    Returns:
+        str: The id of the queued import task.
+    """
+    # Imported here because the views import this module to queue the task.
+    from course_import.views import (  # pylint: disable=import-outside-toplevel
+        course_import_directory,
+        download_file,
+        makedir,
+    )
+
+    self.status.set_state('Downloading')
+    course_dir = course_import_directory(course_key_string)
+    makedir(course_dir)
+    try:
+        storage_path = download_file(course_key_string, file_url, archive_name, course_dir)
+    except CircuitOpenError as err:
+        raise self.retry(exc=err, countdown=int(err.retry_after) + 1, max_retries=DOWNLOAD_MAX_RETRIES)
+    if not isinstance(storage_path, str):
+        raise CourseArchiveDownloadError("Failed to download a file.")
+    self.status.increment_completed_steps()
+
+    async_result = import_olx.delay(user_id, course_key_string, storage_path, archive_name, language)
+    UserTaskArtifact.objects.create(status=self.status, name=IMPORT_TASK_ARTIFACT, text=async_result.task_id)
+    log.info(f"Course import {course_key_string}: queued import task {async_result.task_id}")
+    return async_result.task_id
+
+
+def get_download_task_status(arguments_dict, task_id):
+    """
+    Return the status of the download task ``task_id``, or of its import once it is queued.
+
+    Arguments:
+        arguments_dict (dict): ``course_key_string`` and ``archive_name`` of the import.
+        task_id (str): The id returned by an asynchronous ``CourseImportView.post``.
+
+    Returns:
+        UserTaskStatus: None if no such download task exists.
+    """
+    name = CourseArchiveDownloadTask.generate_name(arguments_dict)
+    status = UserTaskStatus.objects.filter(name=name, task_id=task_id).first()
+    if status is None:
+        return None
+    artifact = status.artifacts.filter(name=IMPORT_TASK_ARTIFACT).first()
+    if artifact is not None:
+        return UserTaskStatus.objects.filter(task_id=artifact.text).first() or status
+    return status
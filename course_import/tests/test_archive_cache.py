@@ -0,0 +1,275 @@
+"""
+Tests for the content-addressed archive cache.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from unittest.mock import patch
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, Storage
+from django.test import TestCase
+
+from course_import.archive_cache import CACHE_PREFIX, ArchiveCache
+from course_import.downloads import SpooledArchive
+
+
+class TestArchiveCache(TestCase):
+    """
+    Test cases for ArchiveCache on a file system storage.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.storage = FileSystemStorage(self.root)
+        self.cache = ArchiveCache(self.storage, max_bytes=10)
+
+    def store(self, url, body, etag='"v1"', filename='course.tar.gz'):
+        with SpooledArchive(filename, self.root) as archive:
+            archive.write(body)
+            return self.cache.store(url, etag, archive, filename)
+
+    def read(self, name):
+        with self.storage.open(name, 'rb') as content:
+            return content.read()
+
+    def test_store_and_checkout(self):
+        """
+        Test that imports get hard links to one stored body, found by URL and ETag.
+        """
+        name = self.store('https://example.com/a.tar.gz', b'abcd')
+        blob = CACHE_PREFIX + hashlib.sha256(b'abcd').hexdigest()
+
+        self.assertEqual(name, 'olx_import/course.tar.gz')
+        self.assertEqual(self.cache.lookup('https://example.com/a.tar.gz'), '"v1"')
+        other = self.cache.checkout('https://example.com/a.tar.gz', 'course.tar.gz')
+
+        self.assertNotEqual(other, name)
+        self.assertEqual(self.read(other), b'abcd')
+        self.assertEqual(os.stat(self.storage.path(blob)).st_nlink, 3)
+
+    def test_same_body_stored_once(self):
+        """
+        Test that a body already cached under another URL is not stored again.
+        """
+        self.store('https://example.com/a.tar.gz', b'abcd')
+        self.store('https://mirror.example.com/a.tar.gz', b'abcd', etag='W/"weak"')
+
+        self.assertEqual(len(self.storage.listdir(CACHE_PREFIX)[1]), 1)
+        self.assertIsNone(self.cache.lookup('https://mirror.example.com/a.tar.gz'))
+
+    def test_consumed_references(self):
+        """
+        Test that references deleted by their import no longer count as live.
+        """
+        name = self.store('https://example.com/a.tar.gz', b'abcd')
+        archive = self.cache._index()[hashlib.sha256(b'abcd').hexdigest()]  # pylint: disable=protected-access
+        self.assertEqual(self.cache.live_references(archive), [name])
+
+        self.storage.delete(name)
+
+        self.assertEqual(self.cache.live_references(archive), [])
+
+    def test_evicts_least_recently_used_unreferenced(self):
+        """
+        Test that eviction skips archives with live references and removes the oldest others.
+        """
+        first = self.store('https://example.com/1.tar.gz', b'11111')
+        self.store('https://example.com/2.tar.gz', b'22222')
+        self.storage.delete(first)
+
+        self.store('https://example.com/3.tar.gz', b'33333')
+
+        self.assertIsNone(self.cache.checkout('https://example.com/1.tar.gz', 'course.tar.gz'))
+        self.assertIsNotNone(self.cache.checkout('https://example.com/2.tar.gz', 'course.tar.gz'))
+        self.assertEqual(len(self.storage.listdir(CACHE_PREFIX)[1]), 2)
+
+    def test_pinned_archive_not_evicted(self):
+        """
+        Test that an archive being referenced by another thread is skipped by eviction.
+        """
+        for name in (self.store('https://example.com/1.tar.gz', b'1111'),
+                     self.store('https://example.com/2.tar.gz', b'2222')):
+            self.storage.delete(name)
+        archive = self.cache._pin(hashlib.sha256(b'1111').hexdigest())  # pylint: disable=protected-access
+
+        self.store('https://example.com/3.tar.gz', b'3333')
+        self.cache._unpin(archive)  # pylint: disable=protected-access
+
+        self.assertIsNotNone(self.cache.checkout('https://example.com/1.tar.gz', 'course.tar.gz'))
+        self.assertIsNone(self.cache.checkout('https://example.com/2.tar.gz', 'course.tar.gz'))
+
+    def test_missing_body_is_forgotten(self):
+        """
+        Test that an archive removed from storage is not handed out.
+        """
+        self.store('https://example.com/a.tar.gz', b'abcd')
+        self.storage.delete(CACHE_PREFIX + hashlib.sha256(b'abcd').hexdigest())
+
+        self.assertIsNone(self.cache.checkout('https://example.com/a.tar.gz', 'course.tar.gz'))
+        self.assertIsNone(self.cache.lookup('https://example.com/a.tar.gz'))
+
+    def test_index_rebuilt_from_storage(self):
+        """
+        Test that a new cache finds the archives and URLs stored by an earlier one.
+        """
+        self.store('https://example.com/a.tar.gz', b'abcd')
+
+        cache = ArchiveCache(self.storage, max_bytes=10)
+
+        digest = hashlib.sha256(b'abcd').hexdigest()
+        self.assertEqual(list(cache._index()), [digest])  # pylint: disable=protected-access
+        self.assertEqual(cache.lookup('https://example.com/a.tar.gz'), '"v1"')
+        self.assertEqual(self.read(cache.checkout('https://example.com/a.tar.gz', 'course.tar.gz')), b'abcd')
+
+    def test_archive_stored_by_another_process(self):
+        """
+        Test that a cache whose index is already built still finds an archive another process stored later.
+        """
+        cache = ArchiveCache(self.storage, max_bytes=10)
+        self.assertEqual(cache._index(), {})  # pylint: disable=protected-access
+
+        self.store('https://example.com/a.tar.gz', b'abcd')
+
+        self.assertEqual(cache.lookup('https://example.com/a.tar.gz'), '"v1"')
+        self.assertIsNotNone(cache.checkout('https://example.com/a.tar.gz', 'course.tar.gz'))
+
+    def test_forgotten_url_record_is_deleted(self):
+        """
+        Test that the URL record of an archive that is gone is removed for every process.
+        """
+        self.store('https://example.com/a.tar.gz', b'abcd')
+        self.storage.delete(CACHE_PREFIX + hashlib.sha256(b'abcd').hexdigest())
+
+        self.assertIsNone(self.cache.checkout('https://example.com/a.tar.gz', 'course.tar.gz'))
+        self.assertIsNone(ArchiveCache(self.storage, max_bytes=10).lookup('https://example.com/a.tar.gz'))
+
+    def test_upload_does_not_block_checkouts(self):
+        """
+        Test that other threads check out cached archives while an upload is in progress.
+        """
+        self.cache = ArchiveCache(self.storage, max_bytes=100)
+        self.store('https://example.com/a.tar.gz', b'abcd')
+        uploading, release = threading.Event(), threading.Event()
+        save = self.storage.save
+
+        def slow_save(name, content, **kwargs):
+            uploading.set()
+            release.wait(5)
+            return save(name, content, **kwargs)
+
+        with patch.object(self.storage, 'save', side_effect=slow_save):
+            upload = threading.Thread(target=self.store, args=('https://example.com/b.tar.gz', b'efgh'))
+            upload.start()
+            self.assertTrue(uploading.wait(5))
+            checkouts = []
+            checkout = threading.Thread(target=lambda: checkouts.append(
+                self.cache.checkout('https://example.com/a.tar.gz', 'course.tar.gz')
+            ))
+            checkout.start()
+            checkout.join(1)
+            checked_out = list(checkouts)
+            release.set()
+            checkout.join(5)
+            upload.join(5)
+
+        self.assertEqual(len(checked_out), 1)
+        self.assertEqual(self.read(checked_out[0]), b'abcd')
+
+    def test_disabled_by_default(self):
+        """
+        Test that the cache is off without COURSE_IMPORT_ARCHIVE_CACHE_MAX_BYTES.
+        """
+        cache = ArchiveCache(self.storage)
+
+        self.assertFalse(cache.enabled)
+        self.assertIsNone(cache.lookup('https://example.com/a.tar.gz'))
+
+
+class FakeBucket:
+    """
+    The part of a boto3 Bucket resource used for server-side copies, backed by a dict of objects.
+    """
+    name = 'imports'
+
+    def __init__(self, objects):
+        self.objects = objects
+        self.copies = []
+
+    def Object(self, key):  # pylint: disable=invalid-name
+        bucket = self
+
+        class FakeObject:
+            def copy_from(self, CopySource):  # pylint: disable=invalid-name
+                bucket.copies.append((CopySource['Key'], key))
+                bucket.objects[key] = bucket.objects[CopySource['Key']]
+
+        return FakeObject()
+
+
+class BucketStorage(Storage):
+    """
+    An in-memory storage without local paths that copies objects on the server, like django-storages' S3Storage.
+    """
+
+    def __init__(self):
+        self.objects = {}
+        self.bucket = FakeBucket(self.objects)
+
+    def _normalize_name(self, name):
+        return name
+
+    def _open(self, name, mode='rb'):
+        return ContentFile(self.objects[name], name=name)
+
+    def _save(self, name, content):
+        self.objects[name] = b''.join(content.chunks())
+        return name
+
+    def exists(self, name):
+        return name in self.objects
+
+    def size(self, name):
+        return len(self.objects[name])
+
+    def delete(self, name):
+        self.objects.pop(name, None)
+
+    def listdir(self, path):
+        names = [name[len(path):] for name in self.objects if name.startswith(path)]
+        directories = sorted({name.split('/')[0] for name in names if '/' in name})
+        return directories, [name for name in names if '/' not in name]
+
+
+class TestArchiveCacheObjectStorage(TestCase):
+    """
+    Test cases for ArchiveCache on a storage without local paths.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.storage = BucketStorage()
+        self.cache = ArchiveCache(self.storage, max_bytes=10)
+
+    def test_references_are_server_side_copies(self):
+        """
+        Test that import references are copied within the bucket, never read back or uploaded again.
+        """
+        blob = CACHE_PREFIX + hashlib.sha256(b'abcd').hexdigest()
+        with patch.object(self.storage, 'save', wraps=self.storage.save) as mock_save, \
+                patch.object(self.storage, '_open', wraps=self.storage._open) as mock_open:
+            with SpooledArchive('course.tar.gz', self.root) as archive:
+                archive.write(b'abcd')
+                first = self.cache.store('https://example.com/a.tar.gz', '"v1"', archive, 'course.tar.gz')
+            second = self.cache.checkout('https://example.com/a.tar.gz', 'course.tar.gz')
+
+        self.assertEqual([call.args[0] for call in mock_save.call_args_list if call.args[0] == blob], [blob])
+        self.assertFalse(any(call.args[0] == blob for call in mock_open.call_args_list))
+        self.assertEqual(self.storage.bucket.copies, [(blob, first), (blob, second)])
+        self.assertEqual(self.storage.objects[second], b'abcd')
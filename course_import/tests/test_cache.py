@@ -0,0 +1,66 @@
+"""
+Tests for the in-process catalog cache.
+"""
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+
+from course_import.cache import CatalogCache, catalog_cache_key
+
+
+class TestCatalogCache(TestCase):
+    """
+    Test cases for CatalogCache expiry, revalidation headers and eviction.
+    """
+
+    def test_cache_key_includes_headers(self):
+        """
+        Test that the same URL with different headers maps to different keys.
+        """
+        self.assertEqual(catalog_cache_key("https://a.json"), catalog_cache_key("https://a.json", {}))
+        self.assertNotEqual(
+            catalog_cache_key("https://a.json"),
+            catalog_cache_key("https://a.json", {'Authorization': 'Bearer 123'}),
+        )
+
+    @patch('course_import.cache.time.monotonic')
+    def test_entry_expires_after_ttl(self, mock_monotonic):
+        """
+        Test that entries are fresh until their TTL elapses and can be touched.
+        """
+        cache = CatalogCache(max_entries=2)
+        mock_monotonic.return_value = 100.0
+        cache.set('key', ['a'], etag='"v1"', ttl=10)
+        self.assertTrue(cache.get('key').is_fresh())
+
+        mock_monotonic.return_value = 111.0
+        entry = cache.get('key')
+        self.assertFalse(entry.is_fresh())
+        self.assertEqual(entry.conditional_headers(), {'If-None-Match': '"v1"'})
+
+        cache.touch('key', ttl=10)
+        self.assertTrue(cache.get('key').is_fresh())
+
+    def test_least_recently_used_entry_is_evicted(self):
+        """
+        Test that the cache never grows beyond max_entries.
+        """
+        cache = CatalogCache(max_entries=2)
+        cache.set('a', [1])
+        cache.set('b', [2])
+        cache.get('a')
+        cache.set('c', [3])
+
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('a'))
+
+    @override_settings(COURSE_IMPORT_CATALOG_CACHE_MAX_ENTRIES=1)
+    def test_max_entries_from_settings(self):
+        """
+        Test that the size bound is read from Django settings when not given explicitly.
+        """
+        cache = CatalogCache()
+        cache.set('a', [1])
+        cache.set('b', [2])
+        self.assertEqual(len(cache), 1)
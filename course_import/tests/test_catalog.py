@@ -0,0 +1,150 @@
+"""
+Tests for the indexed template catalog.
+"""
+import json
+from unittest.mock import Mock, patch
+
+from django.test import TestCase
+
+from course_import.cache import assembled_catalogs, catalog_cache
+from course_import.catalog import TemplateCatalog, TemplateRecord
+from course_import.filters import CourseTemplateRequested
+
+CATALOG = [
+    {
+        "courses_name": "AI Courses",
+        "zip_url": "https://a.tar.gz",
+        "metadata": {"title": "Introduction to AI", "description": "Neural networks.", "tags": ["ai", "beginner"],
+                     "level": "intro", "active": True},
+    },
+    {
+        "courses_name": "Digital Marketing",
+        "zip_url": "https://b.tar.gz",
+        "metadata": {"title": "Marketing basics", "description": "Intro to SEO.", "tags": ["marketing"],
+                     "level": "intro", "active": True},
+    },
+    {
+        "courses_name": "AI Courses",
+        "zip_url": "https://c.tar.gz",
+        "metadata": {"title": "Advanced AI", "description": "Transformers and neural networks.", "tags": ["ai"],
+                     "level": "advanced", "active": True},
+    },
+]
+
+
+class TestTemplateCatalog(TestCase):
+    """
+    Test cases for TemplateCatalog.search.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.catalog = TemplateCatalog(CATALOG)
+
+    def test_search_without_criteria_pages_everything(self):
+        """
+        Test that offset and limit page through the whole catalog.
+        """
+        page = self.catalog.search(offset=1, limit=1)
+        self.assertEqual(page, {'count': 3, 'results': [CATALOG[1]]})
+
+    def test_search_by_text(self):
+        """
+        Test that every query token must appear in the title or description.
+        """
+        self.assertEqual(self.catalog.search(q="Neural")['results'], [CATALOG[0], CATALOG[2]])
+        self.assertEqual(self.catalog.search(q="neural advanced")['results'], [CATALOG[2]])
+        self.assertEqual(self.catalog.search(q="blockchain"), {'count': 0, 'results': []})
+
+    def test_search_by_fields(self):
+        """
+        Test equality and membership filters on indexed fields.
+        """
+        self.assertEqual(self.catalog.search(filters={'courses_name': 'AI Courses'})['count'], 2)
+        self.assertEqual(self.catalog.search(filters={'metadata.tags': 'marketing'})['results'], [CATALOG[1]])
+        self.assertEqual(
+            self.catalog.search(filters={'tags': 'ai', 'level': ['intro', 'beginner']})['results'],
+            [CATALOG[0]],
+        )
+        self.assertEqual(self.catalog.search(filters={'unknown': 'x'})['count'], 0)
+
+    def test_booleans_do_not_match_numbers(self):
+        """
+        Test that a boolean filter only matches booleans, as the where predicates do.
+        """
+        catalog = TemplateCatalog([
+            {"zip_url": "https://a.tar.gz", "metadata": {"active": True}},
+            {"zip_url": "https://b.tar.gz", "metadata": {"active": 1}},
+        ])
+
+        self.assertEqual(catalog.search(filters={'active': True})['count'], 1)
+        self.assertEqual(catalog.search(filters={'active': 1})['results'], [catalog.entries[1]])
+
+
+class TestCatalogSearchFilter(TestCase):
+    """
+    Test cases for the search kwargs of CourseTemplateRequested.
+    """
+
+    def setUp(self):
+        super().setUp()
+        catalog_cache.clear()
+        assembled_catalogs.clear()
+
+    @patch('course_import.pipeline.session_manager.get')
+    def test_run_filter_search(self, mock_get):
+        """
+        Test that search kwargs return a page instead of the whole catalog.
+        """
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.headers = {}
+        mock_response.content = json.dumps(CATALOG).encode('utf-8')
+        mock_get.return_value = mock_response
+
+        resp = CourseTemplateRequested.run_filter(
+            source_type="github",
+            **{'source_config': "https://search.json", 'q': 'ai', 'limit': 1}
+        )
+        self.assertEqual(resp['result'], {'count': 2, 'results': [CATALOG[0]]})
+
+        resp = CourseTemplateRequested.run_filter(
+            source_type="github",
+            **{'source_config': "https://search.json", 'filters': {'level': 'advanced'}}
+        )
+        self.assertEqual(resp['result'], {'count': 1, 'results': [CATALOG[2]]})
+        self.assertEqual(mock_get.call_count, 1)
+
+    @patch('course_import.pipeline.session_manager.get')
+    def test_run_filter_invalid_search(self, mock_get):
+        """
+        Test that malformed search kwargs are answered with a 400 error instead of raising.
+        """
+        mock_get.return_value = Mock(status_code=200, headers={}, content=json.dumps(CATALOG).encode('utf-8'))
+
+        for search in ({'filters': {'tags': {'x': 1}}}, {'filters': 'tags'}, {'offset': 'abc'}, {'limit': -1},
+                       {'q': ['ai']}):
+            resp = CourseTemplateRequested.run_filter(source_type="github", source_config="https://search.json",
+                                                      **search)
+            self.assertEqual(resp['result']['status'], 400, search)
+            self.assertTrue(resp['result']['error'].startswith('Invalid search: '))
+
+        resp = CourseTemplateRequested.run_filter(source_type="github", source_config="https://search.json",
+                                                  offset='1', limit='1')
+        self.assertEqual(resp['result'], {'count': 3, 'results': [CATALOG[1]]})
+
+    @patch('course_import.pipeline.session_manager.get')
+    def test_merged_catalog_indexed_once(self, mock_get):
+        """
+        Test that searching merged sources builds the indexes once per catalog version.
+        """
+        mock_get.return_value = Mock(status_code=200, headers={}, content=json.dumps(CATALOG).encode('utf-8'))
+        sources = ["https://one.json", "https://two.json"]
+
+        with patch('course_import.catalog.TemplateRecord', wraps=TemplateRecord) as mock_record:
+            first = CourseTemplateRequested.run_filter(source_type="github", source_config=sources, q='ai')
+            second = CourseTemplateRequested.run_filter(source_type="github", source_config=sources, q='neural')
+
+        self.assertEqual(first['result']['count'], 2)
+        self.assertEqual(second['result']['count'], 2)
+        self.assertEqual(mock_record.call_count, len(CATALOG))
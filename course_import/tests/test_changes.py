@@ -0,0 +1,147 @@
+"""
+Tests for catalog change detection and the change feed.
+"""
+import json
+from unittest.mock import Mock, patch
+
+from django.test import TestCase, override_settings
+
+from course_import.cache import catalog_cache
+from course_import.catalog import TemplateCatalog
+from course_import.changes import catalog_changes, catalog_history, diff_catalogs, record_catalog
+from course_import.filters import CourseTemplateRequested
+
+FIRST = {"courses_name": "AI", "zip_url": "https://a.tar.gz", "metadata": {"title": "AI", "active": True}}
+SECOND = {"courses_name": "SEO", "zip_url": "https://b.tar.gz", "metadata": {"title": "SEO", "active": True}}
+THIRD = {"courses_name": "Go", "zip_url": "https://c.tar.gz", "metadata": {"title": "Go", "active": True}}
+
+
+def catalog_response(entries, etag):
+    """
+    Build a mocked catalog response.
+    """
+    response = Mock()
+    response.status_code = 200
+    response.content = json.dumps(entries).encode('utf-8')
+    response.json.return_value = entries
+    response.headers = {'ETag': etag}
+    return response
+
+
+class TestCatalogChanges(TestCase):
+    """
+    Test cases for diffing catalog versions.
+    """
+
+    def setUp(self):
+        super().setUp()
+        catalog_cache.clear()
+        catalog_history.clear()
+
+    def test_diff_catalogs(self):
+        """
+        Test that entries are matched by identity and compared by content hash.
+        """
+        modified = {**SECOND, "metadata": {"title": "SEO 2", "active": True}}
+        old = TemplateCatalog([FIRST, SECOND])
+        new = TemplateCatalog([modified, THIRD])
+
+        self.assertEqual(diff_catalogs(old, new), {'added': [THIRD], 'modified': [modified], 'removed': [FIRST]})
+        self.assertEqual(
+            diff_catalogs(old, TemplateCatalog([SECOND, FIRST])), {'added': [], 'modified': [], 'removed': []}
+        )
+
+    def test_fingerprints_ignore_key_order(self):
+        """
+        Test that reordering keys does not change an entry's fingerprint.
+        """
+        reordered = {"metadata": {"active": True, "title": "AI"}, "zip_url": "https://a.tar.gz", "courses_name": "AI"}
+        self.assertEqual(TemplateCatalog([FIRST]).fingerprints, TemplateCatalog([reordered]).fingerprints)
+
+    def test_unknown_version_resets(self):
+        """
+        Test that a change feed from an unknown version reports every entry as added.
+        """
+        catalog = TemplateCatalog([FIRST, SECOND])
+        version = record_catalog(TemplateCatalog([FIRST]))
+
+        self.assertEqual(catalog_changes(version, catalog)['added'], [SECOND])
+        changes = catalog_changes('unknown', catalog)
+        self.assertTrue(changes['reset'])
+        self.assertEqual(changes['added'], [FIRST, SECOND])
+
+    def test_served_version_stays_in_history(self):
+        """
+        Test that recording a version again renews its expired history entry.
+        """
+        catalog = TemplateCatalog([FIRST])
+        version = record_catalog(catalog)
+        catalog_history.get(version).expires_at = 0.0
+
+        record_catalog(catalog)
+
+        self.assertTrue(catalog_history.get(version).is_fresh())
+        self.assertFalse(catalog_changes(version, TemplateCatalog([FIRST, SECOND]))['reset'])
+
+    def test_current_version_has_no_changes(self):
+        """
+        Test that a consumer already at the current version gets an empty feed, even if it left the history.
+        """
+        catalog = TemplateCatalog([FIRST, SECOND])
+
+        self.assertEqual(catalog_changes(catalog.version, catalog), {
+            'since': catalog.version, 'version': catalog.version, 'reset': False,
+            'added': [], 'modified': [], 'removed': [],
+        })
+
+    @override_settings(COURSE_IMPORT_CATALOG_CACHE_TTL=0)
+    @patch('course_import.pipeline.diff_catalogs')
+    @patch('course_import.pipeline.session_manager.get')
+    def test_refresh_skips_diff_without_prefetch(self, mock_get, mock_diff):
+        """
+        Test that refreshed catalogs are not diffed when thumbnail prefetching is off.
+        """
+        mock_get.side_effect = [catalog_response([FIRST], '"v1"'), catalog_response([SECOND], '"v2"')]
+
+        CourseTemplateRequested.run_filter(source_type="github", source_config="https://edly_courses.json")
+        CourseTemplateRequested.run_filter(source_type="github", source_config="https://edly_courses.json")
+
+        self.assertEqual(mock_get.call_count, 2)
+        mock_diff.assert_not_called()
+
+    @patch('course_import.pipeline.session_manager.get')
+    def test_change_feed_through_run_filter(self, mock_get):
+        """
+        Test that run_filter reports the changes since a version it returned earlier.
+        """
+        mock_get.side_effect = [catalog_response([FIRST, SECOND], '"v1"'), catalog_response([SECOND, THIRD], '"v2"')]
+
+        first = CourseTemplateRequested.run_filter(source_type="github", source_config="https://edly_courses.json")
+        catalog_cache.clear()
+        second = CourseTemplateRequested.run_filter(
+            source_type="github", source_config="https://edly_courses.json", changes_since=first['version'],
+        )
+
+        self.assertNotIn('changes', first)
+        self.assertEqual(second['changes'], {
+            'since': first['version'],
+            'version': second['version'],
+            'reset': False,
+            'added': [THIRD],
+            'modified': [],
+            'removed': [FIRST],
+        })
+
+    @patch('course_import.pipeline.session_manager.get')
+    def test_change_feed_since_must_be_a_string(self, mock_get):
+        """
+        Test that a changes_since which is not a string is answered with a 400 error instead of raising.
+        """
+        mock_get.return_value = catalog_response([FIRST], '"v1"')
+
+        output = CourseTemplateRequested.run_filter(
+            source_type="github", source_config="https://edly_courses.json", changes_since=['v1'],
+        )
+
+        self.assertEqual(output['result'], {"error": "Invalid changes_since: must be a string", "status": 400})
+        self.assertNotIn('changes', output)
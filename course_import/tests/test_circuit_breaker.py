@@ -0,0 +1,126 @@
+"""
+Tests for the per-host circuit breakers.
+"""
+import json
+from unittest.mock import Mock, patch
+
+import requests
+from django.test import TestCase, override_settings
+
+from course_import.cache import catalog_cache
+from course_import.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, circuit_breakers
+from course_import.filters import CourseTemplateRequested
+from course_import.http_client import SessionManager
+
+CATALOG = [{"courses_name": "AI", "zip_url": "https://a.tar.gz", "metadata": {"active": True}}]
+
+
+@override_settings(COURSE_IMPORT_CIRCUIT_FAILURE_THRESHOLD=2, COURSE_IMPORT_CIRCUIT_RESET_TIMEOUT=10)
+class TestCircuitBreaker(TestCase):
+    """
+    Test cases for the closed / open / half-open state machine.
+    """
+
+    def setUp(self):
+        super().setUp()
+        patcher = patch('course_import.circuit_breaker.time.monotonic', return_value=100.0)
+        self.clock = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.breaker = CircuitBreaker('github.com')
+
+    def open_circuit(self):
+        for _ in range(2):
+            self.breaker.before_request()
+            self.breaker.record_failure()
+
+    def test_opens_after_threshold_and_fails_fast(self):
+        self.breaker.before_request()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, OPEN)
+
+        self.clock.return_value = 104.0
+        with self.assertRaises(CircuitOpenError) as context:
+            self.breaker.before_request()
+        self.assertEqual(context.exception.retry_after, 6.0)
+        self.assertEqual(self.breaker.stats()['rejected'], 1)
+
+    def test_success_resets_failure_count(self):
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CLOSED)
+
+    def test_half_open_allows_one_trial(self):
+        """
+        Test that after the cool-down a single trial decides whether the circuit closes.
+        """
+        self.open_circuit()
+        self.clock.return_value = 111.0
+
+        self.breaker.before_request()
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_request()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, OPEN)
+
+        self.clock.return_value = 122.0
+        self.breaker.before_request()
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.assertEqual(self.breaker.stats()['times_opened'], 2)
+
+
+@override_settings(COURSE_IMPORT_CIRCUIT_FAILURE_THRESHOLD=2)
+class TestSessionCircuitBreaking(TestCase):
+    """
+    Test cases for circuit breaking of requests sent through the shared session.
+    """
+
+    def setUp(self):
+        super().setUp()
+        circuit_breakers.clear()
+        catalog_cache.clear()
+        self.manager = SessionManager()
+        self.addCleanup(self.manager.close)
+
+    def test_failures_open_the_host_circuit(self):
+        """
+        Test that connection errors and 5xx responses open only the failing host's circuit.
+        """
+        with patch.object(self.manager.session, 'get') as mock_get:
+            mock_get.side_effect = [requests.ConnectionError("down"), Mock(status_code=503), Mock(status_code=200)]
+            with self.assertRaises(requests.ConnectionError):
+                self.manager.get('https://mirror.example.com/a.json')
+            self.manager.get('https://mirror.example.com/a.json')
+            with self.assertRaises(CircuitOpenError):
+                self.manager.get('https://mirror.example.com/b.json')
+            self.assertEqual(self.manager.get('https://github.com/a.json').status_code, 200)
+
+        self.assertEqual(mock_get.call_count, 3)
+        self.assertEqual(
+            {stats['host']: stats['state'] for stats in circuit_breakers.stats()},
+            {'mirror.example.com': OPEN, 'github.com': CLOSED},
+        )
+
+    @override_settings(COURSE_IMPORT_CATALOG_CACHE_TTL=0)
+    def test_open_circuit_serves_stale_catalog(self):
+        """
+        Test that the templates pipeline falls back to its cached catalog while the circuit is open.
+        """
+        with patch('course_import.pipeline.session_manager', self.manager), \
+                patch.object(self.manager.session, 'get') as mock_get:
+            mock_get.return_value = Mock(status_code=200, content=json.dumps(CATALOG).encode('utf-8'), headers={})
+            CourseTemplateRequested.run_filter(source_type="github", source_config="https://mirror.example.com/c.json")
+            for _ in range(2):
+                circuit_breakers.for_url('https://mirror.example.com/').record_failure()
+
+            resp = CourseTemplateRequested.run_filter(
+                source_type="github", source_config="https://mirror.example.com/c.json"
+            )
+
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(resp['result'], CATALOG)
+        self.assertTrue(resp['stale'])
@@ -0,0 +1,65 @@
+"""
+Tests for the pluggable JSON codec.
+"""
+import json
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, override_settings
+
+from course_import.codec import CODECS, dumps, get_codec, loads
+from course_import.renderers import CodecJSONRenderer
+
+DOCUMENT = {"courses_name": "AI", "zip_url": "https://a.tar.gz", "metadata": {"title": "Café", "tags": ["ai"]}}
+
+
+class TestJSONCodec(TestCase):
+    """
+    Test cases that every installed backend must pass.
+    """
+
+    def test_round_trip_from_bytes(self):
+        """
+        Test that each backend decodes bytes and memoryviews and emits compact bytes.
+        """
+        encoded = json.dumps(DOCUMENT).encode('utf-8')
+        for name, codec in CODECS.items():
+            with self.subTest(backend=name):
+                self.assertEqual(codec.loads(encoded), DOCUMENT)
+                self.assertEqual(codec.loads(memoryview(encoded)), DOCUMENT)
+                self.assertIsInstance(codec.dumps(DOCUMENT), bytes)
+                self.assertEqual(json.loads(codec.dumps(DOCUMENT)), DOCUMENT)
+                self.assertNotIn(b' ', codec.dumps({"a": [1, 2]}))
+
+    def test_sorted_keys_and_fallbacks(self):
+        """
+        Test key sorting, ``str`` encoding of unknown types and very large integers.
+        """
+        for name, codec in CODECS.items():
+            with self.subTest(backend=name):
+                self.assertEqual(codec.dumps({"b": 1, "a": 2}, sort_keys=True), b'{"a":2,"b":1}')
+                self.assertEqual(json.loads(codec.dumps({"when": object}))["when"], str(object))
+                self.assertEqual(json.loads(codec.dumps([2 ** 70])), [2 ** 70])
+
+    def test_invalid_json_raises_value_error(self):
+        for name, codec in CODECS.items():
+            with self.subTest(backend=name):
+                with self.assertRaises(ValueError):
+                    codec.loads(b'[1,')
+
+    def test_backend_setting(self):
+        """
+        Test that ``COURSE_IMPORT_JSON_BACKEND`` pins the backend and unknown backends are rejected.
+        """
+        with override_settings(COURSE_IMPORT_JSON_BACKEND='json'):
+            self.assertEqual(get_codec().name, 'json')
+            self.assertEqual(loads(dumps(DOCUMENT)), DOCUMENT)
+        with override_settings(COURSE_IMPORT_JSON_BACKEND='yaml'):
+            with self.assertRaises(ImproperlyConfigured):
+                get_codec()
+
+    def test_renderer(self):
+        """
+        Test that the DRF renderer encodes with the codec.
+        """
+        self.assertEqual(json.loads(CodecJSONRenderer().render(DOCUMENT)), DOCUMENT)
+        self.assertEqual(CodecJSONRenderer().render(None), b'')
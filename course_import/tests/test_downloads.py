@@ -0,0 +1,401 @@
+"""
+Tests for buffering downloaded archives on their way into storage.
+"""
+import base64
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+from unittest.mock import MagicMock, patch
+
+import requests
+
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+from django.test import TestCase, override_settings
+
+from course_import.archive_cache import ArchiveCache
+from course_import.downloads import PartialDownload, SpooledArchive, expected_digest, segment_count, write_response
+from course_import.views import download_file
+from test_utils.http_server import FixtureHTTPServer
+
+
+class TestSpooledArchive(TestCase):
+    """
+    Test cases for SpooledArchive.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_small_archive_stays_in_memory(self):
+        """
+        Test that an archive under the threshold never touches the disk.
+        """
+        with SpooledArchive('course.tar.gz', self.directory, max_memory_size=10) as archive:
+            archive.write(b'abc')
+            archive.write(b'def')
+            content = archive.as_file()
+
+            self.assertIsNone(archive.path)
+            self.assertFalse(hasattr(content, 'temporary_file_path'))
+            self.assertEqual(content.read(), b'abcdef')
+            self.assertEqual(archive.size, 6)
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_large_archive_spills_to_disk(self):
+        """
+        Test that an archive over the threshold spills to a temporary file, removed on close.
+        """
+        with SpooledArchive('course.tar.gz', self.directory, max_memory_size=4) as archive:
+            archive.write(b'abc')
+            archive.write(b'def')
+            content = archive.as_file()
+
+            self.assertEqual(os.path.dirname(content.temporary_file_path()), self.directory)
+            self.assertEqual(content.read(), b'abcdef')
+        self.assertEqual(os.listdir(self.directory), [])
+
+    @override_settings(COURSE_IMPORT_DOWNLOAD_MAX_MEMORY_SIZE=2)
+    def test_threshold_setting(self):
+        """
+        Test that the threshold defaults to COURSE_IMPORT_DOWNLOAD_MAX_MEMORY_SIZE.
+        """
+        with SpooledArchive('course.tar.gz', self.directory) as archive:
+            archive.write(b'abc')
+            self.assertIsNotNone(archive.path)
+
+
+class TestWriteResponse(TestCase):
+    """
+    Test cases for copying a response body with a reused buffer.
+    """
+
+    def test_readinto_reused_buffer(self):
+        """
+        Test that the raw body is copied in buffer-sized reads.
+        """
+        response = MagicMock(headers={}, raw=io.BytesIO(b'0123456789'))
+        destination = io.BytesIO()
+
+        self.assertEqual(write_response(response, destination, buffer_size=4), 10)
+        self.assertEqual(destination.getvalue(), b'0123456789')
+        response.iter_content.assert_not_called()
+
+    @override_settings(COURSE_IMPORT_DOWNLOAD_BUFFER_SIZE=3)
+    def test_content_encoded_body_is_decoded(self):
+        """
+        Test that a content-encoded body goes through iter_content, which decodes it.
+        """
+        response = MagicMock(headers={'Content-Encoding': 'gzip'})
+        response.iter_content.return_value = [b'abc', b'de']
+        destination = io.BytesIO()
+
+        self.assertEqual(write_response(response, destination), 5)
+        self.assertEqual(destination.getvalue(), b'abcde')
+        response.iter_content.assert_called_once_with(chunk_size=3)
+
+
+class TestDownloadFile(TestCase):
+    """
+    Test cases for downloading an archive into import storage.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.course_dir = tempfile.mkdtemp()
+        self.storage_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.course_dir)
+        self.addCleanup(shutil.rmtree, self.storage_dir)
+        patcher = patch('course_import.views.course_import_export_storage', FileSystemStorage(self.storage_dir))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def download(self, body):
+        response = MagicMock(status_code=200, headers={}, raw=io.BytesIO(body))
+        with patch('course_import.views.session_manager.get', return_value=response):
+            storage_path = download_file('course-v1:edX+Demo+1', 'https://example.com/c.tar.gz', 'c.tar.gz',
+                                         self.course_dir)
+        response.close.assert_called_once_with()
+        with open(os.path.join(self.storage_dir, storage_path), 'rb') as stored:
+            return storage_path, stored.read()
+
+    def test_download_in_memory(self):
+        """
+        Test that a small archive is saved to storage without scratch files.
+        """
+        storage_path, body = self.download(b'abcdef')
+
+        self.assertEqual(storage_path, 'olx_import/c.tar.gz')
+        self.assertEqual(body, b'abcdef')
+        self.assertEqual(os.listdir(self.course_dir), [])
+
+    @override_settings(COURSE_IMPORT_DOWNLOAD_MAX_MEMORY_SIZE=4, COURSE_IMPORT_DOWNLOAD_BUFFER_SIZE=3)
+    def test_spilled_download_is_moved_into_storage(self):
+        """
+        Test that a large archive is moved into file system storage instead of copied.
+        """
+        with patch('django.core.files.storage.filesystem.file_move_safe', wraps=file_move_safe) as mock_move:
+            _storage_path, body = self.download(b'abcdefghi')
+
+        self.assertEqual(body, b'abcdefghi')
+        mock_move.assert_called_once()
+        self.assertEqual(os.listdir(self.course_dir), [])
+
+
+class FixtureServerMixin:
+    """
+    Serve a random archive from a local server and download it into a temporary storage.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.course_dir = tempfile.mkdtemp()
+        self.storage_dir = tempfile.mkdtemp()
+        self.root = tempfile.mkdtemp()
+        for directory in (self.course_dir, self.storage_dir, self.root):
+            self.addCleanup(shutil.rmtree, directory)
+        patcher = patch('course_import.views.course_import_export_storage', FileSystemStorage(self.storage_dir))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.body = os.urandom(300 * 1024)
+        with open(os.path.join(self.root, 'course.tar.gz'), 'wb') as archive:
+            archive.write(self.body)
+        self.server = FixtureHTTPServer(self.root).__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+
+    def download(self):
+        storage_path = download_file('course-v1:edX+Demo+1', self.server.url('course.tar.gz'), 'course.tar.gz',
+                                     self.course_dir)
+        with open(os.path.join(self.storage_dir, storage_path), 'rb') as stored:
+            return stored.read()
+
+
+class TestResumableDownload(FixtureServerMixin, TestCase):
+    """
+    Test cases for resuming broken-off downloads from a local server.
+    """
+
+    def test_resume_within_one_download(self):
+        """
+        Test that a broken-off transfer is resumed with a Range request for the missing bytes.
+        """
+        self.server.truncate.append(100000)
+
+        self.assertEqual(self.download(), self.body)
+        self.assertNotIn('Range', self.server.request_headers[0])
+        self.assertEqual(self.server.request_headers[1]['Range'], 'bytes=100000-')
+        self.assertTrue(self.server.request_headers[1]['If-Range'].startswith('"'))
+        self.assertEqual(os.listdir(self.course_dir), [])
+
+    @override_settings(COURSE_IMPORT_DOWNLOAD_ATTEMPTS=1, COURSE_IMPORT_DOWNLOAD_MAX_MEMORY_SIZE=1024)
+    def test_resume_on_next_download(self):
+        """
+        Test that the bytes of a failed download are kept and resumed by the next one.
+        """
+        self.server.truncate.append(200000)
+        with self.assertRaises(requests.exceptions.ChunkedEncodingError):
+            self.download()
+        self.assertEqual(len(os.listdir(self.course_dir)), 2)
+
+        self.assertEqual(self.download(), self.body)
+        self.assertEqual(self.server.request_headers[1]['Range'], 'bytes=200000-')
+        self.assertEqual(os.listdir(self.course_dir), [])
+
+    @override_settings(COURSE_IMPORT_DOWNLOAD_ATTEMPTS=1)
+    def test_changed_upstream_restarts(self):
+        """
+        Test that kept bytes are dropped when upstream changed since, answering the full body.
+        """
+        self.server.truncate.append(100000)
+        with self.assertRaises(requests.exceptions.ChunkedEncodingError):
+            self.download()
+        self.body = os.urandom(200 * 1024)
+        with open(os.path.join(self.root, 'course.tar.gz'), 'wb') as archive:
+            archive.write(self.body)
+
+        self.assertEqual(self.download(), self.body)
+        self.assertEqual(self.server.request_headers[1]['Range'], 'bytes=100000-')
+        self.assertEqual(os.listdir(self.course_dir), [])
+
+    @override_settings(COURSE_IMPORT_DOWNLOAD_ATTEMPTS=1, COURSE_IMPORT_DOWNLOAD_MAX_MEMORY_SIZE=1024)
+    def test_misaligned_kept_bytes_restart(self):
+        """
+        Test that kept bytes upstream does not continue are dropped and downloaded again in full.
+        """
+        self.server.truncate.append(100000)
+        with self.assertRaises(requests.exceptions.ChunkedEncodingError):
+            self.download()
+
+        with patch('course_import.views.continues_at', return_value=False):
+            self.assertEqual(self.download(), self.body)
+        self.assertEqual(self.server.request_headers[1]['Range'], 'bytes=100000-')
+        self.assertNotIn('Range', self.server.request_headers[2])
+        self.assertEqual(os.listdir(self.course_dir), [])
+
+    def test_unchanged_archive_served_from_cache(self):
+        """
+        Test that a repeat import revalidates the cached archive and neither downloads nor uploads it.
+        """
+        with patch('course_import.views.archive_cache', ArchiveCache(FileSystemStorage(self.storage_dir), 10 ** 6)):
+            self.assertEqual(self.download(), self.body)
+            with patch('django.core.files.storage.FileSystemStorage.save') as mock_save:
+                self.assertEqual(self.download(), self.body)
+
+        mock_save.assert_not_called()
+        self.assertEqual(self.server.request_headers[1]['If-None-Match'],
+                         '"' + hashlib.sha256(self.body).hexdigest() + '"')
+        self.assertEqual(len(self.server.requests), 2)
+
+    @override_settings(COURSE_IMPORT_DOWNLOAD_ATTEMPTS=1)
+    def test_missing_cached_archive_downloaded_again(self):
+        """
+        Test that a 304 for an archive missing from the cache is followed by a full download of its own.
+        """
+        cache = ArchiveCache(FileSystemStorage(self.storage_dir), 10 ** 6)
+        with patch('course_import.views.archive_cache', cache):
+            self.assertEqual(self.download(), self.body)
+            with patch.object(cache, 'checkout', return_value=None):
+                self.assertEqual(self.download(), self.body)
+
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertIn('If-None-Match', self.server.request_headers[1])
+        self.assertNotIn('If-None-Match', self.server.request_headers[2])
+
+    def test_nothing_kept_without_range_support(self):
+        """
+        Test that nothing is kept when upstream does not accept ranges.
+        """
+        partial = PartialDownload(self.course_dir, 'https://example.com/course.tar.gz')
+        archive = SpooledArchive('course.tar.gz', self.course_dir)
+        archive.write(b'abc')
+
+        self.assertFalse(partial.keep(MagicMock(status_code=200, headers={'ETag': '"v1"'}), archive))
+        self.assertFalse(partial.keep(MagicMock(status_code=200, headers={'Accept-Ranges': 'bytes',
+                                                                           'ETag': 'W/"v1"'}), archive))
+        self.assertEqual(partial.resume_headers(), (0, {}))
+        archive.close()
+
+
+@override_settings(COURSE_IMPORT_DOWNLOAD_SEGMENTS=4, COURSE_IMPORT_DOWNLOAD_SEGMENT_MIN_SIZE=1024,
+                   COURSE_IMPORT_DOWNLOAD_BUFFER_SIZE=16 * 1024)
+class TestSegmentedDownload(FixtureServerMixin, TestCase):
+    """
+    Test cases for downloading large archives as concurrent byte ranges.
+    """
+
+    def ranges(self):
+        return sorted(headers['Range'] for headers in self.server.request_headers if 'Range' in headers)
+
+    def test_segmented_download(self):
+        """
+        Test that the archive is assembled from the first response and one ranged request per other segment.
+        """
+        self.assertEqual(self.download(), self.body)
+        self.assertEqual(len(self.server.requests), 4)
+        self.assertEqual(self.ranges(), ['bytes=153600-230399', 'bytes=230400-307199', 'bytes=76800-153599'])
+        etag = '"' + hashlib.sha256(self.body).hexdigest() + '"'
+        self.assertTrue(all(headers['If-Range'] == etag for headers in self.server.request_headers[1:]))
+        self.assertEqual(os.listdir(self.course_dir), [])
+
+    @override_settings(COURSE_IMPORT_DOWNLOAD_SEGMENT_MIN_SIZE=1024 * 1024)
+    def test_small_archive_in_one_stream(self):
+        """
+        Test that an archive under COURSE_IMPORT_DOWNLOAD_SEGMENT_MIN_SIZE is not split.
+        """
+        self.assertEqual(self.download(), self.body)
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_broken_segment_resumed_where_it_stopped(self):
+        """
+        Test that a segment that broke off is requested again from where it stopped.
+        """
+        self.server.truncate.append(50000)
+
+        self.assertEqual(self.download(), self.body)
+        self.assertIn('bytes=50000-76799', self.ranges())
+        self.assertEqual(os.listdir(self.course_dir), [])
+
+    @override_settings(COURSE_IMPORT_DOWNLOAD_ATTEMPTS=1)
+    def test_segment_failure_falls_back_to_one_stream(self):
+        """
+        Test that a segment failing after its retries makes the archive download again in one stream.
+        """
+        self.server.truncate.append(50000)
+
+        self.assertEqual(self.download(), self.body)
+        self.assertNotIn('Range', self.server.request_headers[-1])
+        self.assertEqual(os.listdir(self.course_dir), [])
+
+    @override_settings(COURSE_IMPORT_DOWNLOAD_ATTEMPTS=1)
+    def test_changed_upstream_with_kept_bytes_downloads_in_segments(self):
+        """
+        Test that kept bytes of a changed upstream are dropped and the new archive is downloaded in segments.
+        """
+        self.server.truncate.append(100000)
+        with override_settings(COURSE_IMPORT_DOWNLOAD_SEGMENTS=1):
+            with self.assertRaises(requests.exceptions.ChunkedEncodingError):
+                self.download()
+        self.body = os.urandom(200 * 1024)
+        with open(os.path.join(self.root, 'course.tar.gz'), 'wb') as archive:
+            archive.write(self.body)
+
+        self.assertEqual(self.download(), self.body)
+        self.assertEqual(self.server.request_headers[1]['Range'], 'bytes=100000-')
+        self.assertEqual(len(self.server.requests), 5)
+        self.assertEqual(os.listdir(self.course_dir), [])
+
+    def test_segmented_archive_cached_as_a_whole(self):
+        """
+        Test that an archive assembled from segments is cached and revalidated as a whole.
+        """
+        with patch('course_import.views.archive_cache', ArchiveCache(FileSystemStorage(self.storage_dir), 10 ** 6)):
+            self.assertEqual(self.download(), self.body)
+            self.assertEqual(self.download(), self.body)
+
+        self.assertEqual(len(self.server.requests), 5)
+        self.assertEqual(self.server.request_headers[4]['If-None-Match'],
+                         '"' + hashlib.sha256(self.body).hexdigest() + '"')
+
+    def test_checksum_mismatch_falls_back_to_one_stream(self):
+        """
+        Test that an archive not matching its announced checksum is downloaded again in one stream.
+        """
+        with patch('course_import.downloads.expected_digest', return_value=('sha256', b'wrong')):
+            self.assertEqual(self.download(), self.body)
+
+        self.assertEqual(len(self.server.requests), 5)
+        self.assertNotIn('Range', self.server.request_headers[4])
+
+    def test_segment_count(self):
+        """
+        Test that only ranged, validated, unencoded responses are split.
+        """
+        headers = {'Accept-Ranges': 'bytes', 'ETag': '"v1"', 'Content-Length': '4096'}
+
+        self.assertEqual(segment_count(MagicMock(status_code=200, headers=headers)), 4)
+        self.assertEqual(segment_count(MagicMock(status_code=206, headers=headers)), 1)
+        self.assertEqual(segment_count(MagicMock(status_code=200, headers={**headers, 'Accept-Ranges': 'none'})), 1)
+        self.assertEqual(segment_count(MagicMock(status_code=200, headers={**headers, 'ETag': 'W/"v1"'})), 1)
+        self.assertEqual(segment_count(MagicMock(status_code=200, headers={**headers, 'Content-Encoding': 'gzip'})),
+                         1)
+        self.assertEqual(segment_count(MagicMock(status_code=200, headers={**headers, 'Content-Length': '10'})), 1)
+
+    def test_expected_digest(self):
+        """
+        Test that the checksum is read from Repr-Digest, Digest or Content-MD5.
+        """
+        sha256 = hashlib.sha256(b'abc').digest()
+        md5 = hashlib.md5(b'abc').digest()
+        encoded = base64.b64encode(sha256).decode()
+
+        self.assertEqual(expected_digest(MagicMock(headers={'Repr-Digest': f'sha-256=:{encoded}:'})),
+                         ('sha256', sha256))
+        self.assertEqual(expected_digest(MagicMock(headers={'Digest': f'unixsum=30, SHA-256={encoded}'})),
+                         ('sha256', sha256))
+        self.assertEqual(expected_digest(MagicMock(headers={'Content-MD5': base64.b64encode(md5).decode()})),
+                         ('md5', md5))
+        self.assertIsNone(expected_digest(MagicMock(headers={})))
@@ -1,10 +1,12 @@
 """
 Tests for authoring subdomain filters.
 """
+import json
 from unittest.mock import MagicMock, patch
 
 from django.test import TestCase
 
+from course_import.cache import catalog_cache
 from course_import.filters import CourseTemplateRequested
 
 
@@ -12,6 +14,10 @@ class TestCourseTemplateRequested(TestCase):
     """
     Test pipeline step definition for the hooks execution mechanism.
     """
+    def setUp(self):
+        super().setUp()
+        catalog_cache.clear()
+
     def test_github_template_without_config(self):
         """
         Test successful fetching of templates from GitHub.
@@ -54,10 +60,10 @@ class TestCourseTemplateRequested(TestCase):
             }
         ]
 
-        with patch('requests.get') as mock_get:
+        with patch('course_import.pipeline.session_manager.get') as mock_get:
             mock_response = MagicMock()
             mock_response.status_code = 200
-            mock_response.json.return_value = expected_result
+            mock_response.content = json.dumps(expected_result).encode('utf-8')
             mock_get.return_value = mock_response
 
             resp = CourseTemplateRequested.run_filter(
@@ -0,0 +1,72 @@
+"""
+Tests for the shared HTTP session manager.
+"""
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+
+from course_import.http_client import IDEMPOTENT_METHODS, SessionManager
+
+
+class TestSessionManager(TestCase):
+    """
+    Test cases for session pooling, timeouts and retry configuration.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.manager = SessionManager()
+        self.addCleanup(self.manager.close)
+
+    def test_session_is_reused(self):
+        """
+        Test that the same session is returned for every call in a process.
+        """
+        self.assertIs(self.manager.session, self.manager.session)
+
+    def test_session_is_rebuilt_after_fork(self):
+        """
+        Test that a forked worker does not share its parent's connection pools.
+        """
+        session = self.manager.session
+        with patch('course_import.http_client.os.getpid', return_value=-1):
+            self.assertIsNot(self.manager.session, session)
+
+    @override_settings(
+        COURSE_IMPORT_HTTP_POOL_MAXSIZE=4,
+        COURSE_IMPORT_HTTP_MAX_RETRIES=2,
+        COURSE_IMPORT_HTTP_BACKOFF_MAX=5,
+    )
+    def test_adapter_configuration(self):
+        """
+        Test that pool sizes and retry policy are read from settings.
+        """
+        adapter = self.manager.session.get_adapter('https://raw.githubusercontent.com/')
+        self.assertEqual(adapter._pool_maxsize, 4)  # pylint: disable=protected-access
+        self.assertEqual(adapter.max_retries.total, 2)
+        self.assertEqual(adapter.max_retries.backoff_max, 5)
+        self.assertEqual(adapter.max_retries.allowed_methods, IDEMPOTENT_METHODS)
+
+    @override_settings(COURSE_IMPORT_HTTP_CONNECT_TIMEOUT=1, COURSE_IMPORT_HTTP_READ_TIMEOUT=7)
+    def test_get_applies_default_timeout(self):
+        """
+        Test that separate connect and read timeouts are applied unless overridden.
+        """
+        with patch.object(self.manager.session, 'get') as mock_get:
+            self.manager.get('https://example.com/a.json')
+            self.manager.get('https://example.com/b.json', timeout=2)
+
+        self.assertEqual(mock_get.call_args_list[0].kwargs['timeout'], (1, 7))
+        self.assertEqual(mock_get.call_args_list[1].kwargs['timeout'], 2)
+
+    def test_stats(self):
+        """
+        Test that pool statistics are reported per host.
+        """
+        self.assertEqual(self.manager.stats(), [])
+        adapter = self.manager.session.get_adapter('https://example.com/')
+        adapter.poolmanager.connection_from_url('https://example.com/')
+        stats = self.manager.stats()
+        self.assertEqual(len(stats), 1)
+        self.assertEqual(stats[0]['host'], 'example.com')
+        self.assertEqual(stats[0]['num_requests'], 0)
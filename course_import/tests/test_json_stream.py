@@ -0,0 +1,59 @@
+"""
+Tests for incremental JSON array parsing.
+"""
+import json
+
+from django.test import TestCase
+
+from course_import.json_stream import iter_json_array
+
+
+def split(raw, size):
+    """
+    Split ``raw`` into chunks of ``size`` bytes.
+    """
+    return [raw[i:i + size] for i in range(0, len(raw), size)]
+
+
+class TestIterJsonArray(TestCase):
+    """
+    Test cases for iter_json_array.
+    """
+
+    def test_elements_across_chunk_boundaries(self):
+        """
+        Test that elements are decoded correctly however the document is chunked.
+        """
+        document = [
+            {"courses_name": "AI, \"Courses\"]}", "metadata": {"tags": ["a", "b"], "active": True}},
+            {"courses_name": "Déjà vu \\\\", "metadata": {}},
+            "plain, string",
+            42,
+            None,
+            [1, [2, {}]],
+        ]
+        raw = json.dumps(document, ensure_ascii=False).encode('utf-8')
+
+        for size in (1, 2, 5, 64, len(raw)):
+            self.assertEqual(list(iter_json_array(split(raw, size))), document)
+
+    def test_empty_array(self):
+        """
+        Test that an empty array yields nothing.
+        """
+        self.assertEqual(list(iter_json_array([b' [ ', b' ] '])), [])
+
+    def test_elements_are_yielded_before_document_ends(self):
+        """
+        Test that each element is available as soon as its bytes have arrived.
+        """
+        elements = iter_json_array(iter([b'[{"a": 1},', b'{"b": 2}', b']']))
+        self.assertEqual(next(elements), {"a": 1})
+
+    def test_invalid_documents(self):
+        """
+        Test that non-array and truncated documents raise ValueError.
+        """
+        for raw in (b'{"a": 1}', b'[{"a": 1}', b'', b'[{"a": }]'):
+            with self.assertRaises(ValueError):
+                list(iter_json_array([raw]))
@@ -0,0 +1,92 @@
+"""
+Tests for the directory-of-manifests GitHub source, served by a local HTTP stand-in.
+"""
+import json
+import os
+import shutil
+import tempfile
+
+from django.test import TestCase, override_settings
+
+from course_import.cache import catalog_cache
+from course_import.filters import CourseTemplateRequested
+from course_import.object_store import manifest_cache
+from test_utils.http_server import FixtureHTTPServer
+
+FIXTURES = os.path.join(os.path.dirname(__file__), '..', '..', 'test_utils', 'fixtures', 'templates')
+
+
+class TestManifestDirectorySource(TestCase):
+    """
+    Test cases for reading a GitHub index of per-template manifests.
+    """
+
+    def setUp(self):
+        super().setUp()
+        catalog_cache.clear()
+        manifest_cache.clear()
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        shutil.copytree(FIXTURES, self.root, dirs_exist_ok=True)
+        self.server = FixtureHTTPServer(self.root).__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+
+    def fixture(self, path):
+        with open(os.path.join(self.root, path), encoding='utf-8') as fixture:
+            return json.load(fixture)
+
+    def fetch(self):
+        return CourseTemplateRequested.run_filter(
+            source_type="github", source_config={'index': self.server.url('index.json')}
+        )
+
+    def test_fetch_manifests(self):
+        """
+        Test that active manifests are returned in index order.
+        """
+        resp = self.fetch()
+
+        self.assertEqual(resp['result'], [self.fixture('courses/ai.json'), self.fixture('courses/marketing.json')])
+        self.assertNotIn('invalid', resp)
+        self.assertCountEqual(
+            self.server.requests,
+            ['/index.json', '/courses/ai.json', '/courses/marketing.json', '/courses/draft.json'],
+        )
+
+    @override_settings(COURSE_IMPORT_CATALOG_CACHE_TTL=0)
+    def test_only_changed_manifests_are_fetched(self):
+        """
+        Test that a refresh skips manifests with an unchanged sha and revalidates the others.
+        """
+        self.fetch()
+        ai_course = self.fixture('courses/ai.json')
+        ai_course['metadata']['title'] = 'Introduction to AI, 2nd edition'
+        with open(os.path.join(self.root, 'courses/ai.json'), 'w', encoding='utf-8') as manifest:
+            json.dump(ai_course, manifest)
+        del self.server.requests[:]
+
+        resp = self.fetch()
+
+        self.assertEqual(resp['result'][0], ai_course)
+        self.assertCountEqual(self.server.requests, ['/index.json', '/courses/ai.json', '/courses/draft.json'])
+
+    def test_missing_and_invalid_manifests(self):
+        """
+        Test that a missing or malformed manifest is reported without failing the catalog.
+        """
+        with open(os.path.join(self.root, 'index.json'), 'w', encoding='utf-8') as index:
+            json.dump(['courses/ai.json', 'courses/gone.json', {'path': 'index.json'}, 7], index)
+
+        resp = self.fetch()
+
+        self.assertEqual(resp['result'], [self.fixture('courses/ai.json')])
+        self.assertEqual([diagnostic['index'] for diagnostic in resp['invalid']], [1, 2, 3])
+        self.assertEqual(resp['invalid'][0]['path'], 'courses/gone.json')
+        self.assertIn('fetch failed', resp['invalid'][0]['errors'][0])
+        self.assertEqual(resp['invalid'][1]['errors'], ['expected object, got list'])
+
+    def test_missing_index(self):
+        resp = CourseTemplateRequested.run_filter(
+            source_type="github", source_config={'index': self.server.url('missing.json')}
+        )
+        self.assertEqual(resp['result']['status'], 500)
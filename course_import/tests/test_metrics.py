@@ -0,0 +1,96 @@
+"""
+Tests for phase timing instrumentation.
+"""
+import json
+import socket
+import sys
+from unittest.mock import Mock, patch
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, override_settings
+
+from course_import.cache import catalog_cache
+from course_import.filters import CourseTemplateRequested
+from course_import.metrics import PrometheusSink, StatsdSink, get_sinks, incr, timer
+
+CATALOG = [
+    {"courses_name": "AI", "zip_url": "https://a.tar.gz", "metadata": {"active": True}},
+    {"courses_name": "SEO", "zip_url": "https://b.tar.gz", "metadata": {"active": False}},
+]
+MEMORY_SINK = {'class': 'course_import.metrics.MemorySink'}
+
+
+class TestMetrics(TestCase):
+    """
+    Test cases for timers, counters and sinks.
+    """
+
+    def test_disabled_by_default(self):
+        """
+        Test that without sinks no timer object is created.
+        """
+        self.assertEqual(get_sinks(), ())
+        self.assertIs(timer('a'), timer('b'))
+        incr('catalog.bytes', 10)
+
+    @override_settings(COURSE_IMPORT_METRICS_SINKS=[MEMORY_SINK])
+    def test_memory_sink(self):
+        sink, = get_sinks()
+        self.assertIs(get_sinks()[0], sink)
+        for _ in range(2):
+            with timer('catalog.parse', source_type='github'):
+                pass
+        incr('catalog.bytes', 5)
+        incr('catalog.bytes', 7)
+
+        calls, total, longest = sink.timings[('catalog.parse', (('source_type', 'github'),))]
+        self.assertEqual(calls, 2)
+        self.assertGreaterEqual(total, longest)
+        self.assertEqual(sink.counters[('catalog.bytes', ())], 12)
+
+    @override_settings(COURSE_IMPORT_METRICS_SINKS=[{'class': 'course_import.metrics.Missing'}])
+    def test_invalid_sink(self):
+        with self.assertRaises(ImproperlyConfigured):
+            get_sinks()
+
+    def test_statsd_sink(self):
+        """
+        Test that timings and counters are sent as statsd packets over UDP.
+        """
+        receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.addCleanup(receiver.close)
+        receiver.bind(('127.0.0.1', 0))
+        receiver.settimeout(2)
+        sink = StatsdSink(*receiver.getsockname())
+        self.addCleanup(sink.socket.close)
+
+        sink.timing('catalog.fetch', 0.0125, {})
+        sink.count('catalog.bytes', 42, {'source_type': 'github'})
+
+        self.assertEqual(receiver.recv(1024), b'course_import.catalog.fetch:12.5|ms')
+        self.assertEqual(receiver.recv(1024), b'course_import.catalog.bytes:42|c|#source_type:github')
+
+    def test_prometheus_sink_requires_client(self):
+        with patch.dict(sys.modules, {'prometheus_client': None}):
+            with self.assertRaises(ImproperlyConfigured):
+                PrometheusSink()
+
+    @override_settings(COURSE_IMPORT_METRICS_SINKS=[MEMORY_SINK])
+    @patch('course_import.pipeline.session_manager.get')
+    def test_pipeline_phases(self, mock_get):
+        """
+        Test that each phase of a catalog refresh is timed and bytes and records are counted.
+        """
+        catalog_cache.clear()
+        body = json.dumps(CATALOG).encode('utf-8')
+        mock_get.return_value = Mock(status_code=200, content=body, headers={})
+
+        CourseTemplateRequested.run_filter(source_type="github", source_config="https://edly_courses.json")
+
+        sink, = get_sinks()
+        self.assertLessEqual(
+            {'catalog.run_filter', 'catalog.fetch', 'catalog.transfer', 'catalog.parse', 'catalog.filter'},
+            {name for name, _tags in sink.timings},
+        )
+        self.assertEqual(sink.counters[('catalog.bytes', ())], len(body))
+        self.assertEqual(sink.counters[('catalog.records', ())], 1)
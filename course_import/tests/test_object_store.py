@@ -0,0 +1,161 @@
+"""
+Tests for object store helpers and the S3 templates pipeline step.
+"""
+import json
+import os
+import shutil
+import tempfile
+from unittest.mock import Mock, patch
+
+from django.test import TestCase, override_settings
+
+from course_import.cache import assembled_catalogs, catalog_cache
+from course_import.catalog import TemplateRecord
+from course_import.filters import CourseTemplateRequested
+from course_import import object_store
+from course_import.object_store import (
+    FileSystemObjectStore,
+    get_object_store_client,
+    iter_manifest_objects,
+    manifest_cache,
+)
+
+
+class TestS3TemplatesPipeline(TestCase):
+    """
+    Test cases for fetching templates from a local filesystem object store.
+    """
+
+    def setUp(self):
+        super().setUp()
+        manifest_cache.clear()
+        assembled_catalogs.clear()
+        catalog_cache.clear()
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.source_config = {'bucket': 'templates', 'prefix': 'edly/', 'local_root': self.root}
+
+    def write_manifest(self, key, manifest):
+        """
+        Write a manifest object into the test bucket.
+        """
+        full_path = os.path.join(self.root, 'templates', *key.split('/'))
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, 'w') as manifest_file:
+            json.dump(manifest, manifest_file)
+
+    def test_list_objects_filters_by_prefix(self):
+        """
+        Test that only JSON manifests under the prefix are listed.
+        """
+        self.write_manifest('edly/ai.json', {})
+        self.write_manifest('edly/readme.txt', {})
+        self.write_manifest('other/design.json', {})
+
+        keys = [key for key, _etag in iter_manifest_objects(FileSystemObjectStore(self.root), 'templates', 'edly/')]
+
+        self.assertEqual(keys, ['edly/ai.json'])
+
+    @override_settings(COURSE_IMPORT_CATALOG_CACHE_TTL=0)
+    def test_s3_template_fetch(self):
+        """
+        Test that active manifests are returned and unchanged ones are served from the ETag cache.
+        """
+        ai_course = {"courses_name": "AI Courses", "zip_url": "https://a.tar.gz", "metadata": {"active": True}}
+        draft = {"courses_name": "Draft", "zip_url": "https://b.tar.gz", "metadata": {"active": False}}
+        self.write_manifest('edly/ai.json', ai_course)
+        self.write_manifest('edly/draft.json', draft)
+
+        with patch.object(FileSystemObjectStore, 'get_object', autospec=True,
+                          side_effect=FileSystemObjectStore.get_object) as mock_get_object:
+            resp = CourseTemplateRequested.run_filter(source_type="s3", **{'source_config': self.source_config})
+            self.assertEqual(resp['result'], [ai_course])
+            self.assertEqual(mock_get_object.call_count, 2)
+
+            draft['metadata']['active'] = True
+            draft['courses_name'] = "Published draft"
+            self.write_manifest('edly/draft.json', draft)
+            os.utime(os.path.join(self.root, 'templates', 'edly', 'draft.json'), ns=(1, 1))
+
+            resp = CourseTemplateRequested.run_filter(source_type="s3", **{'source_config': self.source_config})
+            self.assertEqual(resp['result'], [ai_course, draft])
+            self.assertEqual(mock_get_object.call_count, 3)
+
+    def test_s3_search_indexed_once(self):
+        """
+        Test that searching an unchanged listing reuses its catalog and search indexes.
+        """
+        ai_course = {"courses_name": "AI Courses", "zip_url": "https://a.tar.gz",
+                     "metadata": {"title": "Intro to AI", "active": True}}
+        self.write_manifest('edly/ai.json', ai_course)
+
+        with patch('course_import.catalog.TemplateRecord', wraps=TemplateRecord) as mock_record:
+            for _ in range(2):
+                resp = CourseTemplateRequested.run_filter(source_type="s3", source_config=self.source_config, q='ai')
+                self.assertEqual(resp['result'], {'count': 1, 'results': [ai_course]})
+
+        self.assertEqual(mock_record.call_count, 1)
+
+    def test_s3_listing_cached(self):
+        """
+        Test that the bucket is listed again only once the cached catalog expires.
+        """
+        self.write_manifest('edly/ai.json', {"courses_name": "AI", "zip_url": "https://a.tar.gz",
+                                             "metadata": {"active": True}})
+
+        with patch.object(FileSystemObjectStore, 'list_objects_v2', autospec=True,
+                          side_effect=FileSystemObjectStore.list_objects_v2) as mock_list:
+            for _ in range(2):
+                resp = CourseTemplateRequested.run_filter(source_type="s3", source_config=self.source_config)
+                self.assertEqual(len(resp['result']), 1)
+            self.assertEqual(mock_list.call_count, 1)
+
+            with override_settings(COURSE_IMPORT_CATALOG_CACHE_TTL=0):
+                for _ in range(2):
+                    CourseTemplateRequested.run_filter(source_type="s3", source_config=self.source_config,
+                                                       where={"active": True, "zip_url": "https://a.tar.gz"})
+            self.assertEqual(mock_list.call_count, 3)
+
+    def test_s3_client_reused(self):
+        """
+        Test that one boto3 client is created per endpoint and region.
+        """
+        boto3 = Mock()
+        boto3.client.side_effect = lambda *args, **kwargs: Mock()
+        config = {'bucket': 'templates', 'endpoint_url': 'https://s3.example.com', 'region_name': 'us-east-1'}
+
+        with patch.dict('sys.modules', {'boto3': boto3}), patch.dict(object_store._s3_clients, clear=True):
+            first = get_object_store_client(config)
+            self.assertIs(get_object_store_client(dict(config)), first)
+            self.assertIsNot(get_object_store_client({**config, 'region_name': 'eu-west-1'}), first)
+
+        self.assertEqual(boto3.client.call_count, 2)
+
+    def test_s3_template_without_config(self):
+        """
+        Test that an error is returned if no bucket is configured.
+        """
+        resp = CourseTemplateRequested.run_filter(source_type="s3", **{'source_config': {}})
+        self.assertEqual(resp['result'], {"error": "Source config not provided", "status": 400})
+
+    def test_s3_template_missing_bucket_directory(self):
+        """
+        Test that an empty listing returns no templates.
+        """
+        resp = CourseTemplateRequested.run_filter(source_type="s3", **{'source_config': self.source_config})
+        self.assertEqual(resp['result'], [])
+
+    def test_s3_invalid_manifest(self):
+        """
+        Test that an invalid manifest is left out and reported by its object key.
+        """
+        ai_course = {"courses_name": "AI Courses", "zip_url": "https://a.tar.gz", "metadata": {"active": True}}
+        self.write_manifest('edly/ai.json', ai_course)
+        self.write_manifest('edly/broken.json', ["not", "a", "manifest"])
+
+        resp = CourseTemplateRequested.run_filter(source_type="s3", **{'source_config': self.source_config})
+
+        self.assertEqual(resp['result'], [ai_course])
+        self.assertEqual(
+            resp['invalid'], [{"index": 1, "errors": ["expected object, got list"], "key": "edly/broken.json"}]
+        )
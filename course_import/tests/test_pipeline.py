@@ -4,7 +4,8 @@ Tests for pipeline and filter.
 import json
 from unittest.mock import Mock, patch
 
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from course_import.cache import catalog_cache
 from course_import.filters import CourseTemplateRequested
 
 
@@ -14,6 +15,10 @@ class TestPipelineStepDefinition(TestCase):
     These tests cover scenarios for fetching course templates from GitHub.
     """
 
+    def setUp(self):
+        super().setUp()
+        catalog_cache.clear()
+
     def test_github_template_no_url(self):
         """
         Test that an error is returned if no source URL is provided.
@@ -26,7 +31,7 @@ class TestPipelineStepDefinition(TestCase):
 
         self.assertEqual(resp['result'], expected_result)
 
-    @patch('course_import.pipeline.requests.get')
+    @patch('course_import.pipeline.session_manager.get')
     def test_github_template_fetch(self, mock_get):
         """
         Test successful fetching of templates from GitHub.
@@ -73,7 +78,7 @@ class TestPipelineStepDefinition(TestCase):
         # Assert the expected result
         self.assertEqual(resp['result'], parsed_json)
 
-    @patch('course_import.pipeline.requests.get')
+    @patch('course_import.pipeline.session_manager.get')
     def test_github_template_fetch_empty_data(self, mock_get):
         """
         Test that an empty JSON response from GitHub is handled correctly.
@@ -93,7 +98,7 @@ class TestPipelineStepDefinition(TestCase):
 
         self.assertEqual(resp['result']['error'], "Response content is empty")
 
-    @patch('course_import.pipeline.requests.get')
+    @patch('course_import.pipeline.session_manager.get')
     def test_github_template_fetch_invalid_url(self, mock_get):
         """
         Test that an error is returned when the GitHub API responds with a non-200 status code.
@@ -119,7 +124,7 @@ class TestPipelineStepDefinition(TestCase):
             "Failed to fetch from URL. Status code: 404"
         )
 
-    @patch('course_import.pipeline.requests.get')
+    @patch('course_import.pipeline.session_manager.get')
     def test_github_template_fetch_inactive_templates(self, mock_get):
         """
         Test filtering of inactive templates from GitHub.
@@ -167,3 +172,232 @@ class TestPipelineStepDefinition(TestCase):
         # Assert the expected result
         self.assertEqual(resp['result'][0], parsed_json[1])
         self.assertEqual(len(resp['result']), 1)
+
+    @patch('course_import.pipeline.session_manager.get')
+    def test_github_template_fetch_served_from_cache(self, mock_get):
+        """
+        Test that a fresh cached catalog is returned without another request.
+        """
+        catalog = [{"courses_name": "AI Courses", "zip_url": "https://a.tar.gz", "metadata": {"active": True}}]
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.content = json.dumps(catalog).encode('utf-8')
+        mock_response.json.return_value = catalog
+        mock_response.headers = {'ETag': '"v1"'}
+        mock_get.return_value = mock_response
+
+        first = CourseTemplateRequested.run_filter(source_type="github", **{'source_config': "https://cached.json"})
+        second = CourseTemplateRequested.run_filter(source_type="github", **{'source_config': "https://cached.json"})
+
+        self.assertEqual(first['result'], catalog)
+        self.assertEqual(second['result'], catalog)
+        self.assertEqual(mock_get.call_count, 1)
+
+    @override_settings(COURSE_IMPORT_CATALOG_CACHE_TTL=0)
+    @patch('course_import.pipeline.session_manager.get')
+    def test_github_template_fetch_revalidates_with_etag(self, mock_get):
+        """
+        Test that an expired catalog is revalidated and reused on 304 Not Modified.
+        """
+        catalog = [{"courses_name": "AI Courses", "zip_url": "https://a.tar.gz", "metadata": {"active": True}}]
+        ok_response = Mock()
+        ok_response.status_code = 200
+        ok_response.content = json.dumps(catalog).encode('utf-8')
+        ok_response.json.return_value = catalog
+        ok_response.headers = {'ETag': '"v1"', 'Last-Modified': 'Wed, 01 Jan 2025 00:00:00 GMT'}
+        not_modified = Mock()
+        not_modified.status_code = 304
+        mock_get.side_effect = [ok_response, not_modified]
+
+        CourseTemplateRequested.run_filter(source_type="github", **{'source_config': "https://etag.json"})
+        resp = CourseTemplateRequested.run_filter(source_type="github", **{'source_config': "https://etag.json"})
+
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertEqual(resp['result'], catalog)
+        self.assertEqual(mock_get.call_args.kwargs['headers'], {
+            'If-None-Match': '"v1"',
+            'If-Modified-Since': 'Wed, 01 Jan 2025 00:00:00 GMT',
+        })
+        not_modified.close.assert_called_once()
+
+    @patch('course_import.pipeline.session_manager.get')
+    def test_github_template_fetch_without_headers(self, mock_get):
+        """
+        Test that headers=None is accepted as no extra request headers.
+        """
+        catalog = [{"courses_name": "AI Courses", "zip_url": "https://a.tar.gz", "metadata": {"active": True}}]
+        mock_get.return_value = Mock(status_code=200, headers={}, content=json.dumps(catalog).encode('utf-8'))
+
+        resp = CourseTemplateRequested.run_filter(
+            source_type="github", source_config="https://no-headers.json", headers=None,
+        )
+
+        self.assertEqual(resp['result'], catalog)
+        self.assertEqual(mock_get.call_args.kwargs['headers'], {})
+
+    @override_settings(COURSE_IMPORT_CATALOG_STREAMING=True)
+    @patch('course_import.pipeline.session_manager.get')
+    def test_github_template_fetch_streaming_error_closes_response(self, mock_get):
+        """
+        Test that a streamed response with an error status releases its connection.
+        """
+        mock_get.return_value = Mock(status_code=404)
+
+        resp = CourseTemplateRequested.run_filter(source_type="github", **{'source_config': "https://gone.json"})
+
+        self.assertEqual(resp['result'], {"error": "Failed to fetch from URL. Status code: 404"})
+        mock_get.return_value.close.assert_called_once()
+
+    @patch('course_import.pipeline.session_manager.get')
+    def test_github_template_fetch_streaming(self, mock_get):
+        """
+        Test that a streamed catalog is parsed incrementally and filtered per entry.
+        """
+        catalog = [
+            {"courses_name": "AI Courses", "zip_url": "https://a.tar.gz", "metadata": {"active": False}},
+            {"courses_name": "Digital Marketing", "zip_url": "https://b.tar.gz", "metadata": {"active": True}},
+        ]
+        raw = json.dumps(catalog).encode('utf-8')
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.headers = {}
+        mock_response.iter_content.return_value = iter([raw[i:i + 7] for i in range(0, len(raw), 7)])
+        mock_get.return_value = mock_response
+
+        resp = CourseTemplateRequested.run_filter(
+            source_type="github",
+            **{'source_config': "https://stream.json", 'stream': True}
+        )
+
+        self.assertEqual(resp['result'], [catalog[1]])
+        self.assertTrue(mock_get.call_args.kwargs['stream'])
+        mock_response.json.assert_not_called()
+        mock_response.close.assert_called_once()
+
+    @override_settings(COURSE_IMPORT_CATALOG_STREAMING=True)
+    @patch('course_import.pipeline.session_manager.get')
+    def test_github_template_fetch_streaming_empty(self, mock_get):
+        """
+        Test that an empty streamed response is reported as empty content.
+        """
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.iter_content.return_value = iter([b'  ', b'\n'])
+        mock_get.return_value = mock_response
+
+        resp = CourseTemplateRequested.run_filter(
+            source_type="github",
+            **{'source_config': "https://stream-empty.json"}
+        )
+
+        self.assertEqual(resp['result'], {"error": "Response content is empty", "status": 204})
+
+    @patch('course_import.pipeline.session_manager.get')
+    def test_github_template_fetch_multiple_sources(self, mock_get):
+        """
+        Test that several sources are merged, de-duplicated by zip_url and report their own errors.
+        """
+        catalogs = {
+            "https://one.json": [
+                {"courses_name": "AI Courses", "zip_url": "https://a.tar.gz", "metadata": {"active": True}},
+                {"courses_name": "Marketing", "zip_url": "https://b.tar.gz", "metadata": {"active": True}},
+            ],
+            "https://two.json": [
+                {"courses_name": "Marketing copy", "zip_url": "https://b.tar.gz", "metadata": {"active": True}},
+                {"courses_name": "Design", "zip_url": "https://c.tar.gz", "metadata": {"active": True}},
+            ],
+        }
+
+        def fake_get(url, headers=None, **kwargs):  # pylint: disable=unused-argument
+            response = Mock()
+            if url not in catalogs:
+                response.status_code = 404
+                return response
+            response.status_code = 200
+            response.headers = {}
+            response.content = json.dumps(catalogs[url]).encode('utf-8')
+            response.json.return_value = catalogs[url]
+            return response
+
+        mock_get.side_effect = fake_get
+
+        resp = CourseTemplateRequested.run_filter(
+            source_type="github",
+            **{'source_config': [
+                "https://one.json",
+                {"url": "https://missing.json", "headers": {"Authorization": "Bearer 123"}},
+                "https://two.json",
+            ]}
+        )
+
+        self.assertEqual(
+            [course['zip_url'] for course in resp['result']],
+            ["https://a.tar.gz", "https://b.tar.gz", "https://c.tar.gz"],
+        )
+        self.assertEqual(resp['result'][1]['courses_name'], "Marketing")
+        self.assertEqual(resp['errors'], [
+            {"source": "https://missing.json", "error": "Failed to fetch from URL. Status code: 404"},
+        ])
+
+    @override_settings(COURSE_IMPORT_CATALOG_CACHE_TTL=0)
+    @patch('course_import.pipeline.session_manager.get')
+    def test_github_template_fetch_serves_stale_on_error(self, mock_get):
+        """
+        Test that the last good catalog is served, marked stale, when upstream fails.
+        """
+        catalog = [{"courses_name": "AI Courses", "zip_url": "https://a.tar.gz", "metadata": {"active": True}}]
+        ok_response = Mock()
+        ok_response.status_code = 200
+        ok_response.content = json.dumps(catalog).encode('utf-8')
+        ok_response.json.return_value = catalog
+        ok_response.headers = {}
+        mock_get.side_effect = [ok_response, Exception("Connection reset")]
+
+        first = CourseTemplateRequested.run_filter(source_type="github", **{'source_config': "https://stale.json"})
+        second = CourseTemplateRequested.run_filter(source_type="github", **{'source_config': "https://stale.json"})
+
+        self.assertFalse(first['stale'])
+        self.assertEqual(second['result'], catalog)
+        self.assertTrue(second['stale'])
+
+    @override_settings(COURSE_IMPORT_CATALOG_CACHE_TTL=0, COURSE_IMPORT_CATALOG_STALE_WHILE_REVALIDATE=True)
+    @patch('course_import.pipeline.threading.Thread')
+    @patch('course_import.pipeline.session_manager.get')
+    def test_github_template_fetch_stale_while_revalidate(self, mock_get, mock_thread):
+        """
+        Test that an expired catalog is served immediately and refreshed once in the background.
+        """
+        old_catalog = [{"courses_name": "Old", "zip_url": "https://a.tar.gz", "metadata": {"active": True}}]
+        new_catalog = [{"courses_name": "New", "zip_url": "https://b.tar.gz", "metadata": {"active": True}}]
+        responses = []
+        for catalog in (old_catalog, new_catalog):
+            response = Mock()
+            response.status_code = 200
+            response.content = json.dumps(catalog).encode('utf-8')
+            response.json.return_value = catalog
+            response.headers = {}
+            responses.append(response)
+        mock_get.side_effect = responses
+
+        CourseTemplateRequested.run_filter(source_type="github", **{'source_config': "https://swr.json"})
+        stale = CourseTemplateRequested.run_filter(source_type="github", **{'source_config': "https://swr.json"})
+        again = CourseTemplateRequested.run_filter(source_type="github", **{'source_config': "https://swr.json"})
+
+        self.assertEqual(stale['result'], old_catalog)
+        self.assertTrue(stale['stale'])
+        self.assertTrue(again['stale'])
+        self.assertEqual(mock_thread.call_count, 1)  # only one refresh in flight per source
+        self.assertEqual(mock_get.call_count, 1)
+
+        refresh = mock_thread.call_args.kwargs
+        refresh['target'](*refresh['args'])
+
+        self.assertEqual(mock_get.call_count, 2)
+        mock_get.side_effect = [Mock(status_code=304)]
+        resp = CourseTemplateRequested.run_filter(
+            source_type="github",
+            **{'source_config': "https://swr.json", 'stale_while_revalidate': False}
+        )
+        self.assertEqual(mock_thread.call_count, 1)
+        self.assertEqual(resp['result'], new_catalog)
+        self.assertFalse(resp['stale'])
@@ -0,0 +1,128 @@
+"""
+Tests for compiled metadata predicates.
+"""
+import json
+from unittest.mock import Mock, patch
+
+from django.test import TestCase, override_settings
+
+from course_import.cache import catalog_cache
+from course_import.filters import CourseTemplateRequested
+from course_import.predicates import compile_predicate
+
+ENTRY = {
+    "courses_name": "AI Courses",
+    "metadata": {"active": True, "level": "intro", "tags": ["ai", "beginner"], "hours": 6, "extra": {"lang": "en"}},
+}
+
+
+class TestCompilePredicate(TestCase):
+    """
+    Test cases for the predicate language.
+    """
+
+    def assertMatches(self, expression, expected, entry=ENTRY):  # pylint: disable=invalid-name
+        self.assertIs(compile_predicate(expression)(entry), expected, expression)
+
+    def test_default_predicate_matches_active_only(self):
+        """
+        Test that the default predicate keeps today's `active is True` semantics.
+        """
+        self.assertMatches(None, True)
+        self.assertMatches(None, False, {"metadata": {"active": 1}})
+        self.assertMatches(None, False, {"metadata": {}})
+        self.assertMatches(None, False, {"courses_name": "no metadata"})
+
+    def test_operators(self):
+        """
+        Test equality, membership, range and presence operators.
+        """
+        self.assertMatches({"level": "intro"}, True)
+        self.assertMatches({"level": {"ne": "intro"}}, False)
+        self.assertMatches({"level": {"in": ["intro", "advanced"]}}, True)
+        self.assertMatches({"level": {"nin": ["intro"]}}, False)
+        self.assertMatches({"tags": {"contains": "ai"}}, True)
+        self.assertMatches({"tags": {"in": ["ai"]}}, False)
+        self.assertMatches({"hours": {"gte": 6, "lt": 10}}, True)
+        self.assertMatches({"hours": {"gt": 6}}, False)
+        self.assertMatches({"level": {"gt": 5}}, False)
+        self.assertMatches({"thumbnail": {"exists": False}}, True)
+        self.assertMatches({"extra.lang": "en"}, True)
+        self.assertMatches({"extra.lang.code": "en"}, False)
+
+    def test_boolean_combinations(self):
+        """
+        Test and/or/not combinations.
+        """
+        self.assertMatches({"or": [{"level": "advanced"}, {"tags": {"contains": "beginner"}}]}, True)
+        self.assertMatches({"and": [{"active": True}, {"not": {"level": "intro"}}]}, False)
+
+    def test_compiled_once(self):
+        """
+        Test that equivalent expressions share one compiled function.
+        """
+        self.assertIs(compile_predicate({"a": 1, "b": 2}), compile_predicate({"b": 2, "a": 1}))
+
+    def test_invalid_expressions(self):
+        """
+        Test that malformed expressions raise ValueError.
+        """
+        for expression in ({}, {"or": []}, {"level": {"like": "x"}}, {"level": {"in": "intro"}}, {"a": [1]}):
+            with self.assertRaises(ValueError):
+                compile_predicate(expression)
+
+
+class TestPredicateFilter(TestCase):
+    """
+    Test cases for passing predicates to CourseTemplateRequested.
+    """
+
+    def setUp(self):
+        super().setUp()
+        catalog_cache.clear()
+        self.catalog = [
+            {"courses_name": "AI", "zip_url": "https://a.tar.gz", "metadata": {"active": True, "level": "intro"}},
+            {"courses_name": "SEO", "zip_url": "https://b.tar.gz", "metadata": {"active": False, "level": "intro"}},
+        ]
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.headers = {}
+        mock_response.content = json.dumps(self.catalog).encode('utf-8')
+        patcher = patch('course_import.pipeline.session_manager.get', return_value=mock_response)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_where_kwarg(self):
+        """
+        Test that the where kwarg replaces the default active filter.
+        """
+        resp = CourseTemplateRequested.run_filter(
+            source_type="github", **{'source_config': "https://where.json", 'where': {"level": "intro"}}
+        )
+        self.assertEqual(resp['result'], self.catalog)
+
+        resp = CourseTemplateRequested.run_filter(source_type="github", **{'source_config': "https://where.json"})
+        self.assertEqual(resp['result'], self.catalog[:1])
+
+    @override_settings(OPEN_EDX_FILTERS_CONFIG={
+        "org.edly.templates.fetch.requested.v1": {
+            "pipeline": ["course_import.pipeline.GithubTemplatesPipeline"],
+            "fail_silently": False,
+            "where": {"active": False},
+        },
+    })
+    def test_where_from_filter_config(self):
+        """
+        Test that a predicate configured in OPEN_EDX_FILTERS_CONFIG is applied.
+        """
+        resp = CourseTemplateRequested.run_filter(source_type="github", **{'source_config': "https://where.json"})
+        self.assertEqual(resp['result'], self.catalog[1:])
+
+    def test_invalid_where(self):
+        """
+        Test that an invalid expression is reported as a 400 error.
+        """
+        resp = CourseTemplateRequested.run_filter(
+            source_type="github", **{'source_config': "https://where.json", 'where': {"level": {"like": "x"}}}
+        )
+        self.assertEqual(resp['result']['status'], 400)
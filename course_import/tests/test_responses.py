@@ -0,0 +1,45 @@
+"""
+Tests for cacheable catalog renditions.
+"""
+from django.test import TestCase
+
+from course_import.responses import CatalogRendition, get_rendition, negotiate_encoding, rendition_cache
+
+
+class TestCatalogRendition(TestCase):
+    """
+    Test cases for content negotiation and ETag matching.
+    """
+
+    def setUp(self):
+        super().setUp()
+        rendition_cache.clear()
+
+    def test_negotiate_encoding(self):
+        """
+        Test that only accepted codings are chosen.
+        """
+        self.assertEqual(negotiate_encoding(None), 'identity')
+        self.assertEqual(negotiate_encoding('gzip, deflate'), 'gzip')
+        self.assertEqual(negotiate_encoding('gzip;q=0, deflate'), 'identity')
+        self.assertIn(negotiate_encoding('*'), ('br', 'gzip'))
+
+    def test_etag_matching(self):
+        """
+        Test that any representation's ETag matches the rendition.
+        """
+        rendition = CatalogRendition(b'[]')
+        self.assertTrue(rendition.matches(rendition.etag_for('gzip')))
+        self.assertTrue(rendition.matches(f'"other", {rendition.etag_for("identity")}'))
+        self.assertTrue(rendition.matches('*'))
+        self.assertFalse(rendition.matches('"other"'))
+        self.assertFalse(rendition.matches(None))
+
+    def test_renditions_are_cached_by_version_and_query(self):
+        """
+        Test that the same catalog version and query reuse one rendition.
+        """
+        first = get_rendition([1], version='v1', query={'q': 'ai'})
+        self.assertIs(get_rendition([1], version='v1', query={'q': 'ai'}), first)
+        self.assertIsNot(get_rendition([1], version='v1'), first)
+        self.assertEqual(get_rendition([1]).etag, first.etag)
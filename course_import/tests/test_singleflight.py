@@ -0,0 +1,133 @@
+"""
+Tests for single-flight request coalescing.
+"""
+import json
+import threading
+import time
+from unittest.mock import Mock, patch
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from course_import.cache import catalog_cache
+from course_import.filters import CourseTemplateRequested
+from course_import.singleflight import SingleFlight, distributed_lock
+
+CATALOG = [{"courses_name": "AI", "zip_url": "https://a.tar.gz", "metadata": {"active": True}}]
+
+
+def run_concurrently(function, count):
+    """
+    Call ``function`` from ``count`` threads released at the same moment and return the results.
+    """
+    barrier = threading.Barrier(count)
+    results = [None] * count
+
+    def worker(position):
+        barrier.wait()
+        results[position] = function()
+
+    threads = [threading.Thread(target=worker, args=(position,)) for position in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class TestSingleFlight(TestCase):
+    """
+    Test cases for SingleFlight.
+    """
+
+    def test_concurrent_calls_share_one_execution(self):
+        flight = SingleFlight()
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            time.sleep(0.2)
+            return 'catalog'
+
+        results = run_concurrently(lambda: flight.do('key', fetch), 5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(shared for _result, shared in results), [False, True, True, True, True])
+        self.assertEqual({result for result, _shared in results}, {'catalog'})
+
+    def test_errors_are_shared_and_not_cached(self):
+        """
+        Test that waiting callers get the leader's exception and the next call runs again.
+        """
+        flight = SingleFlight()
+        with self.assertRaises(ValueError):
+            flight.do('key', Mock(side_effect=ValueError("boom")))
+        self.assertEqual(flight.do('key', lambda: 1), (1, False))
+
+    @patch('course_import.pipeline.session_manager.get')
+    def test_run_filter_coalesces_fetches(self, mock_get):
+        """
+        Test that concurrent run_filter calls for an expired catalog make a single request.
+        """
+        catalog_cache.clear()
+
+        def slow_get(*args, **kwargs):  # pylint: disable=unused-argument
+            time.sleep(0.2)
+            return Mock(status_code=200, content=json.dumps(CATALOG).encode('utf-8'), headers={})
+
+        mock_get.side_effect = slow_get
+
+        results = run_concurrently(
+            lambda: CourseTemplateRequested.run_filter(source_type="github", source_config="https://edly_courses.json"),
+            5,
+        )
+
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual([resp['result'] for resp in results], [CATALOG] * 5)
+
+
+@override_settings(COURSE_IMPORT_CATALOG_LOCK_CACHE='default')
+class TestDistributedLock(TestCase):
+    """
+    Test cases for the Django cache lock.
+    """
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def test_lock_is_exclusive_and_released(self):
+        with distributed_lock('catalog') as acquired:
+            self.assertTrue(acquired)
+            with distributed_lock('catalog', wait=0.1) as acquired_again:
+                self.assertFalse(acquired_again)
+            with distributed_lock('other') as other:
+                self.assertTrue(other)
+        with distributed_lock('catalog') as acquired:
+            self.assertTrue(acquired)
+
+    def test_waiter_returns_when_lock_is_released(self):
+        """
+        Test that a waiting process stops waiting as soon as the holder releases the lock.
+        """
+        held, release = threading.Event(), threading.Event()
+
+        def holder():
+            with distributed_lock('catalog'):
+                held.set()
+                release.wait()
+
+        thread = threading.Thread(target=holder)
+        thread.start()
+        held.wait()
+        threading.Timer(0.1, release.set).start()
+        started = time.monotonic()
+        with distributed_lock('catalog', wait=5) as acquired:
+            self.assertFalse(acquired)
+        thread.join()
+        self.assertLess(time.monotonic() - started, 2)
+
+    @override_settings(COURSE_IMPORT_CATALOG_LOCK_CACHE=None)
+    def test_lock_disabled(self):
+        with distributed_lock('catalog') as first, distributed_lock('catalog') as second:
+            self.assertTrue(first and second)
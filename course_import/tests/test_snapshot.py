@@ -0,0 +1,114 @@
+"""
+Tests for on-disk catalog snapshots.
+"""
+import json
+import os
+import shutil
+import tempfile
+from unittest.mock import Mock, patch
+
+from django.test import TestCase, override_settings
+
+from course_import.cache import CatalogCache, catalog_cache
+from course_import.filters import CourseTemplateRequested
+from course_import.predicates import canonical_predicate
+from course_import.snapshot import read_snapshot, restore_snapshot, snapshot_path, write_snapshot
+
+CATALOG = [
+    {"courses_name": "AI Courses", "zip_url": "https://a.tar.gz", "metadata": {"title": "Déjà vu", "active": True}},
+    {"courses_name": "Marketing", "zip_url": "https://b.tar.gz", "metadata": {"active": True}},
+]
+
+
+class TestCatalogSnapshot(TestCase):
+    """
+    Test cases for writing, reading and restoring snapshots.
+    """
+
+    def setUp(self):
+        super().setUp()
+        catalog_cache.clear()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_round_trip(self):
+        """
+        Test that entries and validators survive a write/read cycle.
+        """
+        path = write_snapshot('key', CATALOG, etag='"v1"', last_modified=Mock(), directory=self.directory)
+        snapshot = read_snapshot('key', directory=self.directory)
+
+        self.assertEqual(path, snapshot_path('key', self.directory))
+        self.assertEqual(snapshot.entries, CATALOG)
+        self.assertEqual(snapshot.etag, '"v1"')
+        self.assertIsNone(snapshot.last_modified)
+        self.assertEqual(os.listdir(self.directory), [os.path.basename(path)])
+
+    def test_missing_and_corrupt_snapshots(self):
+        """
+        Test that missing or damaged snapshots are ignored.
+        """
+        self.assertIsNone(read_snapshot('key', directory=self.directory))
+        self.assertIsNone(read_snapshot('key', directory=None))
+
+        path = write_snapshot('key', CATALOG, directory=self.directory)
+        with open(path, 'r+b') as snapshot_file:
+            snapshot_file.truncate(os.path.getsize(path) - 3)
+        self.assertIsNone(read_snapshot('key', directory=self.directory))
+
+    @override_settings(COURSE_IMPORT_CATALOG_CACHE_TTL=60)
+    def test_restore_keeps_remaining_ttl(self):
+        """
+        Test that a restored entry is fresh only for what is left of the TTL.
+        """
+        cache = CatalogCache()
+        write_snapshot('key', CATALOG, etag='"v1"', directory=self.directory)
+        self.assertTrue(restore_snapshot(cache, 'key', directory=self.directory).is_fresh())
+
+        with patch('course_import.snapshot.time.time', return_value=10 ** 10):
+            entry = restore_snapshot(cache, 'key', directory=self.directory)
+        self.assertFalse(entry.is_fresh())
+        self.assertEqual(entry.conditional_headers(), {'If-None-Match': '"v1"'})
+        self.assertEqual(entry.value.entries, CATALOG)
+
+    @patch('course_import.pipeline.session_manager.get')
+    def test_new_worker_starts_from_snapshot(self, mock_get):
+        """
+        Test that a worker with an empty cache serves the snapshot written by another worker.
+        """
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.headers = {'ETag': '"v1"'}
+        mock_response.content = json.dumps(CATALOG).encode('utf-8')
+        mock_response.json.return_value = CATALOG
+        mock_get.return_value = mock_response
+
+        with override_settings(COURSE_IMPORT_CATALOG_SNAPSHOT_DIR=self.directory):
+            CourseTemplateRequested.run_filter(source_type="github", **{'source_config': "https://snap.json"})
+            catalog_cache.clear()  # simulate a freshly forked worker
+            resp = CourseTemplateRequested.run_filter(source_type="github", **{'source_config': "https://snap.json"})
+
+        self.assertEqual(resp['result'], CATALOG)
+        self.assertEqual(mock_get.call_count, 1)
+
+    @override_settings(COURSE_IMPORT_CATALOG_CACHE_TTL=60)
+    @patch('course_import.pipeline.session_manager.get')
+    def test_revalidated_snapshot_starts_new_workers_warm(self, mock_get):
+        """
+        Test that a 304 revalidation renews the snapshot, so the next new worker does not go to the network.
+        """
+        with patch('course_import.snapshot.time.time', return_value=1000.0):
+            path = write_snapshot(
+                ("https://snap.json", (), canonical_predicate(None)), CATALOG, etag='"v1"', directory=self.directory,
+            )
+        os.utime(path, (1000.0, 1000.0))
+        mock_get.return_value = Mock(status_code=304)
+
+        with override_settings(COURSE_IMPORT_CATALOG_SNAPSHOT_DIR=self.directory):
+            CourseTemplateRequested.run_filter(source_type="github", source_config="https://snap.json")
+            catalog_cache.clear()  # simulate a freshly forked worker
+            resp = CourseTemplateRequested.run_filter(source_type="github", source_config="https://snap.json")
+
+        self.assertEqual(resp['result'], CATALOG)
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(mock_get.call_args.kwargs['headers'], {'If-None-Match': '"v1"'})
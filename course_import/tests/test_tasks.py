@@ -0,0 +1,88 @@
+"""
+Tests for the asynchronous download-then-import task.
+"""
+from unittest.mock import MagicMock, patch
+
+from django.contrib.auth.models import User  # pylint: disable=imported-auth-user
+from django.test import TestCase
+from user_tasks.models import UserTaskStatus
+
+from course_import.circuit_breaker import CircuitOpenError
+from course_import.tasks import download_and_import, get_download_task_status
+
+ARGUMENTS = {'course_key_string': 'course-v1:edX+DemoX+Demo_Course', 'archive_name': 'course.tar.gz'}
+
+
+@patch('course_import.views.makedir')
+class TestDownloadAndImport(TestCase):
+    """
+    Test cases for download_and_import.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='staff', password='password', is_staff=True)
+
+    def run_task(self):
+        return download_and_import.apply(args=(
+            self.user.id, ARGUMENTS['course_key_string'], 'https://example.com/course.tar.gz',
+            ARGUMENTS['archive_name'], 'en',
+        ))
+
+    @patch('cms.djangoapps.contentstore.tasks.import_olx.delay')
+    @patch('course_import.views.download_file')
+    def test_download_then_import(self, mock_download_file, mock_delay, _mock_makedir):
+        """
+        Test that the import is queued with the stored archive and followed from the download status.
+        """
+        mock_download_file.return_value = 'olx_import/course.tar.gz'
+        mock_delay.return_value = MagicMock(task_id='import-task-id')
+        import_status = UserTaskStatus.objects.create(
+            user=self.user, task_id='import-task-id', task_class='CourseImportTask', name='Import', total_steps=1,
+            state='Importing',
+        )
+
+        result = self.run_task()
+
+        self.assertEqual(result.get(), 'import-task-id')
+        mock_delay.assert_called_once_with(
+            self.user.id, ARGUMENTS['course_key_string'], 'olx_import/course.tar.gz', 'course.tar.gz', 'en'
+        )
+        download_status = UserTaskStatus.objects.get(task_id=result.id)
+        self.assertEqual(download_status.state, UserTaskStatus.SUCCEEDED)
+        self.assertEqual(get_download_task_status(ARGUMENTS, result.id), import_status)
+
+    @patch('cms.djangoapps.contentstore.tasks.import_olx.delay')
+    @patch('course_import.views.download_file')
+    def test_download_failure(self, mock_download_file, mock_delay, _mock_makedir):
+        """
+        Test that a failed download fails the task with its error and queues no import.
+        """
+        mock_download_file.return_value = MagicMock()  # download_file's HttpResponseBadRequest
+
+        result = self.run_task()
+
+        self.assertTrue(result.failed())
+        mock_delay.assert_not_called()
+        status = get_download_task_status(ARGUMENTS, result.id)
+        self.assertEqual(status.state, UserTaskStatus.FAILED)
+        self.assertEqual(status.artifacts.get(name='Error').text, 'Failed to download a file.')
+
+    @patch('course_import.views.download_file')
+    def test_circuit_open_is_retried(self, mock_download_file, _mock_makedir):
+        """
+        Test that an open circuit retries the download after the circuit's retry delay.
+        """
+        mock_download_file.side_effect = CircuitOpenError('example.com', 4.2)
+
+        with patch.object(download_and_import, 'retry', side_effect=RuntimeError('retry')) as mock_retry:
+            result = self.run_task()
+
+        self.assertTrue(result.failed())
+        self.assertEqual(mock_retry.call_args.kwargs['countdown'], 5)
+
+    def test_unknown_task(self, _mock_makedir):
+        """
+        Test that an unknown task id has no status.
+        """
+        self.assertIsNone(get_download_task_status(ARGUMENTS, 'unknown'))
@@ -0,0 +1,191 @@
+"""
+Tests for the thumbnail disk cache.
+"""
+import os
+import shutil
+import tempfile
+from unittest.mock import Mock, patch
+
+from django.test import TestCase, override_settings
+
+from course_import.cache import catalog_cache
+from course_import.catalog import TemplateCatalog
+from course_import.thumbnails import (
+    ThumbnailCache,
+    ThumbnailError,
+    allow_catalog_thumbnails,
+    prefetch_thumbnails,
+    validate_thumbnail_url,
+)
+
+
+def image_response(content, content_type='image/png', status_code=200):
+    """
+    Build a mocked streamed image response.
+    """
+    response = Mock()
+    response.status_code = status_code
+    response.headers = {'Content-Type': content_type}
+    response.iter_content.return_value = [content]
+    return response
+
+
+def redirect_response(location):
+    """
+    Build a mocked redirect response.
+    """
+    response = Mock()
+    response.status_code = 302
+    response.headers = {'Location': location}
+    return response
+
+
+@override_settings(COURSE_IMPORT_THUMBNAIL_ALLOWED_HOSTS=['cdn.example.com'])
+class TestThumbnailCache(TestCase):
+    """
+    Test cases for fetching, serving and evicting thumbnails.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.cache = ThumbnailCache(directory=self.directory, max_bytes=10)
+        patcher = patch('course_import.thumbnails.session_manager.get')
+        self.mock_get = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_fetch_once(self):
+        """
+        Test that a thumbnail is downloaded once and then served from disk.
+        """
+        self.mock_get.return_value = image_response(b'12345')
+
+        path, content_type = self.cache.get_or_fetch('https://cdn.example.com/a.png')
+        self.assertEqual(self.cache.get_or_fetch('https://cdn.example.com/a.png'), (path, content_type))
+
+        self.assertEqual(content_type, 'image/png')
+        with open(path, 'rb') as image:
+            self.assertEqual(image.read(), b'12345')
+        self.assertEqual(self.mock_get.call_count, 1)
+
+    def test_rejects_non_images_and_bad_urls(self):
+        """
+        Test that non-image responses and non-http URLs are rejected without caching.
+        """
+        self.mock_get.return_value = image_response(b'<html>', content_type='text/html')
+        with self.assertRaises(ThumbnailError):
+            self.cache.fetch('https://cdn.example.com/page')
+        with self.assertRaises(ThumbnailError):
+            self.cache.fetch('file:///etc/passwd')
+        with override_settings(COURSE_IMPORT_THUMBNAIL_ALLOWED_HOSTS=['images.example.com']):
+            with self.assertRaises(ThumbnailError):
+                self.cache.fetch('https://cdn.example.com/a.png')
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_redirects_are_validated(self):
+        """
+        Test that redirects are followed only to allowed hosts, one validated hop at a time.
+        """
+        self.mock_get.side_effect = [
+            redirect_response('/b.png'),
+            image_response(b'123'),
+            redirect_response('http://169.254.169.254/latest/meta-data/'),
+        ]
+
+        path, _content_type = self.cache.fetch('https://cdn.example.com/a.png')
+        with open(path, 'rb') as image:
+            self.assertEqual(image.read(), b'123')
+        self.assertEqual(self.mock_get.call_args_list[1].args, ('https://cdn.example.com/b.png',))
+        with self.assertRaises(ThumbnailError):
+            self.cache.fetch('https://cdn.example.com/c.png')
+
+        self.assertEqual(self.mock_get.call_count, 3)
+        for call in self.mock_get.call_args_list:
+            self.assertIs(call.kwargs['allow_redirects'], False)
+
+    def test_least_recently_used_are_evicted(self):
+        """
+        Test that the cache stays within max_bytes by evicting the oldest images.
+        """
+        self.mock_get.side_effect = lambda url, **kwargs: image_response(b'1234')
+        self.cache.fetch('https://cdn.example.com/a.png')
+        self.cache.fetch('https://cdn.example.com/b.png')
+        os.utime(self.cache.paths('https://cdn.example.com/a.png')[0], ns=(1, 1))
+        os.utime(self.cache.paths('https://cdn.example.com/b.png')[0], ns=(2, 2))
+        self.cache.get('https://cdn.example.com/a.png')  # a is now the most recently used
+        self.cache.fetch('https://cdn.example.com/c.png')
+
+        self.assertIsNotNone(self.cache.get('https://cdn.example.com/a.png'))
+        self.assertIsNone(self.cache.get('https://cdn.example.com/b.png'))
+        self.assertIsNotNone(self.cache.get('https://cdn.example.com/c.png'))
+
+    def test_allowed_urls_survive_eviction(self):
+        """
+        Test that recorded allowed URLs are kept apart from the images and never evicted.
+        """
+        self.mock_get.side_effect = lambda url, **kwargs: image_response(b'1234')
+        self.cache.allow(['https://cdn.example.com/a.png', None])
+        for name in ('a', 'b', 'c'):
+            self.cache.fetch(f'https://cdn.example.com/{name}.png')
+
+        self.assertTrue(self.cache.is_allowed('https://cdn.example.com/a.png'))
+        self.assertFalse(self.cache.is_allowed('https://cdn.example.com/b.png'))
+
+    def test_prefetch(self):
+        """
+        Test that prefetching fetches each missing thumbnail once and skips failures.
+        """
+        def fake_get(url, **kwargs):  # pylint: disable=unused-argument
+            return image_response(b'1', status_code=404 if 'missing' in url else 200)
+
+        self.mock_get.side_effect = fake_get
+        fetched = prefetch_thumbnails(
+            ['https://cdn.example.com/a.png', 'https://cdn.example.com/a.png', None, 'https://cdn.example.com/missing'],
+            cache=self.cache,
+        )
+
+        self.assertEqual(fetched, 1)
+        self.assertEqual(prefetch_thumbnails(['https://cdn.example.com/a.png'], cache=self.cache), 0)
+
+
+class TestValidateThumbnailUrl(TestCase):
+    """
+    Test cases for choosing which thumbnail URLs may be proxied.
+    """
+
+    def setUp(self):
+        super().setUp()
+        catalog_cache.clear()
+        self.addCleanup(catalog_cache.clear)
+
+    def test_only_catalog_thumbnails_by_default(self):
+        """
+        Test that without allowed hosts only thumbnails of cached catalog entries are accepted.
+        """
+        catalog_cache.set('catalog', TemplateCatalog([
+            {"zip_url": "https://a.tar.gz", "metadata": {"thumbnail": "https://cdn.example.com/a.png"}},
+        ]))
+
+        validate_thumbnail_url('https://cdn.example.com/a.png')
+        for url in ('https://cdn.example.com/b.png', 'http://169.254.169.254/latest/meta-data/'):
+            with self.assertRaises(ThumbnailError):
+                validate_thumbnail_url(url)
+
+    def test_thumbnails_allowed_by_another_worker(self):
+        """
+        Test that without allowed hosts the thumbnails recorded in the shared directory are accepted.
+        """
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        catalog = TemplateCatalog([
+            {"zip_url": "https://a.tar.gz", "metadata": {"thumbnail": "https://cdn.example.com/a.png"}},
+        ])
+
+        with override_settings(COURSE_IMPORT_THUMBNAIL_CACHE_DIR=directory):
+            with self.assertRaises(ThumbnailError):
+                validate_thumbnail_url('https://cdn.example.com/a.png')
+            allow_catalog_thumbnails(catalog)
+            validate_thumbnail_url('https://cdn.example.com/a.png')
+            with self.assertRaises(ThumbnailError):
+                validate_thumbnail_url('https://cdn.example.com/b.png')
@@ -0,0 +1,78 @@
+"""
+Tests for catalog entry validation.
+"""
+import json
+from unittest.mock import Mock, patch
+
+from django.test import TestCase
+
+from course_import.cache import catalog_cache
+from course_import.filters import CourseTemplateRequested
+from course_import.validation import validate_entry
+
+VALID = {"courses_name": "AI", "zip_url": "https://a.tar.gz", "metadata": {"title": "AI", "active": True}}
+
+
+class TestValidateEntry(TestCase):
+    """
+    Test cases for the per-entry schema checks.
+    """
+
+    def test_valid_entry(self):
+        self.assertEqual(validate_entry(VALID), [])
+        self.assertEqual(validate_entry({"zip_url": "https://a.tar.gz", "metadata": {}}), [])
+
+    def test_invalid_entries(self):
+        """
+        Test that every problem of an entry is reported without raising.
+        """
+        self.assertEqual(validate_entry("AI"), ["expected object, got str"])
+        self.assertEqual(validate_entry({"courses_name": "AI"}), ["zip_url: required", "metadata: required"])
+        self.assertEqual(
+            validate_entry({"zip_url": 3, "metadata": {"active": "yes", "tags": "ai"}}),
+            ["zip_url: expected string, got int", "metadata.active: expected boolean, got str",
+             "metadata.tags: expected array, got str"],
+        )
+
+
+class TestCatalogValidation(TestCase):
+    """
+    Test cases for invalid entries in fetched catalogs.
+    """
+
+    def setUp(self):
+        super().setUp()
+        catalog_cache.clear()
+
+    @patch('course_import.pipeline.session_manager.get')
+    def test_invalid_entries_are_quarantined(self, mock_get):
+        """
+        Test that malformed entries are dropped and reported while the rest of the catalog is served.
+        """
+        catalog = [VALID, {"courses_name": "Broken", "zip_url": "https://b.tar.gz"}, None]
+        for stream in (False, True):
+            with self.subTest(stream=stream):
+                catalog_cache.clear()
+                body = json.dumps(catalog).encode('utf-8')
+                mock_response = Mock(status_code=200, content=body, headers={})
+                mock_response.iter_content.return_value = [body]
+                mock_get.return_value = mock_response
+
+                resp = CourseTemplateRequested.run_filter(
+                    source_type="github", source_config="https://edly_courses.json", stream=stream,
+                )
+
+                self.assertEqual(resp['result'], [VALID])
+                self.assertEqual(resp['invalid'], [
+                    {"index": 1, "courses_name": "Broken", "zip_url": "https://b.tar.gz",
+                     "errors": ["metadata: required"]},
+                    {"index": 2, "errors": ["expected object, got NoneType"]},
+                ])
+
+    @patch('course_import.pipeline.session_manager.get')
+    def test_catalog_must_be_an_array(self, mock_get):
+        mock_get.return_value = Mock(status_code=200, content=b'{"templates": []}', headers={})
+
+        resp = CourseTemplateRequested.run_filter(source_type="github", source_config="https://edly_courses.json")
+
+        self.assertEqual(resp['result'], {"error": "Expected a JSON array of templates", "status": 500})
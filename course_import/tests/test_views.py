@@ -1,7 +1,10 @@
 """
 Test for views.py.
 """
+import gzip
+import json
 import os
+import shutil
 import tarfile
 import tempfile
 from unittest.mock import MagicMock, patch
@@ -9,10 +12,18 @@ from unittest.mock import MagicMock, patch
 import requests
 from django.conf import settings
 from django.contrib.auth.models import User  # pylint: disable=imported-auth-user
+from django.test import override_settings
 from django.urls import reverse
 from path import Path as path
 from rest_framework import status
 from rest_framework.test import APIClient, APITestCase
+from user_tasks.models import UserTaskStatus
+
+from course_import.cache import catalog_cache
+from course_import.catalog import TemplateCatalog
+from course_import.circuit_breaker import CircuitOpenError
+from course_import.responses import rendition_cache
+from course_import.thumbnails import ThumbnailCache, ThumbnailError
 
 
 class PluginCourseImportViewTest(APITestCase):
@@ -84,7 +95,7 @@ class PluginCourseImportViewTest(APITestCase):
         response = self.client.post(self.get_url(self.course_id), format='json')
         self.assertEqual(response.status_code, 403)
 
-    @patch('requests.get')  # Ensure you're patching requests.get in the correct location
+    @patch('course_import.views.session_manager.get')
     @patch('course_import.views.makedir')  # Mocking os.path.isdir
     @patch('course_import.views.download_file')  # Mocking download_file method
     @patch('cms.djangoapps.contentstore.tasks.import_olx.delay')  # Mocking the task delay method
@@ -103,7 +114,7 @@ class PluginCourseImportViewTest(APITestCase):
         with open(self.good_tar_fullpath, 'rb') as fp:
             file_content = fp.read()
 
-        # Mock the response from requests.get
+        # Mock the response from the shared session
         mock_response = MagicMock()
         mock_response.status_code = 200
         mock_response.iter_content.return_value = (
@@ -169,7 +180,7 @@ class PluginCourseImportViewTest(APITestCase):
         self.client.login(username=self.staff_user.username, password=self.password)
 
         file_url = "https://example.com/test-course.tar.gz"
-        with patch('course_import.views.requests.get') as mock_get:
+        with patch('course_import.views.session_manager.get') as mock_get:
             mock_get.side_effect = requests.exceptions.RequestException("Failed to download a file.")
 
             response = self.client.post(
@@ -181,6 +192,47 @@ class PluginCourseImportViewTest(APITestCase):
             self.assertEqual(response.status_code, 400)
             self.assertEqual(response.content.decode('utf-8'), 'Failed to download a file.')
 
+    @patch('course_import.views.import_olx.delay')
+    @patch('course_import.views.makedir')
+    def test_import_course_by_url_upstream_error_not_enqueued(self, mock_isdir, mock_delay):
+        """
+        Test that an upstream error status is returned as a 400 without enqueueing an import.
+        """
+        mock_isdir.return_value = True
+        self.client.login(username=self.staff_user.username, password=self.password)
+
+        with patch('course_import.views.session_manager.get') as mock_get:
+            mock_get.return_value = MagicMock(status_code=404, headers={})
+            response = self.client.post(
+                self.get_url(self.course_id),
+                {'file_url': "https://example.com/test-course.tar.gz"},
+                format='json'
+            )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.content.decode('utf-8'), 'Failed to download a file.')
+        mock_delay.assert_not_called()
+
+    @patch('course_import.views.makedir')
+    def test_import_course_by_url_circuit_open(self, mock_isdir):
+        """
+        Test that a 503 with Retry-After is returned while the file host's circuit is open.
+        """
+        mock_isdir.return_value = True
+        self.client.login(username=self.staff_user.username, password=self.password)
+
+        with patch('course_import.views.session_manager.get') as mock_get:
+            mock_get.side_effect = CircuitOpenError('example.com', 12.5)
+
+            response = self.client.post(
+                self.get_url(self.course_id),
+                {'file_url': "https://example.com/test-course.tar.gz"},
+                format='json'
+            )
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '13')
+
     @patch('course_import.views.makedir')
     def test_import_course_by_url_final_except_block(self, mock_isdir):
         """
@@ -190,7 +242,7 @@ class PluginCourseImportViewTest(APITestCase):
         self.client.login(username=self.staff_user.username, password=self.password)
 
         file_url = "https://example.com/test-course.tar.gz"
-        with patch('requests.get') as mock_get:
+        with patch('course_import.views.session_manager.get') as mock_get:
             # Raise a generic exception to simulate an unexpected error
             mock_get.side_effect = Exception("Unexpected error occurred.")
 
@@ -203,6 +255,65 @@ class PluginCourseImportViewTest(APITestCase):
             self.assertEqual(response.status_code, 400)
             self.assertEqual(response.content.decode('utf-8'), 'Unexpected error occurred.')
 
+    @patch('course_import.views.makedir')
+    @patch('course_import.views.download_file')
+    @patch('course_import.views.download_and_import.delay')
+    def test_import_course_by_url_async(self, mock_delay, mock_download_file, _mock_makedir):
+        """
+        Test that the asynchronous mode queues the download and answers 202 without downloading.
+        """
+        mock_delay.return_value = MagicMock(task_id='download-task-id')
+        self.client.login(username=self.staff_user.username, password=self.password)
+
+        response = self.client.post(
+            self.get_url(self.course_id),
+            {'file_url': "https://example.com/test-course.tar.gz", 'async': True},
+            format='json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data, {'task_id': 'download-task-id', 'filename': 'test-course.tar.gz'})
+        mock_delay.assert_called_once_with(
+            self.staff_user.id, self.course_id, "https://example.com/test-course.tar.gz", 'test-course.tar.gz', 'en'
+        )
+        mock_download_file.assert_not_called()
+
+    def test_import_course_by_url_invalid_url(self):
+        """
+        Test that a file_url which is not an http(s) URL is rejected.
+        """
+        self.client.login(username=self.staff_user.username, password=self.password)
+
+        response = self.client.post(
+            self.get_url(self.course_id),
+            {'file_url': "file:///etc/test-course.tar.gz"},
+            format='json'
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.content.decode('utf-8'), 'Invalid file_url.')
+
+    @patch('course_import.views.CourseImportTask.generate_name')
+    def test_get_failed_download_status(self, mock_generate_name):
+        """
+        Test that polling a failed asynchronous download reports its error.
+        """
+        download_status = UserTaskStatus.objects.create(
+            user=self.staff_user, task_id='download-task-id', task_class='course_import.tasks.download_and_import',
+            name=f'Download of test-course.tar.gz for {self.course_id}', total_steps=2,
+        )
+        download_status.fail('Failed to download a file.')
+        mock_generate_name.return_value = f'Import of test-course.tar.gz for {self.course_id}'
+        self.client.login(username=self.staff_user.username, password=self.password)
+
+        response = self.client.get(
+            self.get_url(self.course_id),
+            {'task_id': 'download-task-id', 'filename': 'test-course.tar.gz'}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'state': UserTaskStatus.FAILED, 'error': 'Failed to download a file.'})
+
     @patch('course_import.views.CourseImportTask.generate_name')
     @patch('user_tasks.models.UserTaskStatus.objects.filter')
     def test_get_course_import_status_success(self, mock_filter, mock_generate_name):
@@ -268,3 +379,200 @@ class PluginCourseImportViewTest(APITestCase):
         # Assert the response
         self.assertEqual(response.status_code, 400)
         self.assertEqual(response.content.decode('utf-8'), 'Missing required parameters.')
+
+
+@override_settings(COURSE_IMPORT_TEMPLATES_SOURCE_CONFIG="https://edly_courses.json")
+class CourseTemplatesViewTest(APITestCase):
+    """
+    Test suite for the cacheable templates catalog endpoint.
+    """
+
+    catalog = [{"courses_name": "AI Courses", "zip_url": "https://a.tar.gz", "metadata": {"active": True}}]
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.staff_user = User.objects.create_user(
+            username="templates_staff", password="test_password", is_staff=True, is_superuser=True
+        )
+
+    def setUp(self):
+        super().setUp()
+        rendition_cache.clear()
+        self.client = APIClient()
+        self.client.login(username=self.staff_user.username, password="test_password")
+        patcher = patch('course_import.views.CourseTemplateRequested.run_filter')
+        self.mock_run_filter = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.mock_run_filter.return_value = {"result": self.catalog, "stale": False, "version": "v1"}
+        self.url = reverse('course_import:course_templates_list')
+
+    def test_catalog_with_etag(self):
+        """
+        Test that the catalog is returned with a strong ETag and answered with 304 when unchanged.
+        """
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content), self.catalog)
+        etag = response['ETag']
+        self.assertTrue(etag.startswith('"'))
+        self.mock_run_filter.assert_called_once_with(
+            source_type='github', source_config="https://edly_courses.json", headers={}
+        )
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_catalog_compressed_once(self):
+        """
+        Test that a gzip body is served and compressed only once per catalog version.
+        """
+        with patch('course_import.responses.gzip.compress', wraps=gzip.compress) as mock_compress:
+            first = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+            second = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(first['Content-Encoding'], 'gzip')
+        self.assertEqual(json.loads(gzip.decompress(second.content)), self.catalog)
+        self.assertIn('Accept-Encoding', first['Vary'])
+        self.assertEqual(mock_compress.call_count, 1)
+
+    def test_catalog_search_params(self):
+        """
+        Test that search parameters are passed to the filter and validated.
+        """
+        self.client.get(self.url, {'q': 'ai', 'limit': '10'})
+        self.assertEqual(self.mock_run_filter.call_args.kwargs['q'], 'ai')
+        self.assertEqual(self.mock_run_filter.call_args.kwargs['limit'], 10)
+
+        response = self.client.get(self.url, {'offset': '-1'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(self.url, {'limit': '\u00b2'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_catalog_unavailable(self):
+        """
+        Test that a fetch error is reported as 502.
+        """
+        self.mock_run_filter.return_value = {"result": {"error": "Failed", "status": 500}}
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 502)
+
+    @override_settings(COURSE_IMPORT_TEMPLATES_SOURCE_CONFIG=None)
+    def test_catalog_not_configured(self):
+        """
+        Test that the endpoint returns 404 when no templates source is configured.
+        """
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 404)
+
+
+class TemplateThumbnailViewTest(APITestCase):
+    """
+    Test suite for the thumbnail caching proxy endpoint.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.staff_user = User.objects.create_user(
+            username="thumbnail_staff", password="test_password", is_staff=True, is_superuser=True
+        )
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.login(username=self.staff_user.username, password="test_password")
+        self.url = reverse('course_import:course_templates_thumbnail')
+        catalog_cache.set('thumbnails', TemplateCatalog([
+            {"zip_url": "https://a.tar.gz", "metadata": {"thumbnail": "https://cdn.example.com/a.png"}},
+        ]))
+        self.addCleanup(catalog_cache.clear)
+        self.image = tempfile.NamedTemporaryFile(suffix='.png', delete=False)  # pylint: disable=consider-using-with
+        self.image.write(b'png-bytes')
+        self.image.close()
+        self.addCleanup(os.unlink, self.image.name)
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        settings_override = override_settings(COURSE_IMPORT_THUMBNAIL_CACHE_DIR=self.directory)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    @patch('course_import.views.thumbnail_cache.fetch')
+    def test_thumbnail_served_with_cache_headers(self, mock_fetch):
+        """
+        Test that a cached thumbnail is served with long-lived cache headers and an ETag.
+        """
+        mock_fetch.return_value = (self.image.name, 'image/png')
+
+        response = self.client.get(self.url, {'url': 'https://cdn.example.com/a.png'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'png-bytes')
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertIn('max-age=', response['Cache-Control'])
+
+        response = self.client.get(
+            self.url, {'url': 'https://cdn.example.com/a.png'}, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(mock_fetch.call_count, 1)
+
+    @patch('course_import.views.thumbnail_cache.fetch')
+    def test_thumbnail_on_disk_served_without_catalog(self, mock_fetch):
+        """
+        Test that a thumbnail another worker already cached is served without a catalog in this process.
+        """
+        catalog_cache.clear()
+        cache = ThumbnailCache(directory=self.directory)
+        image_path, meta_path = cache.paths('https://cdn.example.com/a.png')
+        with open(image_path, 'wb') as image, open(meta_path, 'w', encoding='utf-8') as meta:
+            image.write(b'png-bytes')
+            meta.write('image/png')
+
+        response = self.client.get(self.url, {'url': 'https://cdn.example.com/a.png'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'png-bytes')
+        mock_fetch.assert_not_called()
+
+    @patch('course_import.views.thumbnail_cache.fetch')
+    def test_thumbnail_allowed_by_another_worker(self, mock_fetch):
+        """
+        Test that a thumbnail recorded as allowed in the shared directory is fetched without a catalog.
+        """
+        catalog_cache.clear()
+        ThumbnailCache(directory=self.directory).allow(['https://cdn.example.com/a.png'])
+        mock_fetch.return_value = (self.image.name, 'image/png')
+
+        response = self.client.get(self.url, {'url': 'https://cdn.example.com/a.png'})
+
+        self.assertEqual(response.status_code, 200)
+        mock_fetch.assert_called_once_with('https://cdn.example.com/a.png')
+
+    def test_thumbnail_invalid_url(self):
+        """
+        Test that a missing or non-http URL is rejected.
+        """
+        self.assertEqual(self.client.get(self.url).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'url': 'file:///etc/passwd'}).status_code, 400)
+
+    @patch('course_import.views.thumbnail_cache.fetch')
+    def test_thumbnail_not_in_catalog(self, mock_fetch):
+        """
+        Test that URLs which are not thumbnails of a cached catalog are refused without fetching them.
+        """
+        response = self.client.get(self.url, {'url': 'http://127.0.0.1:8000/admin/'})
+
+        self.assertEqual(response.status_code, 400)
+        mock_fetch.assert_not_called()
+
+    @patch('course_import.views.thumbnail_cache.fetch')
+    def test_thumbnail_unavailable(self, mock_fetch):
+        """
+        Test that upstream failures are reported as 502.
+        """
+        mock_fetch.side_effect = ThumbnailError("Failed to fetch thumbnail. Status code: 404")
+        response = self.client.get(self.url, {'url': 'https://cdn.example.com/a.png'})
+        self.assertEqual(response.status_code, 502)
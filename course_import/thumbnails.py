@@ -0,0 +1,316 @@
+"""
+A local, size-bounded disk cache for template thumbnails.
+
+Catalog entries point at external thumbnail URLs. ``ThumbnailCache`` downloads
+each image once, stores it under the SHA-256 of its URL and evicts the least
+recently used images once the cache grows past ``COURSE_IMPORT_THUMBNAIL_CACHE_MAX_BYTES``.
+The thumbnail URLs of every stored catalog are also recorded as marker files under
+``.allowed/``, so any worker sharing the directory accepts them, not only the one
+that downloaded the catalog.
+"""
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlparse
+
+from django.conf import settings
+
+from course_import.cache import assembled_catalogs, catalog_cache
+from course_import.http_client import session_manager
+
+log = logging.getLogger(__name__)
+
+DEFAULT_THUMBNAIL_CACHE_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_THUMBNAIL_MAX_IMAGE_BYTES = 5 * 1024 * 1024
+DEFAULT_THUMBNAIL_PREFETCH_WORKERS = 4
+THUMBNAIL_CHUNK_SIZE = 64 * 1024
+META_SUFFIX = '.meta'
+ALLOWED_DIRECTORY = '.allowed'
+MAX_THUMBNAIL_REDIRECTS = 3
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+
+
+class ThumbnailError(Exception):
+    """
+    Raised when a thumbnail cannot be fetched or is not an acceptable image.
+    """
+
+
+def thumbnail_key(url):
+    return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+
+def validate_thumbnail_url(url):
+    """
+    Check that ``url`` may be proxied: http(s) only, and an allowed host.
+
+    With ``COURSE_IMPORT_THUMBNAIL_ALLOWED_HOSTS`` unset, only URLs that are the
+    ``metadata.thumbnail`` of an entry in a cached catalog, or that were recorded as
+    allowed in the shared thumbnail directory, are allowed, so the proxy cannot be
+    pointed at arbitrary (for instance internal) hosts.
+
+    Raises:
+        ThumbnailError: If the URL is not allowed.
+    """
+    parsed = urlparse(url or '')
+    if parsed.scheme not in ('http', 'https') or not parsed.hostname:
+        raise ThumbnailError("Invalid thumbnail URL.")
+    allowed_hosts = getattr(settings, 'COURSE_IMPORT_THUMBNAIL_ALLOWED_HOSTS', None)
+    if allowed_hosts is not None:
+        if parsed.hostname not in allowed_hosts:
+            raise ThumbnailError("Thumbnail host not allowed.")
+    elif not (is_catalog_thumbnail(url) or thumbnail_cache.is_allowed(url)):
+        raise ThumbnailError("Thumbnail URL not found in the template catalog.")
+
+
+def is_catalog_thumbnail(url):
+    """
+    Return whether ``url`` is the thumbnail of an entry in a cached catalog.
+    """
+    return any(
+        url in getattr(catalog, 'thumbnails', ())
+        for cache in (catalog_cache, assembled_catalogs)
+        for catalog in cache.values()
+    )
+
+
+def validate_thumbnail_redirect(url, location):
+    """
+    Check that a redirect from ``url`` to ``location`` may be followed.
+
+    With ``COURSE_IMPORT_THUMBNAIL_ALLOWED_HOSTS`` set the target must be an allowed
+    host, otherwise it must stay on the host of ``url``.
+
+    Raises:
+        ThumbnailError: If the redirect is not allowed.
+    """
+    parsed = urlparse(location)
+    if parsed.scheme not in ('http', 'https') or not parsed.hostname:
+        raise ThumbnailError("Invalid thumbnail redirect.")
+    allowed_hosts = getattr(settings, 'COURSE_IMPORT_THUMBNAIL_ALLOWED_HOSTS', None)
+    if allowed_hosts is not None:
+        allowed = parsed.hostname in allowed_hosts
+    else:
+        allowed = parsed.hostname == urlparse(url).hostname
+    if not allowed:
+        raise ThumbnailError("Thumbnail redirect host not allowed.")
+
+
+class ThumbnailCache:
+    """
+    Thumbnails stored on disk, keyed by URL hash, with LRU eviction by total size.
+
+    Recency is tracked through file modification times, which are bumped on every
+    hit, so the cache directory can be shared by every worker on a host.
+    """
+
+    def __init__(self, directory=None, max_bytes=None):
+        self._directory = directory
+        self._max_bytes = max_bytes
+        self._evict_lock = threading.Lock()
+
+    @property
+    def directory(self):
+        if self._directory:
+            return self._directory
+        return getattr(settings, 'COURSE_IMPORT_THUMBNAIL_CACHE_DIR', None) or os.path.join(
+            settings.GITHUB_REPO_ROOT, 'thumbnails'
+        )
+
+    @property
+    def max_bytes(self):
+        if self._max_bytes is not None:
+            return self._max_bytes
+        return getattr(settings, 'COURSE_IMPORT_THUMBNAIL_CACHE_MAX_BYTES', DEFAULT_THUMBNAIL_CACHE_MAX_BYTES)
+
+    def paths(self, url):
+        """
+        Return the image and metadata paths for ``url``.
+        """
+        path = os.path.join(self.directory, thumbnail_key(url))
+        return path, path + META_SUFFIX
+
+    def allowed_path(self, url):
+        return os.path.join(self.directory, ALLOWED_DIRECTORY, thumbnail_key(url))
+
+    def allow(self, urls):
+        """
+        Record ``urls`` as allowed thumbnails for every worker sharing the directory.
+        """
+        urls = [url for url in dict.fromkeys(urls) if isinstance(url, str) and url]
+        if not urls:
+            return
+        os.makedirs(os.path.join(self.directory, ALLOWED_DIRECTORY), exist_ok=True)
+        for url in urls:
+            path = self.allowed_path(url)
+            if not os.path.exists(path):
+                with open(path, 'a', encoding='utf-8'):
+                    pass
+
+    def is_allowed(self, url):
+        return os.path.exists(self.allowed_path(url))
+
+    def get(self, url):
+        """
+        Return ``(path, content_type)`` for a cached thumbnail, or None on a miss.
+        """
+        path, meta_path = self.paths(url)
+        try:
+            with open(meta_path, encoding='utf-8') as meta_file:
+                content_type = meta_file.read().strip()
+            os.utime(path)
+        except OSError:
+            return None
+        return path, content_type
+
+    def fetch(self, url):
+        """
+        Download ``url`` into the cache.
+
+        Returns:
+            tuple: ``(path, content_type)`` of the stored image.
+
+        Raises:
+            ThumbnailError: If the download fails or is not an image within the size limit.
+        """
+        validate_thumbnail_url(url)
+        max_image_bytes = getattr(
+            settings, 'COURSE_IMPORT_THUMBNAIL_MAX_IMAGE_BYTES', DEFAULT_THUMBNAIL_MAX_IMAGE_BYTES
+        )
+        response = self.request(url)
+        try:
+            if response.status_code != 200:
+                raise ThumbnailError(f"Failed to fetch thumbnail. Status code: {response.status_code}")
+            content_type = response.headers.get('Content-Type', '').split(';')[0].strip()
+            if not content_type.startswith('image/'):
+                raise ThumbnailError("Thumbnail is not an image.")
+
+            os.makedirs(self.directory, exist_ok=True)
+            path, meta_path = self.paths(url)
+            with tempfile.NamedTemporaryFile(dir=self.directory, prefix='.thumb-', delete=False) as temp_file:
+                try:
+                    size = 0
+                    for chunk in response.iter_content(chunk_size=THUMBNAIL_CHUNK_SIZE):
+                        size += len(chunk)
+                        if size > max_image_bytes:
+                            raise ThumbnailError("Thumbnail is too large.")
+                        temp_file.write(chunk)
+                except BaseException:
+                    os.unlink(temp_file.name)
+                    raise
+            os.replace(temp_file.name, path)
+            with open(meta_path, 'w', encoding='utf-8') as meta_file:
+                meta_file.write(content_type)
+        finally:
+            response.close()
+
+        self.evict()
+        return path, content_type
+
+    def request(self, url):
+        """
+        GET ``url``, following redirects only to hosts ``validate_thumbnail_redirect`` accepts.
+        """
+        current = url
+        for _ in range(MAX_THUMBNAIL_REDIRECTS + 1):
+            response = session_manager.get(current, stream=True, allow_redirects=False)
+            if response.status_code not in REDIRECT_STATUSES:
+                return response
+            location = urljoin(current, response.headers.get('Location', ''))
+            response.close()
+            validate_thumbnail_redirect(url, location)
+            current = location
+        raise ThumbnailError("Too many thumbnail redirects.")
+
+    def get_or_fetch(self, url):
+        return self.get(url) or self.fetch(url)
+
+    def evict(self):
+        """
+        Remove least recently used thumbnails until the cache fits in ``max_bytes``.
+        """
+        with self._evict_lock:
+            try:
+                names = os.listdir(self.directory)
+            except FileNotFoundError:
+                return
+            images, total = [], 0
+            for name in names:
+                if name.startswith('.') or name.endswith(META_SUFFIX):
+                    continue
+                try:
+                    stat_result = os.stat(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    continue
+                images.append((stat_result.st_mtime_ns, stat_result.st_size, name))
+                total += stat_result.st_size
+
+            images.sort()
+            for _mtime, size, name in images:
+                if total <= self.max_bytes:
+                    break
+                path = os.path.join(self.directory, name)
+                for stale_path in (path + META_SUFFIX, path):
+                    try:
+                        os.unlink(stale_path)
+                    except FileNotFoundError:
+                        pass
+                total -= size
+
+
+thumbnail_cache = ThumbnailCache()
+
+
+def prefetch_thumbnails(urls, cache=None):
+    """
+    Download every thumbnail in ``urls`` that is not cached yet.
+
+    Returns:
+        int: The number of thumbnails fetched.
+    """
+    cache = cache or thumbnail_cache
+    missing = [url for url in dict.fromkeys(urls) if isinstance(url, str) and url and cache.get(url) is None]
+    if not missing:
+        return 0
+
+    def fetch(url):
+        try:
+            cache.fetch(url)
+            return True
+        except Exception as err:  # pylint: disable=broad-except
+            log.warning("Could not prefetch thumbnail %s: %s", url, err)
+            return False
+
+    workers = getattr(settings, 'COURSE_IMPORT_THUMBNAIL_PREFETCH_WORKERS', DEFAULT_THUMBNAIL_PREFETCH_WORKERS)
+    with ThreadPoolExecutor(max_workers=max(min(workers, len(missing)), 1)) as executor:
+        return sum(executor.map(fetch, missing))
+
+
+def allow_catalog_thumbnails(catalog, cache=None):
+    """
+    Record the thumbnails of ``catalog`` as allowed in the shared thumbnail directory.
+    """
+    cache = cache or thumbnail_cache
+    try:
+        cache.allow(catalog.thumbnails)
+    except OSError as err:
+        log.warning("Could not record allowed thumbnails: %s", err)
+
+
+def thumbnail_prefetch_enabled():
+    return getattr(settings, 'COURSE_IMPORT_THUMBNAIL_PREFETCH', False)
+
+
+def prefetch_catalog_thumbnails(entries):
+    """
+    Warm the thumbnails of a refreshed catalog on a background thread, if enabled.
+    """
+    if not thumbnail_prefetch_enabled():
+        return None
+    urls = [(entry.get('metadata') or {}).get('thumbnail') for entry in entries]
+    thread = threading.Thread(target=prefetch_thumbnails, args=(urls,), daemon=True)
+    thread.start()
+    return thread
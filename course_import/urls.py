@@ -15,6 +15,10 @@ app_url_patterns = (
         # reverse("course_import:course_templates_import")
         re_path(fr'^import/{settings.COURSE_ID_PATTERN}/$', views.CourseImportView.as_view(),
                 name='course_templates_import'),
+        # reverse("course_import:course_templates_list")
+        path('templates/', views.CourseTemplatesView.as_view(), name='course_templates_list'),
+        # reverse("course_import:course_templates_thumbnail")
+        path('thumbnails/', views.TemplateThumbnailView.as_view(), name='course_templates_thumbnail'),
 
     ]
     , "course_import",
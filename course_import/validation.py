@@ -0,0 +1,74 @@
+"""
+Schema checks for catalog entries.
+
+The templates pipelines validate every entry in the same pass that applies the
+``where`` predicate. An invalid entry is left out of the catalog and reported
+with a diagnostic instead of failing the whole catalog, so one malformed line
+cannot take template listing down. Checks are plain type tests that never raise.
+"""
+
+# Field name mapped to (accepted types, required).
+ENTRY_SCHEMA = {
+    'zip_url': (str, True),
+    'metadata': (dict, True),
+    'courses_name': (str, False),
+}
+METADATA_SCHEMA = {
+    'title': (str, False),
+    'description': (str, False),
+    'thumbnail': (str, False),
+    'active': (bool, False),
+    'tags': (list, False),
+}
+TYPE_NAMES = {str: 'string', dict: 'object', bool: 'boolean', list: 'array'}
+
+
+def _check(document, schema, prefix, errors):
+    for field, (types, required) in schema.items():
+        value = document.get(field)
+        if value is None:
+            if required:
+                errors.append(f"{prefix}{field}: required")
+        elif not isinstance(value, types):
+            errors.append(f"{prefix}{field}: expected {TYPE_NAMES[types]}, got {type(value).__name__}")
+
+
+def validate_entry(entry):
+    """
+    Check one catalog entry against the schema.
+
+    Returns:
+        list: Human readable problems; empty when the entry is valid.
+    """
+    if not isinstance(entry, dict):
+        return [f"expected object, got {type(entry).__name__}"]
+    errors = []
+    _check(entry, ENTRY_SCHEMA, '', errors)
+    metadata = entry.get('metadata')
+    if isinstance(metadata, dict):
+        _check(metadata, METADATA_SCHEMA, 'metadata.', errors)
+    return errors
+
+
+def entry_diagnostic(index, entry, errors):
+    """
+    Build the structured diagnostic reported for an invalid entry.
+    """
+    diagnostic = {"index": index, "errors": errors}
+    if isinstance(entry, dict):
+        for field in ('courses_name', 'zip_url'):
+            if isinstance(entry.get(field), str):
+                diagnostic[field] = entry[field]
+    return diagnostic
+
+
+def iter_valid_entries(entries, invalid):
+    """
+    Yield the valid entries, appending a diagnostic to ``invalid`` for every other one.
+    """
+    for index, entry in enumerate(entries):
+        errors = validate_entry(entry)
+        if errors:
+            invalid.append(entry_diagnostic(index, entry, errors))
+        else:
+            yield entry
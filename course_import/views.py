@@ -11,17 +11,37 @@ import requests
 from cms.djangoapps.contentstore.storage import course_import_export_storage  # pylint: disable=import-error
 from cms.djangoapps.contentstore.tasks import CourseImportTask, import_olx  # pylint: disable=import-error
 from django.conf import settings
-from django.core.files import File
-from django.http import HttpResponse, HttpResponseBadRequest
+from django.http import FileResponse, HttpResponse, HttpResponseBadRequest, HttpResponseNotModified
 from path import Path as path
 from rest_framework.generics import GenericAPIView
 from rest_framework.permissions import IsAdminUser, IsAuthenticated  # lint-amnesty, pylint: disable=wrong-import-order
 from rest_framework.response import Response
 from user_tasks.models import UserTaskStatus
 
+from course_import.archive_cache import archive_cache
+from course_import.circuit_breaker import CircuitOpenError
+from course_import.downloads import (
+    DEFAULT_DOWNLOAD_ATTEMPTS,
+    PartialDownload,
+    SegmentedDownloadError,
+    SpooledArchive,
+    continues_at,
+    download_segments,
+    segment_count,
+    write_response,
+)
+from course_import.filters import CourseTemplateRequested
+from course_import.http_client import session_manager
+from course_import.metrics import incr, timer
+from course_import.renderers import CodecJSONRenderer
+from course_import.responses import get_rendition
+from course_import.tasks import download_and_import, get_download_task_status
+from course_import.thumbnails import ThumbnailError, thumbnail_cache, thumbnail_key, validate_thumbnail_url
+
 log = logging.getLogger(__name__)
 
 IMPORTABLE_FILE_TYPES = ('.tar.gz', '.zip')
+DEFAULT_THUMBNAIL_MAX_AGE = 7 * 24 * 60 * 60  # seconds
 
 
 class CourseImportView(GenericAPIView):
@@ -32,10 +52,15 @@ class CourseImportView(GenericAPIView):
     - Import a course by downloading a file from a specified URL.
     - Retrieve the status of the import task.
 
+    With ``COURSE_IMPORT_ASYNC_DOWNLOAD`` (or ``"async": true`` in the request) the
+    download also happens in a Celery task, see ``course_import.tasks``.
+
     Attributes:
         permission_classes (tuple): Permissions required to access this API.
+        renderer_classes (tuple): Renderers encoding the responses with the configured JSON codec.
     """
     permission_classes = (IsAuthenticated, IsAdminUser)
+    renderer_classes = (CodecJSONRenderer,)
 
     def post(self, request, course_id):
         """
@@ -43,37 +68,58 @@ class CourseImportView(GenericAPIView):
 
         Downloads a file from the provided URL, stores it, and triggers the course import task.
 
+        In asynchronous mode the file is only validated here, and a task downloading it
+        and then triggering the import is queued instead.
+
         Args:
             request (Request): The HTTP request object.
             course_id (str): The ID of the course to import.
 
         Returns:
-            Response: Contains the task ID and filename if successful.
+            Response: Contains the task ID and filename if successful; 202 Accepted with the
+                ID of the download task in asynchronous mode.
             HttpResponseBadRequest: If required parameters are missing or invalid.
-            HttpResponse: In case of any exceptions, an error message is returned.
+            HttpResponse: 503 while the file host's circuit is open; in case of any
+                other exceptions, an error message is returned.
         """
         course_key = course_id
         # Check for input source
         if 'file_url' not in request.data:
             return HttpResponseBadRequest("file_url missing.")
 
-        course_dir = path(settings.GITHUB_REPO_ROOT) / base64.urlsafe_b64encode(
-            repr(course_key).encode('utf-8')
-        ).decode('utf-8')
+        course_dir = course_import_directory(course_key)
 
         file_url = request.data['file_url']
-        filename = os.path.basename(urlparse(file_url).path)
+        parsed_url = urlparse(file_url)
+        filename = os.path.basename(parsed_url.path)
 
+        if parsed_url.scheme not in ('http', 'https') or not parsed_url.netloc:
+            return HttpResponseBadRequest("Invalid file_url.")
         if not filename.endswith(IMPORTABLE_FILE_TYPES):
             return HttpResponseBadRequest("Invalid file type.")
 
+        asynchronous = request.data.get('async', getattr(settings, 'COURSE_IMPORT_ASYNC_DOWNLOAD', False))
+        if isinstance(asynchronous, str):
+            asynchronous = asynchronous.lower() in ('1', 'true')
+        if asynchronous:
+            with timer('import.enqueue'):
+                async_result = download_and_import.delay(
+                    request.user.id, str(course_key), file_url, filename, request.LANGUAGE_CODE)
+            return Response({
+                'task_id': async_result.task_id,
+                'filename': filename
+            }, status=202)
+
         # moving this into method. They were causing issues in mocking in tests.
         makedir(course_dir)
 
         try:
             storage_path = download_file(course_key, file_url, filename, course_dir)
-            async_result = import_olx.delay(
-                request.user.id, str(course_key), storage_path, filename, request.LANGUAGE_CODE)
+            if not isinstance(storage_path, str):
+                return storage_path
+            with timer('import.enqueue'):
+                async_result = import_olx.delay(
+                    request.user.id, str(course_key), storage_path, filename, request.LANGUAGE_CODE)
 
             resp = Response({
                 'task_id': async_result.task_id,
@@ -81,6 +127,10 @@ class CourseImportView(GenericAPIView):
             })
 
             return resp
+        except CircuitOpenError as err:
+            response = HttpResponse(str(err), status=503)
+            response['Retry-After'] = str(int(err.retry_after) + 1)
+            return response
         except Exception as err:  # pylint: disable=broad-except
             return HttpResponse(str(err), status=400)
 
@@ -92,8 +142,11 @@ class CourseImportView(GenericAPIView):
             request (Request): The HTTP request object.
             course_id (str): The ID of the course.
 
+        The ID of an asynchronous download task reports the download's state until it
+        has queued the import, and the import's state from then on.
+
         Returns:
-            Response: Contains the state of the task if found.
+            Response: Contains the state of the task if found, and the ``error`` of a failed one.
             HttpResponse: If required parameters are missing or task is not found.
         """
         course_key = course_id
@@ -107,25 +160,156 @@ class CourseImportView(GenericAPIView):
             args = {'course_key_string': str(course_key), 'archive_name': filename}
             name = CourseImportTask.generate_name(args)
             task_status = UserTaskStatus.objects.filter(name=name, task_id=task_id).first()
+            if not task_status:
+                task_status = get_download_task_status(args, task_id)
             if not task_status:
                 return HttpResponse('Task not found.', status=400)
 
-            return Response({
+            data = {
                 'state': task_status.state
-            })
+            }
+            if task_status.state == UserTaskStatus.FAILED:
+                error = task_status.artifacts.filter(name='Error').first()
+                data['error'] = error.text if error else None
+            return Response(data)
         except Exception as err:  # pylint: disable=broad-except
             return HttpResponse(str(err), status=400)
 
 
+class CourseTemplatesView(GenericAPIView):
+    """
+    Read-only API View listing the course templates catalog.
+
+    The catalog is fetched through the ``CourseTemplateRequested`` filter from the source
+    configured in ``COURSE_IMPORT_TEMPLATES_SOURCE_TYPE``, ``COURSE_IMPORT_TEMPLATES_SOURCE_CONFIG``
+    and ``COURSE_IMPORT_TEMPLATES_SOURCE_HEADERS``. Responses carry a strong ETag and are
+    served pre-compressed, so unchanged catalogs are answered with 304 Not Modified.
+
+    Attributes:
+        permission_classes (tuple): Permissions required to access this API.
+    """
+    permission_classes = (IsAuthenticated, IsAdminUser)
+
+    def get(self, request):
+        """
+        Handles the GET request for the templates catalog.
+
+        Args:
+            request (Request): The HTTP request object. Optional ``q``, ``offset`` and
+                ``limit`` query parameters return a page of matching templates.
+
+        Returns:
+            HttpResponse: The catalog JSON, or 304 if the client's copy is current.
+            HttpResponseBadRequest: If offset or limit are not non-negative integers.
+            HttpResponse: 404 if no source is configured, 502 if the catalog cannot be fetched.
+        """
+        source_config = getattr(settings, 'COURSE_IMPORT_TEMPLATES_SOURCE_CONFIG', None)
+        if not source_config:
+            return HttpResponse('Templates source not configured.', status=404)
+
+        query = {}
+        if request.GET.get('q'):
+            query['q'] = request.GET['q']
+        for name in ('offset', 'limit'):
+            if name in request.GET:
+                value = request.GET[name]
+                if not value.isdecimal():
+                    return HttpResponseBadRequest(f"Invalid {name}.")
+                query[name] = int(value)
+
+        output = CourseTemplateRequested.run_filter(
+            source_type=getattr(settings, 'COURSE_IMPORT_TEMPLATES_SOURCE_TYPE', 'github'),
+            source_config=source_config,
+            headers=getattr(settings, 'COURSE_IMPORT_TEMPLATES_SOURCE_HEADERS', {}),
+            **query,
+        )
+        result = output.get('result')
+        if result is None or (isinstance(result, dict) and 'error' in result):
+            error = result.get('error') if isinstance(result, dict) else 'No templates source handled the request.'
+            log.error(f"Course templates catalog unavailable: {error}")
+            return HttpResponse('Templates catalog unavailable.', status=502)
+
+        return get_rendition(result, output.get('version'), query).respond(request)
+
+
+class TemplateThumbnailView(GenericAPIView):
+    """
+    API View serving template thumbnails from the local thumbnail cache.
+
+    Each thumbnail URL is fetched from upstream once, stored on disk and then served
+    locally with long-lived cache headers.
+
+    Attributes:
+        permission_classes (tuple): Permissions required to access this API.
+    """
+    permission_classes = (IsAuthenticated, IsAdminUser)
+
+    def get(self, request):
+        """
+        Handles the GET request for a thumbnail.
+
+        Args:
+            request (Request): The HTTP request object with the thumbnail ``url`` query parameter.
+
+        Returns:
+            FileResponse: The cached image.
+            HttpResponseNotModified: If the client already has the image.
+            HttpResponseBadRequest: If the URL is missing or not allowed.
+            HttpResponse: 502 if the image cannot be fetched.
+        """
+        url = request.GET.get('url')
+        # A thumbnail on disk was validated when it was fetched, by this or another worker.
+        cached = thumbnail_cache.get(url) if url else None
+        if cached is None:
+            try:
+                validate_thumbnail_url(url)
+            except ThumbnailError as err:
+                return HttpResponseBadRequest(str(err))
+
+        etag = f'"{thumbnail_key(url)}"'
+        max_age = getattr(settings, 'COURSE_IMPORT_THUMBNAIL_MAX_AGE', DEFAULT_THUMBNAIL_MAX_AGE)
+        if request.META.get('HTTP_IF_NONE_MATCH') == etag:
+            response = HttpResponseNotModified()
+        else:
+            try:
+                path, content_type = cached or thumbnail_cache.fetch(url)
+                image = open(path, 'rb')  # pylint: disable=consider-using-with
+                response = FileResponse(image, content_type=content_type)
+            except (ThumbnailError, OSError) as err:
+                log.warning(f"Thumbnail {url} unavailable: {err}")
+                return HttpResponse('Thumbnail unavailable.', status=502)
+
+        response['ETag'] = etag
+        response['Cache-Control'] = f'private, max-age={max_age}'
+        return response
+
+
 def download_file(course_key, file_url, filename, course_dir):
     """
-    Downloads a file from a given URL and saves it to the specified directory.
+    Downloads a file from a given URL into import storage.
+
+    The file is buffered in memory, or in a temporary file in ``course_dir`` once it
+    exceeds ``COURSE_IMPORT_DOWNLOAD_MAX_MEMORY_SIZE``, and handed to the storage
+    backend from there; the buffer is removed afterwards.
+
+    A transfer that breaks off is resumed with a ``Range`` request, up to
+    ``COURSE_IMPORT_DOWNLOAD_ATTEMPTS`` attempts in all, when upstream supports it. The
+    bytes received are kept in ``course_dir`` after the last attempt too, so the next
+    import of the same URL picks up where this one stopped.
+
+    With ``COURSE_IMPORT_ARCHIVE_CACHE_MAX_BYTES`` set, archives are kept in the
+    ``archive_cache`` and an unchanged archive is not downloaded nor uploaded again.
+
+    With ``COURSE_IMPORT_DOWNLOAD_SEGMENTS`` above 1, a large archive from a server
+    accepting ranges is fetched over that many connections at once; if a range fails
+    or the ranges do not add up to the announced archive, it is downloaded again in
+    one stream.
 
     Args:
         course_key (str): The key of the course being imported.
         file_url (str): The URL of the file to download.
         filename (str): The name of the file.
-        course_dir (path.Path): The directory to save the file.
+        course_dir (path.Path): The directory a large file is buffered in.
 
     Returns:
         str: The storage path where the file is saved.
@@ -133,28 +317,94 @@ def download_file(course_key, file_url, filename, course_dir):
     Raises:
         HttpResponseBadRequest: If the download fails or is invalid.
     """
-    response = requests.get(file_url, stream=True)  # pylint: disable=missing-timeout
-
-    if response.status_code != 200:
-        return HttpResponseBadRequest("Failed to download a file.")
-
-    temp_filepath = course_dir / filename
-    total_size = 0  # Track total size in bytes
-
-    with open(temp_filepath, "wb") as temp_file:
-        for chunk in response.iter_content(chunk_size=1024):
-            if chunk:
-                chunk_size = len(chunk)
-                total_size += chunk_size
-                temp_file.write(chunk)
-
-    log.info(f"Course import {course_key}: File downloaded from URL, file: {filename}")
-
-    with open(temp_filepath, 'rb') as local_file:
-        django_file = File(local_file)
-        storage_path = course_import_export_storage.save('olx_import/' + filename, django_file)
-
-    return storage_path
+    partial = PartialDownload(course_dir, file_url)
+    cached_etag = archive_cache.lookup(file_url)
+    attempts = getattr(settings, 'COURSE_IMPORT_DOWNLOAD_ATTEMPTS', DEFAULT_DOWNLOAD_ATTEMPTS)
+    segmented = True
+    attempt = 0
+    while attempt < attempts:
+        attempt += 1
+        offset, headers = partial.resume_headers()
+        if cached_etag and not offset:
+            headers = {'If-None-Match': cached_etag}
+        with timer('import.connect'):  # DNS, connect, TLS and time to the response headers
+            response = session_manager.get(file_url, stream=True, headers=headers)
+
+        if cached_etag and response.status_code == 304:
+            response.close()
+            storage_path = archive_cache.checkout(file_url, filename)
+            if storage_path:
+                incr('import.archive_cache_hits')
+                return storage_path
+            # The cached archive is gone: download it unconditionally, on an attempt of its own.
+            cached_etag = None
+            attempts += 1
+            continue
+        if offset and response.status_code in (206, 416) and not continues_at(response, offset):
+            # The kept bytes no longer line up with upstream: start over, on an attempt of its own.
+            response.close()
+            partial.discard()
+            attempts += 1
+            continue
+        if response.status_code not in (200, 206):
+            response.close()
+            return HttpResponseBadRequest("Failed to download a file.")
+        if response.status_code == 200:
+            # Upstream changed or ignores ranges; any kept bytes are stale.
+            partial.discard()
+            offset = 0
+            segments = segment_count(response) if segmented else 1
+        else:
+            segments = 1
+            incr('import.resumed')
+            log.info(f"Course import {course_key}: resuming download of {filename} at byte {offset}")
+
+        with SpooledArchive(filename, course_dir, resume_from=partial.path if offset else None) as archive:
+            try:
+                with timer('import.transfer'):
+                    if segments > 1:
+                        download_segments(file_url, response, archive, segments, session_manager.get)
+                        incr('import.segmented')
+                    else:
+                        write_response(response, archive)
+            except (SegmentedDownloadError, requests.RequestException) as err:
+                if segments > 1:
+                    # Segments retry on their own and leave no contiguous prefix to resume from;
+                    # download again in one stream, on an attempt of its own.
+                    log.warning(f"Course import {course_key}: segmented download of {filename} failed, "
+                                f"downloading it in one stream: {err}")
+                    segmented = False
+                    attempts += 1
+                    continue
+                if not partial.keep(response, archive) or attempt == attempts:
+                    raise
+                log.warning(f"Course import {course_key}: download of {filename} broke off at byte "
+                            f"{archive.size}, resuming: {err}")
+                continue
+            finally:
+                response.close()
+            incr('import.bytes', archive.size - offset)
+
+            log.info(f"Course import {course_key}: File downloaded from URL, file: {filename}")
+
+            with timer('import.storage_upload'):
+                if archive_cache.enabled:
+                    storage_path = archive_cache.store(file_url, response.headers.get('ETag'), archive, filename)
+                else:
+                    storage_path = course_import_export_storage.save('olx_import/' + filename, archive.as_file())
+            partial.discard()
+        return storage_path
+
+    return HttpResponseBadRequest("Failed to download a file.")
+
+
+def course_import_directory(course_key):
+    """
+    Return the local directory archives of ``course_key`` are buffered in.
+    """
+    return path(settings.GITHUB_REPO_ROOT) / base64.urlsafe_b64encode(
+        repr(course_key).encode('utf-8')
+    ).decode('utf-8')
 
 
 def makedir(course_dir):
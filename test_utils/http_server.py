@@ -0,0 +1,159 @@
+"""
+A local HTTP stand-in for GitHub raw content, serving a fixture directory tree.
+
+Latency and bandwidth can be throttled, so the benchmarks can serve synthetic
+catalogs under network conditions resembling the real upstream. Single byte
+ranges are supported, and responses can be cut short to simulate dropped
+connections.
+"""
+import hashlib
+import os
+import re
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlparse
+
+
+CHUNK_SIZE = 64 * 1024
+BYTE_RANGE = re.compile(r'bytes=(\d+)-(\d*)')
+
+
+class FixtureRequestHandler(SimpleHTTPRequestHandler):
+    """
+    Serve files under the fixture root with strong ETags, If-None-Match and Range/If-Range support.
+
+    Files are streamed from disk in chunks, so large catalogs are never held in memory.
+    """
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        self.server.requests.append(unquote(urlparse(self.path).path))
+        self.server.request_headers.append(dict(self.headers))
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        path = self.translate_path(self.path)
+        if not os.path.isfile(path):
+            self.send_error(404)
+            return
+        size, etag = self.file_etag(path)
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        start, end = 0, size - 1
+        match = BYTE_RANGE.fullmatch(self.headers.get('Range', ''))
+        partial = match is not None and self.headers.get('If-Range', etag) == etag
+        if partial:
+            start = int(match.group(1))
+            end = min(int(match.group(2)), end) if match.group(2) else end
+            if start >= size:
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{size}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+        length = end - start + 1
+        self.send_response(206 if partial else 200)
+        self.send_header('Content-Type', self.guess_type(path))
+        self.send_header('Content-Length', str(length))
+        if partial:
+            self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('ETag', etag)
+        self.end_headers()
+        if self.server.truncate:
+            # Send only part of the promised body, then drop the connection.
+            length = min(length, self.server.truncate.pop(0))
+            self.close_connection = True
+        with open(path, 'rb') as fixture:
+            fixture.seek(start)
+            try:
+                self.write_throttled(fixture, length)
+            except (BrokenPipeError, ConnectionResetError):
+                # The client stopped reading early, as a segmented download does with its first response.
+                self.close_connection = True
+
+    def file_etag(self, path):
+        """
+        Return the size and sha256 ETag of ``path``, hashed again only when the file changed.
+        """
+        stat = os.stat(path)
+        key = (path, stat.st_mtime_ns, stat.st_size)
+        etag = self.server.etags.get(key)
+        if etag is None:
+            digest = hashlib.sha256()
+            with open(path, 'rb') as fixture:
+                for chunk in iter(lambda: fixture.read(CHUNK_SIZE), b''):
+                    digest.update(chunk)
+            etag = self.server.etags[key] = '"' + digest.hexdigest() + '"'
+        return stat.st_size, etag
+
+    def write_throttled(self, fixture, length):
+        """
+        Copy ``length`` bytes of ``fixture`` to the client, no faster than ``bandwidth`` bytes per second.
+        """
+        bandwidth = self.server.bandwidth
+        started = time.monotonic()
+        sent = 0
+        while sent < length:
+            chunk = fixture.read(min(CHUNK_SIZE, length - sent))
+            if not chunk:
+                break
+            self.wfile.write(chunk)
+            sent += len(chunk)
+            if bandwidth:
+                ahead = sent / bandwidth - (time.monotonic() - started)
+                if ahead > 0:
+                    time.sleep(ahead)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+
+class FixtureHTTPServer:
+    """
+    Serve ``root`` on a free localhost port for the duration of a ``with`` block.
+
+    The decoded path of every GET is recorded in ``requests``, and its headers in
+    ``request_headers``. While ``truncate`` holds byte counts, each response body is
+    cut after the first of them, which is removed.
+
+    Arguments:
+        root (str): The directory to serve.
+        latency (float): Seconds to wait before answering each request.
+        bandwidth (int): Maximum bytes per second sent per response; unlimited when omitted.
+    """
+
+    def __init__(self, root, latency=0.0, bandwidth=None):
+        self.root = root
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.requests = []
+        self.request_headers = []
+        self.truncate = []
+        self._server = None
+        self._thread = None
+
+    def __enter__(self):
+        handler = partial(FixtureRequestHandler, directory=self.root)
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        self._server.requests = self.requests
+        self._server.request_headers = self.request_headers
+        self._server.truncate = self.truncate
+        self._server.etags = {}
+        self._server.latency = self.latency
+        self._server.bandwidth = self.bandwidth
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,), daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def url(self, path=''):
+        host, port = self._server.server_address
+        return f'http://{host}:{port}/{path.lstrip("/")}'
@@ -6,6 +6,7 @@ Django applications, so these settings will not be used.
 """
 
 import os
+import tempfile
 from path import Path as path
 
 DATABASES = {
@@ -28,6 +29,7 @@ DATABASES = {
 }
 
 GITHUB_REPO_ROOT = "course_data"
+COURSE_IMPORT_THUMBNAIL_CACHE_DIR = os.path.join(tempfile.gettempdir(), "course-import-thumbnails")
 
 INSTALLED_APPS = (
     'django.contrib.auth',
@@ -69,6 +71,7 @@ OPEN_EDX_FILTERS_CONFIG = {
     "org.edly.templates.fetch.requested.v1": {
         "pipeline": [
             "course_import.pipeline.GithubTemplatesPipeline",
+            "course_import.pipeline.S3TemplatesPipeline",
         ],
         "fail_silently": False,
     },